@@ -0,0 +1,130 @@
+'''Cron Schedules
+'''
+from __future__ import annotations
+
+import datetime as dt
+from typing import Dict, FrozenSet, Optional
+
+MONTH_NAMES = {name: idx + 1 for idx, name in enumerate(
+    ['jan', 'feb', 'mar', 'apr', 'may', 'jun',
+     'jul', 'aug', 'sep', 'oct', 'nov', 'dec'])}
+DAY_NAMES = {name: idx for idx, name in enumerate(
+    ['sun', 'mon', 'tue', 'wed', 'thu', 'fri', 'sat'])}
+
+# Upper bound on the search for the next fire time, e.g. for "0 0 30 2 *"
+MAX_SEARCH = dt.timedelta(days=366 * 5)
+
+
+def _parse_value(value: str, names: Dict[str, int]) -> int:
+    value = value.lower()
+    if value in names:
+        return names[value]
+    return int(value)
+
+
+def _parse_field(field: str,
+                 low: int,
+                 high: int,
+                 names: Optional[Dict[str, int]] = None) -> FrozenSet[int]:
+    names = names or {}
+    values = set()
+    for part in field.split(','):
+        step = 1
+        if '/' in part:
+            part, step_str = part.split('/', 1)
+            step = int(step_str)
+            if step < 1:
+                raise ValueError(f'Invalid step in {field}')
+        if part == '*':
+            start, end = low, high
+        elif '-' in part:
+            start_str, end_str = part.split('-', 1)
+            start = _parse_value(start_str, names)
+            end = _parse_value(end_str, names)
+        else:
+            start = _parse_value(part, names)
+            end = high if step > 1 else start
+        if start < low or end > high or start > end:
+            raise ValueError(f'{field} is out of range {low}-{high}')
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+class CronSchedule:
+    """Five field cron schedule
+
+    Supports `*`, lists, ranges, steps and month/day names.  As with `pycron`,
+    the day of month and day of week fields must both match.
+    """
+
+    def __init__(self, expression: str):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f'Expected 5 cron fields in "{expression}"')
+        self.expression = expression
+        self.minutes = _parse_field(fields[0], 0, 59)
+        self.hours = _parse_field(fields[1], 0, 23)
+        self.days = _parse_field(fields[2], 1, 31)
+        self.months = _parse_field(fields[3], 1, 12, MONTH_NAMES)
+        # 7 is an alias for Sunday
+        self.weekdays = frozenset(
+            day % 7 for day in _parse_field(fields[4], 0, 7, DAY_NAMES))
+
+    def __repr__(self) -> str:
+        return f'CronSchedule({self.expression!r})'
+
+    def matches(self, time: dt.datetime) -> bool:
+        """Checks whether the schedule fires in the minute of `time`
+
+        Args:
+            time (dt.datetime): Time to check
+
+        Returns:
+            bool: True if the schedule fires
+        """
+        return (time.minute in self.minutes and
+                time.hour in self.hours and
+                self.__day_matches(time))
+
+    def __day_matches(self, time: dt.datetime) -> bool:
+        return (time.month in self.months and
+                time.day in self.days and
+                time.isoweekday() % 7 in self.weekdays)
+
+    def next_after(self, time: dt.datetime) -> dt.datetime:
+        """Computes the first fire time strictly after `time`
+
+        Fire times are computed on the wall clock of `time`'s timezone.
+
+        Args:
+            time (dt.datetime): Start time
+
+        Raises:
+            ValueError: The schedule never fires
+
+        Returns:
+            dt.datetime: Next fire time, in the same timezone as `time`
+        """
+        tzinfo = time.tzinfo
+        start = time.replace(tzinfo=None, second=0, microsecond=0)
+        candidate = start + dt.timedelta(minutes=1)
+        while candidate - start <= MAX_SEARCH:
+            if candidate.month not in self.months:
+                candidate = self.__next_month(candidate)
+            elif not self.__day_matches(candidate):
+                candidate = (candidate.replace(hour=0, minute=0) +
+                             dt.timedelta(days=1))
+            elif candidate.hour not in self.hours:
+                candidate = (candidate.replace(minute=0) +
+                             dt.timedelta(hours=1))
+            elif candidate.minute not in self.minutes:
+                candidate += dt.timedelta(minutes=1)
+            else:
+                return candidate.replace(tzinfo=tzinfo)
+        raise ValueError(f'{self.expression} never fires')
+
+    @staticmethod
+    def __next_month(time: dt.datetime) -> dt.datetime:
+        year, month = divmod(time.month, 12)
+        return time.replace(year=time.year + year, month=month + 1, day=1,
+                            hour=0, minute=0)
@@ -0,0 +1,202 @@
+'''Output Delivery
+'''
+from __future__ import annotations
+
+import logging
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from threading import Event, Lock, Thread
+from typing import Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+from label_studio_slack_reporter.metrics import get_counter, get_summary
+from label_studio_slack_reporter.output import AbstractOutput
+
+
+class DeliveryTimeoutError(TimeoutError):
+    """A delivery did not complete within the pool's timeout
+    """
+
+
+@dataclass(eq=False)
+class Delivery:
+    """In-flight delivery of one message to one output
+    """
+    job: AbstractOutput
+    message: str
+    on_late_success: Optional[Callable[[AbstractOutput], None]] = None
+    started: Optional[float] = None
+    timed_out: bool = False
+    future: Future = field(default_factory=Future)
+    # Set once the future has failed with DeliveryTimeoutError
+    timeout_reported: Event = field(default_factory=Event)
+
+
+class DeliveryPool:
+    """Delivers messages to outputs concurrently
+
+    Every delivery runs on a shared pool of worker threads and is given
+    `timeout` seconds from the moment it starts.  A delivery that overruns is
+    counted as a job execution error and its future fails with
+    `DeliveryTimeoutError`, so a slow channel does not delay other outputs or
+    the next report, and the caller can retry it.  The worker itself cannot be
+    interrupted, so outputs also bound each request with a client timeout
+    shorter than `timeout`.  If a delivery that timed out does succeed in the
+    end, its `on_late_success` callback is called, so the caller can cancel
+    the retry.
+
+    Deliveries submitted together whose outputs share a `batch_key` are
+    executed as one batch through the output type's `execute_batch`.
+    """
+    MONITOR_INTERVAL_S = 1
+
+    def __init__(self,
+                 workers: int = 4,
+                 timeout: Optional[float] = 120):
+        self.__executor = ThreadPoolExecutor(max_workers=workers,
+                                             thread_name_prefix='delivery')
+        self.__timeout = timeout
+        self.__in_flight: Set[Delivery] = set()
+        self.__lock = Lock()
+        self.__stop_event = Event()
+        self.__output_timer = get_summary(
+            name='output_duration',
+            documentation='Output generation duration',
+            unit='second',
+            labelnames=['job']
+        )
+        get_counter(
+            name='job_execute_errors',
+            documentation='Job Execution error count',
+            labelnames=['job']
+        )
+        self.__log = logging.getLogger('DeliveryPool')
+
+    def start(self):
+        """Starts the timeout monitor
+        """
+        # Not joined on shutdown, the monitor exits within MONITOR_INTERVAL_S
+        Thread(target=self.__monitor, name='delivery_monitor', daemon=True).start()
+
+    def shutdown(self):
+        """Stops accepting deliveries and stops the monitor
+        """
+        self.__stop_event.set()
+        self.__executor.shutdown(wait=False, cancel_futures=True)
+
+    def submit_all(self,
+                   deliveries: List[Tuple[AbstractOutput, str]],
+                   on_late_success: Optional[Callable[[AbstractOutput], None]] = None
+                   ) -> List[Future]:
+        """Queues several messages for delivery, batching outputs that allow it
+
+        Args:
+            deliveries (List[Tuple[AbstractOutput, str]]): Output jobs and the
+            messages to send them
+            on_late_success (Optional[Callable[[AbstractOutput], None]],
+            optional): Called with the job once a delivery whose future failed
+            with `DeliveryTimeoutError` completes successfully. Defaults to
+            None.
+
+        Returns:
+            List[Future]: Futures in the order of `deliveries`, each resolving
+            once its job has executed
+        """
+        batches: Dict[Tuple[type, Hashable], List[Delivery]] = {}
+        futures = []
+        for job, message in deliveries:
+            delivery = Delivery(job=job, message=message,
+                                on_late_success=on_late_success)
+            futures.append(delivery.future)
+            key = job.batch_key
+            batches.setdefault((type(job), key if key is not None else delivery),
+                               []).append(delivery)
+        with self.__lock:
+            for batch in batches.values():
+                self.__in_flight.update(batch)
+        for batch in batches.values():
+            if len(batch) == 1:
+                self.__executor.submit(self.__deliver, batch[0])
+            else:
+                self.__executor.submit(self.__deliver_batch, batch)
+        return futures
+
+    def __deliver(self, delivery: Delivery):
+        delivery.started = time.monotonic()
+        try:
+            delivery.job.execute(message=delivery.message)
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            self.__finish(delivery, exc)
+        else:
+            self.__finish(delivery, None)
+
+    def __deliver_batch(self, batch: List[Delivery]):
+        started = time.monotonic()
+        for delivery in batch:
+            delivery.started = started
+        job_type = type(batch[0].job)
+        try:
+            errors = job_type.execute_batch([(delivery.job, delivery.message)
+                                             for delivery in batch])
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            errors = [exc] * len(batch)
+        self.__log.info('Executed batch of %d %s', len(batch), job_type.__name__)
+        for delivery, exc in zip(batch, errors):
+            self.__finish(delivery, exc)
+
+    def __finish(self, delivery: Delivery, exc: Optional[Exception]):
+        job = delivery.job
+        self.__output_timer.labels(job=job.name).observe(
+            time.monotonic() - delivery.started)
+        with self.__lock:
+            self.__in_flight.discard(delivery)
+            timed_out = delivery.timed_out
+            if exc is not None and not timed_out:
+                get_counter('job_execute_errors').labels(job=job.name).inc()
+        if timed_out:
+            self.__finish_late(delivery, exc)
+        elif exc is None:
+            self.__log.info('Executed %s', job.name)
+            delivery.future.set_result(None)
+        else:
+            self.__log.error('Failed to execute %s', job.name, exc_info=exc)
+            delivery.future.set_exception(exc)
+
+    def __finish_late(self, delivery: Delivery, exc: Optional[Exception]):
+        # The future already failed, and the caller may have queued a retry
+        job = delivery.job
+        if exc is not None:
+            self.__log.warning('Delivery to %s failed after timing out: %s', job.name, exc)
+            return
+        self.__log.warning('Delivery to %s succeeded after timing out', job.name)
+        if delivery.on_late_success is None:
+            return
+        # Let the failure be handled before reporting the success
+        delivery.timeout_reported.wait()
+        try:
+            delivery.on_late_success(job)
+        except Exception:  # pylint: disable=broad-exception-caught
+            self.__log.exception('Failed to handle late delivery to %s', job.name)
+
+    def __monitor(self):
+        while not self.__stop_event.wait(self.MONITOR_INTERVAL_S):
+            if self.__timeout is None:
+                continue
+            now = time.monotonic()
+            with self.__lock:
+                expired = [delivery for delivery in self.__in_flight
+                           if delivery.started is not None and
+                           not delivery.timed_out and
+                           now - delivery.started >= self.__timeout]
+                for delivery in expired:
+                    delivery.timed_out = True
+                    self.__in_flight.discard(delivery)
+                    get_counter('job_execute_errors').labels(
+                        job=delivery.job.name).inc()
+            for delivery in expired:
+                self.__log.error('Delivery to %s timed out after %.0f seconds',
+                                 delivery.job.name, self.__timeout)
+                delivery.future.set_exception(DeliveryTimeoutError(
+                    f'Delivery to {delivery.job.name} timed out after '
+                    f'{self.__timeout:.0f} seconds'))
+                delivery.timeout_reported.set()
@@ -0,0 +1,228 @@
+'''Async Label Studio Fetch Layer
+'''
+from __future__ import annotations
+
+import asyncio
+import logging
+import tempfile
+from typing import (TYPE_CHECKING, Any, BinaryIO, Coroutine, Dict, Iterator,
+                    List, Optional, TypeVar)
+
+import httpx
+import ijson
+from label_studio_sdk.client import AsyncLabelStudio
+from label_studio_sdk.types import BaseUser, Export
+
+from label_studio_slack_reporter.config import get_cache_path
+from label_studio_slack_reporter.sync import as_dict, updated_tasks_query
+
+if TYPE_CHECKING:
+    from label_studio_slack_reporter.label_studio import ExportSnapshotManager
+
+T = TypeVar('T')
+
+
+class AsyncFetcher:
+    """asyncio based Label Studio fetch layer
+
+    All requests share one pooled, keep-alive HTTP session.  Use as an async
+    context manager.
+    """
+
+    def __init__(self,
+                 url: str,
+                 api_key: str,
+                 max_connections: int = 8,
+                 timeout: float = 60 * 10):
+        self.__url = url.rstrip('/')
+        self.__api_key = api_key
+        self.__limits = httpx.Limits(max_connections=max_connections,
+                                     max_keepalive_connections=max_connections)
+        self.__timeout = timeout
+        self.__http: Optional[httpx.AsyncClient] = None
+        self.__client: Optional[AsyncLabelStudio] = None
+        self.__log = logging.getLogger('AsyncFetcher')
+
+    async def __aenter__(self) -> AsyncFetcher:
+        self.__http = httpx.AsyncClient(
+            headers={'Authorization': f'Token {self.__api_key}'},
+            limits=self.__limits,
+            timeout=self.__timeout
+        )
+        self.__client = AsyncLabelStudio(
+            base_url=self.__url,
+            api_key=self.__api_key,
+            httpx_client=self.__http
+        )
+        return self
+
+    async def __aexit__(self, *_):
+        await self.__http.aclose()
+        self.__http = None
+        self.__client = None
+
+    async def get_project(self, project_id: int):
+        """Retrieves the project info
+
+        Args:
+            project_id (int): Project ID
+
+        Returns:
+            Project: Project info
+        """
+        return await self.__client.projects.get(id=project_id)
+
+    async def list_users(self) -> List[BaseUser]:
+        """Retrieves the user list
+
+        Returns:
+            List[BaseUser]: Users
+        """
+        return await self.__client.users.list()
+
+    async def list_updated_tasks(self, project_id: int, since: str) -> List[Dict]:
+        """Retrieves the tasks created, updated or annotated after `since`
+
+        Args:
+            project_id (int): Project to query
+            since (str): ISO 8601 high-water mark
+
+        Returns:
+            List[Dict]: Tasks including their annotations
+        """
+        pager = await self.__client.tasks.list(project=project_id,
+                                               fields='all',
+                                               query=updated_tasks_query(since))
+        return [as_dict(task) async for task in pager]
+
+    async def list_exports(self, project_id: int) -> List[Export]:
+        """Lists the project's export snapshots
+
+        Args:
+            project_id (int): Project ID
+
+        Returns:
+            List[Export]: Export snapshots
+        """
+        return await self.__client.projects.exports.list(project_id)
+
+    async def create_export(self, project_id: int, title: str) -> Export:
+        """Starts building an export snapshot
+
+        Args:
+            project_id (int): Project ID
+            title (str): Snapshot title
+
+        Returns:
+            Export: Export snapshot
+        """
+        return await self.__client.projects.exports.create(project_id=project_id,
+                                                           title=title)
+
+    async def get_export(self, project_id: int, export_id: int) -> Export:
+        """Retrieves an export snapshot
+
+        Args:
+            project_id (int): Project ID
+            export_id (int): Export snapshot ID
+
+        Returns:
+            Export: Export snapshot
+        """
+        return await self.__client.projects.exports.get(project_id=project_id,
+                                                        export_pk=export_id)
+
+    async def delete_export(self, project_id: int, export_id: int):
+        """Deletes an export snapshot
+
+        Args:
+            project_id (int): Project ID
+            export_id (int): Export snapshot ID
+        """
+        await self.__client.projects.exports.delete(project_id=project_id,
+                                                    export_pk=export_id)
+
+    async def download_export(self,
+                              project_id: int,
+                              export_id: int,
+                              spool: BinaryIO):
+        """Streams a JSON export snapshot into `spool`
+
+        Chunks are written from a worker thread, so a slow disk does not block
+        the event loop.
+
+        Args:
+            project_id (int): Project ID
+            export_id (int): Export snapshot ID
+            spool (BinaryIO): Destination file
+        """
+        self.__log.debug('Downloading snapshot %s for Project %s',
+                         export_id, project_id)
+        async with self.__http.stream(
+                'GET',
+                f'{self.__url}/api/projects/{project_id}/exports/{export_id}/download',
+                params={'exportType': 'JSON'}) as response:
+            response.raise_for_status()
+            async for chunk in response.aiter_bytes():
+                await asyncio.to_thread(spool.write, chunk)
+
+
+class BlockingTaskSource:
+    """Task source for worker threads backed by an `AsyncFetcher`
+
+    Mirrors `Reporter.iter_project_export` and `Reporter.get_updated_tasks`, so
+    `Reporter.sync_project` can run in a worker thread while the requests,
+    including those managing export snapshots, run on the event loop.
+    """
+
+    def __init__(self,
+                 fetcher: AsyncFetcher,
+                 loop: asyncio.AbstractEventLoop,
+                 exports: ExportSnapshotManager):
+        self.__fetcher = fetcher
+        self.__loop = loop
+        self.__exports = exports
+
+    def __run(self, coro: Coroutine[Any, Any, T]) -> T:
+        try:
+            future = asyncio.run_coroutine_threadsafe(coro, self.__loop)
+        except RuntimeError:
+            # The report already timed out and its loop has closed
+            coro.close()
+            raise
+        return future.result()
+
+    def iter_project_export(self,
+                            project_id: int,
+                            reuse_snapshot: bool = True) -> Iterator[Dict]:
+        """Streams the project export
+
+        Args:
+            project_id (int): Project to export
+            reuse_snapshot (bool, optional): Reuse a recent export snapshot if
+            there is one.  Defaults to True.
+
+        Yields:
+            Dict: LabelStudio export task
+        """
+        export_id = self.__run(self.__exports.aacquire(self.__fetcher, project_id,
+                                                       reuse_snapshot))
+        try:
+            with tempfile.TemporaryFile(dir=get_cache_path()) as spool:
+                self.__run(self.__fetcher.download_export(project_id, export_id, spool))
+                spool.seek(0)
+                yield from ijson.items(spool, 'item', use_float=True)
+        finally:
+            self.__run(self.__exports.acollect(self.__fetcher, project_id))
+
+    def get_updated_tasks(self, project_id: int, since: str) -> List[Dict]:
+        """Retrieves the tasks created, updated or annotated after `since`
+
+        Args:
+            project_id (int): Project to query
+            since (str): ISO 8601 high-water mark
+
+        Returns:
+            List[Dict]: Tasks including their annotations
+        """
+        return self.__run(self.__fetcher.list_updated_tasks(project_id, since))
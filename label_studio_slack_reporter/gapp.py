@@ -2,16 +2,23 @@
 '''
 from __future__ import annotations
 
+import datetime as dt
 import logging
+import os
+import tempfile
+import threading
+import time
 from argparse import ArgumentParser
 from pathlib import Path
 from typing import Optional
 
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
+from google_auth_httplib2 import AuthorizedHttp
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import Resource, build
 from googleapiclient.errors import HttpError
+from googleapiclient.http import HttpRequest, build_http
 
 from label_studio_slack_reporter.exceptions import (
     GmailServiceCreateFail, GoogleAppCredentialsNotFound)
@@ -19,10 +26,24 @@ from label_studio_slack_reporter.exceptions import (
 
 class GoogleAppService:
     """Google App Service
+
+    Holds one Gmail resource for the life of the process.  Requests made
+    through it use an authorized HTTP transport owned by the calling thread,
+    since `httplib2` is not thread safe.  Each transport gives up on a request
+    after `timeout` seconds.  The token is refreshed in the background shortly
+    before it expires, and the token file is only rewritten when the token
+    changes.
     """
+    # The token and Gmail resource each have a lock, transports are per thread
+    # pylint: disable=too-many-instance-attributes
     GOOGLE_API_SCOPES = [
         'https://www.googleapis.com/auth/gmail.send',
     ]
+    REFRESH_MARGIN = dt.timedelta(minutes=5)
+    # Recheck interval for tokens without an expiry
+    REFRESH_INTERVAL = dt.timedelta(minutes=15)
+    # Guards against refreshing in a tight loop if tokens are very short lived
+    MIN_REFRESH_DELAY = dt.timedelta(seconds=30)
 
     __instance: Optional[GoogleAppService] = None
 
@@ -42,7 +63,8 @@ class GoogleAppService:
 
     def __init__(self,
                  credentials: Path,
-                 token: Path):
+                 token: Path,
+                 timeout: float = 60):
         if self.__instance is not None:
             raise RuntimeError('Singleton violation')
         if not credentials.is_file():
@@ -50,32 +72,88 @@ class GoogleAppService:
 
         self.__creds_path = credentials
         self.__token_path = token
+        self.__timeout = timeout
         self.__token: Optional[Credentials] = None
+        self.__token_json: Optional[str] = None
+        self.__token_lock = threading.RLock()
+        self.__gmail_service: Optional[Resource] = None
+        self.__gmail_lock = threading.Lock()
+        self.__local = threading.local()
+        self.__refresh_thread = threading.Thread(target=self.__refresh_loop,
+                                                 name='gapp_token_refresh',
+                                                 daemon=True)
         self.__log = logging.getLogger('GoogleAppService')
 
         self.load()
         GoogleAppService.__instance = self
+        self.__refresh_thread.start()
 
     def load(self):
         """Loads and refreshes the tokens
         """
-        if self.__token_path.is_file():
-            self.__token = Credentials.from_authorized_user_file(
-                filename=self.__token_path.as_posix(),
-                scopes=self.GOOGLE_API_SCOPES)
-        if not self.__token or not self.__token.valid:
-            if (self.__token and
-                self.__token.expired and
-                    self.__token.refresh_token):
-                self.__token.refresh(request=Request())
-            else:
-                flow = InstalledAppFlow.from_client_secrets_file(
-                    client_secrets_file=self.__creds_path.as_posix(),
-                    scopes=self.GOOGLE_API_SCOPES
-                )
-                self.__token = flow.run_local_server()
-            with open(self.__token_path, 'w', encoding='utf-8') as handle:
-                handle.write(self.__token.to_json())
+        with self.__token_lock:
+            if self.__token_path.is_file():
+                self.__token = Credentials.from_authorized_user_file(
+                    filename=self.__token_path.as_posix(),
+                    scopes=self.GOOGLE_API_SCOPES)
+                self.__token_json = self.__token.to_json()
+            if not self.__token or not self.__token.valid:
+                if (self.__token and
+                    self.__token.expired and
+                        self.__token.refresh_token):
+                    self.__token.refresh(request=Request())
+                else:
+                    flow = InstalledAppFlow.from_client_secrets_file(
+                        client_secrets_file=self.__creds_path.as_posix(),
+                        scopes=self.GOOGLE_API_SCOPES
+                    )
+                    self.__token = flow.run_local_server()
+            self.__save_token()
+
+    def __save_token(self):
+        token_json = self.__token.to_json()
+        if token_json == self.__token_json:
+            return
+        tmp_fd, tmp_path = tempfile.mkstemp(dir=self.__token_path.parent,
+                                            suffix='.tmp')
+        with open(tmp_fd, 'w', encoding='utf-8') as handle:
+            handle.write(token_json)
+        os.replace(tmp_path, self.__token_path)
+        self.__token_json = token_json
+        self.__log.info('Saved token to %s', self.__token_path)
+
+    def __get_refresh_delay(self) -> float:
+        with self.__token_lock:
+            expiry = self.__token.expiry
+        if expiry is None:
+            return self.REFRESH_INTERVAL.total_seconds()
+        # google-auth expiries are naive UTC
+        refresh_at = expiry - self.REFRESH_MARGIN
+        now = dt.datetime.now(dt.timezone.utc).replace(tzinfo=None)
+        return max(self.MIN_REFRESH_DELAY, refresh_at - now).total_seconds()
+
+    def __refresh_loop(self):
+        while True:
+            time.sleep(self.__get_refresh_delay())
+            try:
+                with self.__token_lock:
+                    if self.__token.refresh_token:
+                        self.__token.refresh(request=Request())
+                        self.__log.debug('Refreshed token')
+                    self.__save_token()
+            except Exception:  # pylint: disable=broad-exception-caught
+                self.__log.exception('Failed to refresh token')
+                # Back off instead of retrying in a tight loop
+                time.sleep(self.REFRESH_MARGIN.total_seconds() / 5)
+
+    def __build_request(self, _, *args, **kwargs) -> HttpRequest:
+        """Builds requests on the calling thread's authorized transport
+        """
+        if not hasattr(self.__local, 'http'):
+            http = build_http()
+            http.timeout = self.__timeout
+            self.__local.http = AuthorizedHttp(self.__token, http=http)
+        return HttpRequest(self.__local.http, *args, **kwargs)
 
     def get_gmail_service(self) -> Resource:
         """Retrieves the gmail service
@@ -86,18 +164,21 @@ class GoogleAppService:
         Returns:
             Resource: Gmail Service Resource
         """
-        self.load()
-        try:
-            service: Resource = build(
-                serviceName='gmail',
-                version='v1',
-                credentials=self.__token
-            )
-        except HttpError as exc:
-            self.__log.exception(
-                'Failed to retrieve gmail service due to %s', exc)
-            raise GmailServiceCreateFail from exc
-        return service
+        with self.__gmail_lock:
+            if self.__gmail_service is not None:
+                return self.__gmail_service
+            try:
+                self.__gmail_service = build(
+                    serviceName='gmail',
+                    version='v1',
+                    credentials=self.__token,
+                    requestBuilder=self.__build_request
+                )
+            except HttpError as exc:
+                self.__log.exception(
+                    'Failed to retrieve gmail service due to %s', exc)
+                raise GmailServiceCreateFail from exc
+            return self.__gmail_service
 
 
 def run_cli_gapp():
@@ -0,0 +1,103 @@
+'''Job Queue
+'''
+from __future__ import annotations
+
+import datetime as dt
+import time
+from dataclasses import dataclass
+from queue import Empty
+from threading import Condition
+from typing import Dict, List, Optional, Tuple
+
+from label_studio_slack_reporter.metrics import (get_counter, get_gauge,
+                                                 get_summary)
+from label_studio_slack_reporter.output import AbstractOutput
+
+
+@dataclass
+class PendingRun:
+    """Queued run of a set of output jobs
+    """
+    cycle: dt.datetime
+    jobs: List[AbstractOutput]
+    enqueued: float
+    prewarm: bool = False
+
+
+class CoalescingJobQueue:
+    """Unbounded FIFO of pending runs that never blocks producers
+
+    A run for the same set of outputs as one that is still pending is merged
+    into the pending run, which then reports on the newer cycle.  The number of
+    pending runs is therefore bounded by the number of distinct output sets.
+    Pre-warming runs are only merged with other pre-warming runs.
+    """
+
+    def __init__(self):
+        self.__pending: Dict[Tuple[bool, Tuple[str, ...]], PendingRun] = {}
+        self.__condition = Condition()
+        self.__depth = get_gauge(
+            name='job_queue_depth',
+            documentation='Number of pending runs in the job queue'
+        )
+        self.__wait_timer = get_summary(
+            name='job_queue_wait',
+            documentation='Time runs spend waiting in the job queue',
+            unit='second'
+        )
+        get_counter(
+            name='job_queue_coalesced',
+            documentation='Runs merged into an already pending run'
+        )
+
+    def __len__(self) -> int:
+        with self.__condition:
+            return len(self.__pending)
+
+    def put(self,
+            cycle: dt.datetime,
+            jobs: List[AbstractOutput],
+            prewarm: bool = False):
+        """Queues a run, merging it into a pending run for the same outputs
+
+        Args:
+            cycle (dt.datetime): Report cycle
+            jobs (List[AbstractOutput]): Output jobs
+            prewarm (bool, optional): Only generate the reports ahead of the
+            cycle, without delivering them.  Defaults to False.
+        """
+        key = (prewarm, tuple(sorted(job.name for job in jobs)))
+        with self.__condition:
+            if key in self.__pending:
+                pending = self.__pending[key]
+                pending.cycle = max(pending.cycle, cycle)
+                get_counter('job_queue_coalesced').inc()
+            else:
+                self.__pending[key] = PendingRun(cycle=cycle,
+                                                 jobs=jobs,
+                                                 enqueued=time.monotonic(),
+                                                 prewarm=prewarm)
+            self.__depth.set(len(self.__pending))
+            self.__condition.notify()
+
+    def get(self, timeout: Optional[float] = None) -> PendingRun:
+        """Removes the oldest pending run
+
+        Args:
+            timeout (Optional[float], optional): Seconds to wait for a run.
+            Defaults to waiting forever.
+
+        Raises:
+            Empty: No run was queued within the timeout
+
+        Returns:
+            PendingRun: Run
+        """
+        with self.__condition:
+            if not self.__condition.wait_for(lambda: self.__pending, timeout):
+                raise Empty
+            key = next(iter(self.__pending))
+            pending = self.__pending.pop(key)
+            self.__depth.set(len(self.__pending))
+        self.__wait_timer.observe(time.monotonic() - pending.enqueued)
+        return pending
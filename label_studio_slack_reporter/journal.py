@@ -0,0 +1,261 @@
+'''Job Journal
+'''
+from __future__ import annotations
+
+import datetime as dt
+import json
+import logging
+import os
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from queue import SimpleQueue
+from threading import Lock, Thread
+from typing import Dict, List, Optional
+
+from label_studio_slack_reporter.config import get_data_path
+from label_studio_slack_reporter.metrics import get_counter
+
+
+@dataclass
+class Fire:
+    """Scheduled run recorded in the journal
+    """
+    cycle: dt.datetime
+    schedules: List[str]
+    jobs: List[str]
+
+
+class JobJournal:
+    """Append-only journal of scheduled runs and output deliveries
+
+    Records are appended as JSON lines by a background writer, which flushes
+    and fsyncs them in batches, so recording never blocks the scheduler or the
+    delivery workers.  Replaying the journal on startup tells which runs were
+    missed or left unfinished by a restart, and which outputs already received
+    the report for a cycle.  The journal is compacted whenever it is reloaded
+    and once it grows past `COMPACT_THRESHOLD` records.
+
+    Replicas sharing the journal must only write to it while they are the
+    leader, and reload it when they become the leader.
+    """
+    # Replayed state plus the background writer's queue, thread and handle
+    # pylint: disable=too-many-instance-attributes
+    COMPACT_THRESHOLD = 10000
+
+    def __init__(self,
+                 path: Optional[Path] = None,
+                 grace: float = 3600):
+        self.__path = path or get_data_path().joinpath('journal.jsonl')
+        self.grace = dt.timedelta(seconds=grace)
+        self.__fires: List[Fire] = []
+        self.__last_fires: Dict[str, dt.datetime] = {}
+        self.__delivered: Dict[str, dt.datetime] = {}
+        self.__lock = Lock()
+        self.__handle_lock = Lock()
+        self.__queue: SimpleQueue = SimpleQueue()
+        self.__appended = 0
+        self.__writer_thread = Thread(target=self.__write_loop,
+                                      name='journal',
+                                      daemon=True)
+        get_counter(
+            name='journal_errors',
+            documentation='Job journal write errors'
+        )
+        self.__log = logging.getLogger('JobJournal')
+
+        with self.__lock:
+            self.__replay()
+        # pylint: disable=consider-using-with
+        self.__handle = open(self.__path, 'a', encoding='utf-8')
+
+    def start(self):
+        """Starts the background writer
+        """
+        self.__writer_thread.start()
+
+    def shutdown(self):
+        """Writes out pending records and stops the background writer
+        """
+        self.__queue.put(None)
+        self.__writer_thread.join()
+
+    def reload(self):
+        """Replays the journal from disk again and compacts it
+        """
+        with self.__handle_lock:
+            self.__handle.close()
+            with self.__lock:
+                self.__fires = []
+                self.__last_fires = {}
+                self.__delivered = {}
+                self.__replay()
+                self.__compact()
+            # pylint: disable=consider-using-with
+            self.__handle = open(self.__path, 'a', encoding='utf-8')
+
+    def __replay(self):
+        if not self.__path.exists():
+            return
+        with open(self.__path, 'r', encoding='utf-8') as handle:
+            for line_no, line in enumerate(handle, start=1):
+                try:
+                    self.__apply(json.loads(line))
+                except (ValueError, KeyError, TypeError):
+                    # Most likely a record torn by a crash
+                    self.__log.warning('Skipping malformed record %s:%d',
+                                       self.__path, line_no)
+        self.__log.info('Replayed %d runs and %d deliveries',
+                        len(self.__fires), len(self.__delivered))
+
+    def __apply(self, record: Dict):
+        cycle = dt.datetime.fromisoformat(record['cycle'])
+        if record['type'] == 'fire':
+            fire = Fire(cycle=cycle,
+                        schedules=record['schedules'],
+                        jobs=record['jobs'])
+            self.__fires.append(fire)
+            for schedule in fire.schedules:
+                if schedule not in self.__last_fires or \
+                        self.__last_fires[schedule] < cycle:
+                    self.__last_fires[schedule] = cycle
+        elif record['type'] == 'delivered':
+            job = record['job']
+            if job not in self.__delivered or self.__delivered[job] < cycle:
+                self.__delivered[job] = cycle
+        else:
+            raise ValueError(f'Unknown record type {record["type"]}')
+
+    def __append(self, record: Dict):
+        with self.__lock:
+            self.__apply(record)
+        self.__queue.put(record)
+
+    def record_fire(self,
+                    cycle: dt.datetime,
+                    schedules: List[str],
+                    jobs: List[str]):
+        """Records a scheduled run
+
+        Args:
+            cycle (dt.datetime): Report cycle
+            schedules (List[str]): Schedules that fired
+            jobs (List[str]): Names of the output jobs to run
+        """
+        self.__append({'type': 'fire',
+                       'cycle': cycle.isoformat(),
+                       'schedules': schedules,
+                       'jobs': jobs})
+
+    def record_delivery(self, job: str, cycle: dt.datetime):
+        """Records a successful delivery
+
+        Args:
+            job (str): Output job name
+            cycle (dt.datetime): Report cycle delivered
+        """
+        self.__append({'type': 'delivered',
+                       'cycle': cycle.isoformat(),
+                       'job': job})
+
+    def is_delivered(self, job: str, cycle: dt.datetime) -> bool:
+        """Checks whether an output already received the report for a cycle
+
+        Args:
+            job (str): Output job name
+            cycle (dt.datetime): Report cycle
+
+        Returns:
+            bool: True if the report for `cycle` or a later cycle was delivered
+        """
+        with self.__lock:
+            return job in self.__delivered and self.__delivered[job] >= cycle
+
+    def get_last_fire(self, schedule: str) -> Optional[dt.datetime]:
+        """Retrieves the last recorded fire time of a schedule
+
+        Args:
+            schedule (str): Cron schedule
+
+        Returns:
+            Optional[dt.datetime]: Last fire time, or None if never recorded
+        """
+        with self.__lock:
+            return self.__last_fires.get(schedule, None)
+
+    def get_unfinished(self, now: dt.datetime) -> List[Fire]:
+        """Retrieves the runs within the grace window with undelivered outputs
+
+        Args:
+            now (dt.datetime): Current time
+
+        Returns:
+            List[Fire]: Runs, listing only the undelivered outputs
+        """
+        unfinished = []
+        with self.__lock:
+            for fire in self.__fires:
+                if fire.cycle < now - self.grace:
+                    continue
+                jobs = [job for job in fire.jobs
+                        if job not in self.__delivered or
+                        self.__delivered[job] < fire.cycle]
+                if jobs:
+                    unfinished.append(Fire(cycle=fire.cycle,
+                                           schedules=fire.schedules,
+                                           jobs=jobs))
+        return unfinished
+
+    def __write_loop(self):
+        while True:
+            records = [self.__queue.get()]
+            while not self.__queue.empty():
+                records.append(self.__queue.get())
+            lines = [json.dumps(record) + '\n'
+                     for record in records if record is not None]
+            with self.__handle_lock:
+                try:
+                    self.__handle.writelines(lines)
+                    self.__handle.flush()
+                    os.fsync(self.__handle.fileno())
+                    self.__appended += len(lines)
+                    if self.__appended > self.COMPACT_THRESHOLD:
+                        with self.__lock:
+                            self.__compact()
+                        self.__handle.close()
+                        # pylint: disable=consider-using-with
+                        self.__handle = open(self.__path, 'a', encoding='utf-8')
+                except OSError:
+                    self.__log.exception('Failed to write journal')
+                    get_counter('journal_errors').inc()
+                if None in records:
+                    self.__handle.close()
+                    return
+
+    def __compact(self):
+        now = dt.datetime.now(dt.timezone.utc)
+        self.__fires = [fire for fire in self.__fires
+                        if fire.cycle >= now - self.grace]
+        # Fires without jobs only carry last fire times, written below
+        records = [{'type': 'fire',
+                    'cycle': fire.cycle.isoformat(),
+                    'schedules': fire.schedules,
+                    'jobs': fire.jobs}
+                   for fire in self.__fires if fire.jobs]
+        records.extend({'type': 'fire',
+                        'cycle': cycle.isoformat(),
+                        'schedules': [schedule],
+                        'jobs': []}
+                       for schedule, cycle in self.__last_fires.items())
+        records.extend({'type': 'delivered',
+                        'cycle': cycle.isoformat(),
+                        'job': job}
+                       for job, cycle in self.__delivered.items())
+        tmp_fd, tmp_path = tempfile.mkstemp(dir=self.__path.parent,
+                                            suffix='.tmp')
+        with open(tmp_fd, 'w', encoding='utf-8') as handle:
+            handle.writelines(json.dumps(record) + '\n' for record in records)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(tmp_path, self.__path)
+        self.__appended = 0
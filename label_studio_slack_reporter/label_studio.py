@@ -1,22 +1,345 @@
 '''Label Studio Interface
 '''
+from __future__ import annotations
+
+import asyncio
+import dataclasses
 import datetime as dt
 import json
 import logging
-from io import BytesIO
+import os
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from threading import Lock
-from typing import Dict, List, Set, Tuple
+from typing import (TYPE_CHECKING, Any, Dict, Iterable, Iterator, List,
+                    Optional, Set, Tuple)
+
+from label_studio_slack_reporter.config import get_cache_path
+from label_studio_slack_reporter.metrics import get_counter, time_startup
+from label_studio_slack_reporter.report import ProjectReport, Report, UserCount
+from label_studio_slack_reporter.store import AnnotationStore
+from label_studio_slack_reporter.sync import (ProjectSyncState, as_dict,
+                                              updated_tasks_query)
+from label_studio_slack_reporter.users import UserDirectory
+
+if TYPE_CHECKING:
+    from label_studio_sdk.client import LabelStudio
+    from label_studio_sdk.projects.client_ext import ProjectExt
+    from label_studio_sdk.types import BaseUser, Export
+
+    from label_studio_slack_reporter.fetch import (AsyncFetcher,
+                                                   BlockingTaskSource)
+
+
+class ProjectTimeoutError(TimeoutError):
+    """Report generation for a project ran longer than `project_timeout`
+    """
+
+
+class LazyLabelStudio:
+    """Label Studio client constructed on first use
+
+    `label_studio_sdk` is slow to import, so it is only imported once the
+    first request is made.
+    """
+    # The client's API is proxied through __getattr__
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self, **kwargs):
+        self.__kwargs = kwargs
+        self.__client: Optional[LabelStudio] = None
+        self.__lock = Lock()
+
+    def __getattr__(self, name: str) -> Any:
+        if self.__client is not None:
+            return getattr(self.__client, name)
+        with self.__lock:
+            if self.__client is None:
+                with time_startup('label_studio_client'):
+                    # pylint: disable=import-outside-toplevel
+                    from label_studio_sdk.client import LabelStudio
+                    self.__client = LabelStudio(**self.__kwargs)
+        return getattr(self.__client, name)
+
+
+@dataclasses.dataclass(frozen=True)
+class SnapshotPolling:
+    """How often and how long to poll a snapshot that is still being built
+    """
+    interval: float = 2
+    timeout: float = 60 * 10
+
+
+class ExportSnapshotManager:
+    """Label Studio export snapshot manager
+
+    Reuses recent completed snapshots created by the reporter, polls snapshots
+    that are still being built, and deletes snapshots created by the reporter
+    once more than `retention` of them exist for a project.  The `aacquire` and
+    `acollect` variants make their requests through an `AsyncFetcher`.
+    """
+    SNAPSHOT_TITLE = 'label_studio_slack_reporter'
+
+    def __init__(self,
+                 client: LabelStudio,
+                 max_age: float = 0,
+                 retention: int = 1,
+                 poll_interval: float = 2,
+                 poll_timeout: float = 60 * 10):
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self.__client = client
+        self.__max_age = dt.timedelta(seconds=max_age)
+        self.__retention = retention
+        self.__polling = SnapshotPolling(interval=poll_interval, timeout=poll_timeout)
+        self.__state_path = get_cache_path().joinpath('exports.json')
+        self.__lock = Lock()
+        self.__log = logging.getLogger('ExportSnapshotManager')
+
+    @property
+    def reuses_snapshots(self) -> bool:
+        """True if `acquire` may return a snapshot taken earlier
+        """
+        return self.__max_age > dt.timedelta(0)
+
+    def __load_owned(self) -> Dict[str, List[int]]:
+        try:
+            with open(self.__state_path, 'r', encoding='utf-8') as handle:
+                return json.load(handle)
+        except (OSError, ValueError):
+            return {}
+
+    def __save_owned(self, owned: Dict[str, List[int]]):
+        tmp_path = self.__state_path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as handle:
+            json.dump(owned, handle)
+        os.replace(tmp_path, self.__state_path)
+
+    def __record(self, project_id: int, export_id: int):
+        with self.__lock:
+            owned = self.__load_owned()
+            owned.setdefault(str(project_id), []).append(export_id)
+            self.__save_owned(owned)
+
+    def __get_expired(self, project_id: int) -> List[int]:
+        with self.__lock:
+            export_ids = self.__load_owned().get(str(project_id), [])
+        n_keep = max(self.__retention, 0)
+        return export_ids[:len(export_ids) - n_keep] if n_keep else export_ids
+
+    def __forget(self, project_id: int, export_ids: List[int]):
+        if not export_ids:
+            return
+        with self.__lock:
+            owned = self.__load_owned()
+            owned[str(project_id)] = [export_id
+                                      for export_id in owned.get(str(project_id), [])
+                                      if export_id not in export_ids]
+            self.__save_owned(owned)
+
+    def __is_deleted(self, export_id: int, exc: Exception) -> bool:
+        if getattr(exc, 'status_code', None) == 404:
+            return True
+        self.__log.warning('Failed to delete snapshot %s: %s', export_id, exc)
+        return False
+
+    @staticmethod
+    def __created_at(snapshot: Export) -> dt.datetime:
+        created_at = snapshot.created_at
+        if created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=dt.timezone.utc)
+        return created_at
+
+    def __select_fresh(self, project_id: int, snapshots: Iterable[Export]) -> Optional[Export]:
+        now = dt.datetime.now(dt.timezone.utc)
+        fresh = [snapshot for snapshot in snapshots
+                 if snapshot.title == self.SNAPSHOT_TITLE and
+                 snapshot.status == 'completed' and snapshot.created_at and
+                 now - self.__created_at(snapshot) <= self.__max_age]
+        if not fresh:
+            return None
+        snapshot = max(fresh, key=self.__created_at)
+        self.__log.info('Reusing snapshot %s for Project %s', snapshot.id, project_id)
+        return snapshot
+
+    def __is_completed(self, project_id: int, snapshot: Export, deadline: float) -> bool:
+        if snapshot.status == 'completed':
+            return True
+        if snapshot.status == 'failed':
+            raise RuntimeError('Snapshot failed')
+        if time.monotonic() >= deadline:
+            raise TimeoutError(f'Snapshot {snapshot.id} for Project '
+                               f'{project_id} not completed in time')
+        self.__log.debug('Snapshot %s for Project %s is %s', snapshot.id,
+                         project_id, snapshot.status)
+        return False
+
+    def acquire(self, project_id: int, reuse: bool = True) -> int:
+        """Retrieves a completed snapshot for the project
+
+        Args:
+            project_id (int): Project ID
+            reuse (bool, optional): Reuse a recent snapshot if there is one.
+            Defaults to True.
+
+        Raises:
+            RuntimeError: Snapshot failed
+            TimeoutError: Snapshot did not complete within the poll timeout
+
+        Returns:
+            int: Export ID
+        """
+        exports = self.__client.projects.exports
+        if reuse and self.reuses_snapshots:
+            snapshot = self.__select_fresh(project_id, exports.list(project_id))
+            if snapshot is not None:
+                return snapshot.id
+
+        snapshot = exports.create(project_id=project_id, title=self.SNAPSHOT_TITLE)
+        self.__record(project_id, snapshot.id)
+        deadline = time.monotonic() + self.__polling.timeout
+        interval = self.__polling.interval
+        while not self.__is_completed(project_id, snapshot, deadline):
+            time.sleep(interval)
+            interval = min(interval * 2, 30)
+            snapshot = exports.get(project_id=project_id, export_pk=snapshot.id)
+        return snapshot.id
+
+    async def aacquire(self,
+                       fetcher: AsyncFetcher,
+                       project_id: int,
+                       reuse: bool = True) -> int:
+        """Retrieves a completed snapshot for the project through the asyncio
+        fetch layer
+
+        See `acquire`.
+
+        Args:
+            fetcher (AsyncFetcher): Fetch layer
+            project_id (int): Project ID
+            reuse (bool, optional): Reuse a recent snapshot if there is one.
+            Defaults to True.
+
+        Returns:
+            int: Export ID
+        """
+        if reuse and self.reuses_snapshots:
+            snapshot = self.__select_fresh(project_id,
+                                           await fetcher.list_exports(project_id))
+            if snapshot is not None:
+                return snapshot.id
+
+        snapshot = await fetcher.create_export(project_id, self.SNAPSHOT_TITLE)
+        await asyncio.to_thread(self.__record, project_id, snapshot.id)
+        deadline = time.monotonic() + self.__polling.timeout
+        interval = self.__polling.interval
+        while not self.__is_completed(project_id, snapshot, deadline):
+            await asyncio.sleep(interval)
+            interval = min(interval * 2, 30)
+            snapshot = await fetcher.get_export(project_id, snapshot.id)
+        return snapshot.id
+
+    def collect(self, project_id: int):
+        """Deletes the reporter's surplus snapshots for the project
+
+        Args:
+            project_id (int): Project ID
+        """
+        deleted = []
+        for export_id in self.__get_expired(project_id):
+            try:
+                self.__client.projects.exports.delete(
+                    project_id=project_id, export_pk=export_id)
+            except Exception as exc:  # pylint: disable=broad-exception-caught
+                if not self.__is_deleted(export_id, exc):
+                    continue
+            deleted.append(export_id)
+        self.__forget(project_id, deleted)
+
+    async def acollect(self, fetcher: AsyncFetcher, project_id: int):
+        """Deletes the reporter's surplus snapshots for the project through the
+        asyncio fetch layer
+
+        Args:
+            fetcher (AsyncFetcher): Fetch layer
+            project_id (int): Project ID
+        """
+        deleted = []
+        for export_id in await asyncio.to_thread(self.__get_expired, project_id):
+            try:
+                await fetcher.delete_export(project_id, export_id)
+            except Exception as exc:  # pylint: disable=broad-exception-caught
+                if not self.__is_deleted(export_id, exc):
+                    continue
+            deleted.append(export_id)
+        await asyncio.to_thread(self.__forget, project_id, deleted)
 
-from label_studio_sdk.client import LabelStudio
-from label_studio_sdk.projects.client_ext import ProjectExt
-from label_studio_sdk.types import BaseUser
 
-from label_studio_slack_reporter.metrics import get_counter
+@dataclasses.dataclass(frozen=True)
+class FetchSettings:
+    """How a reporter fetches and synchronizes its projects
+    """
+    incremental: bool = False
+    workers: int = 4
+    project_timeout: Optional[float] = None
+    async_fetch: bool = False
+    max_connections: int = 8
+
+
+@dataclasses.dataclass
+class ReporterContext:
+    """Connection and state shared by the reporters for one server and key
+    """
+    # pylint: disable=too-many-instance-attributes
+    url: str
+    api_key: str
+    client: LazyLabelStudio
+    users: UserDirectory
+    store: AnnotationStore
+    exports: Optional[ExportSnapshotManager] = None
+    export_settings: Optional[Tuple[float, int]] = None
+    last_reports: Dict[int, Tuple[dt.datetime, ProjectReport]] = \
+        dataclasses.field(default_factory=dict)
+    fingerprints: Dict[int, Tuple] = dataclasses.field(default_factory=dict)
+    fingerprints_lock: Lock = dataclasses.field(default_factory=Lock)
+
+    @classmethod
+    def create(cls, url: str, api_key: str) -> ReporterContext:
+        """Creates a context for a server
+
+        Args:
+            url (str): Label Studio URL
+            api_key (str): Label Studio API key
+
+        Returns:
+            ReporterContext: Context with an empty user directory and the
+            on-disk annotation store
+        """
+        client = LazyLabelStudio(
+            base_url=url, api_key=api_key, timeout=60 * 10  # 10 minutes
+        )
+        return cls(url=url,
+                   api_key=api_key,
+                   client=client,
+                   users=UserDirectory(client),
+                   store=AnnotationStore())
 
 
 class Reporter:
     """Label Studio Report generator
+
+    A reporter created with `reuse` set to a previous reporter for the same
+    server and key takes over its `ReporterContext`, so reconfiguring does not
+    discard the client, user directory, annotation store or last reports.
     """
+    MAX_CACHED_CYCLES = 4
+    # Project fields that change whenever the annotation counts can change
+    FINGERPRINT_FIELDS = ('task_number',
+                          'total_annotations_number',
+                          'skipped_annotations_number',
+                          'num_tasks_with_annotations',
+                          'finished_task_number',
+                          'updated_at')
     __error_counters_initialized: Set[int] = set()
     __error_counters_initialized_lock = Lock()
 
@@ -24,19 +347,92 @@ class Reporter:
                  url: str,
                  api_key: str,
                  projects: List[int],
-                 days: int):
-        self.__client = LabelStudio(
-            base_url=url, api_key=api_key, timeout=60 * 10  # 10 minutes
-        )
+                 days: int,
+                 incremental: bool = False,
+                 workers: int = 4,
+                 project_timeout: Optional[float] = None,
+                 user_cache_ttl: float = 3600,
+                 export_max_age: float = 0,
+                 export_retention: int = 1,
+                 async_fetch: bool = False,
+                 max_connections: int = 8,
+                 reuse: Optional[Reporter] = None):
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
+        context = reuse.context if reuse is not None else None
+        if context is None or (context.url, context.api_key) != (url, api_key):
+            context = ReporterContext.create(url, api_key)
+        context.users.ttl = user_cache_ttl
+        if context.exports is None or \
+                context.export_settings != (export_max_age, export_retention):
+            context.exports = ExportSnapshotManager(context.client,
+                                                    max_age=export_max_age,
+                                                    retention=export_retention)
+            context.export_settings = (export_max_age, export_retention)
+        self.__context = context
 
+        self.__fetch_settings = FetchSettings(incremental=incremental,
+                                              workers=workers,
+                                              project_timeout=project_timeout,
+                                              async_fetch=async_fetch,
+                                              max_connections=max_connections)
         self.__project_ids = projects
         self.__report_days = days
+        # Sections and the monotonic time they were generated, per cycle
+        self.__report_cache: Dict[dt.datetime,
+                                  Dict[Tuple[int, int], Tuple[ProjectReport, float]]] = {}
+        self.__report_cache_lock = Lock()
         get_counter(
             name='label_studio_report_errors',
             documentation='Label Studio Report Generation errors',
             labelnames=['project'],
         )
-        for idx in self.__project_ids:
+        get_counter(
+            name='project_fingerprint_hits',
+            documentation='Project syncs skipped because the project was unchanged',
+            labelnames=['project'],
+        )
+        get_counter(
+            name='project_fingerprint_misses',
+            documentation='Project syncs performed because the project changed',
+            labelnames=['project'],
+        )
+        self.__init_error_counters(self.__project_ids)
+
+        self.__log = logging.getLogger('Label Studio')
+
+    @classmethod
+    def from_config(cls,
+                    label_studio_config: Dict,
+                    reuse: Optional[Reporter] = None) -> Reporter:
+        """Creates a reporter from the `label_studio` section of the config
+
+        Args:
+            label_studio_config (Dict): `label_studio` config section
+            reuse (Optional[Reporter], optional): Previous reporter whose
+            context to take over. Defaults to None.
+
+        Returns:
+            Reporter: Reporter
+        """
+        return cls(
+            url=label_studio_config['url'],
+            api_key=label_studio_config['key'],
+            projects=label_studio_config['project_ids'],
+            days=label_studio_config['report_days'],
+            incremental=label_studio_config.get('incremental', False),
+            workers=label_studio_config.get('workers', 4),
+            project_timeout=label_studio_config.get('project_timeout', None),
+            user_cache_ttl=label_studio_config.get('user_cache_ttl', 3600),
+            export_max_age=label_studio_config.get('export_max_age', 0),
+            export_retention=label_studio_config.get('export_retention', 1),
+            async_fetch=label_studio_config.get('async_fetch', False),
+            max_connections=label_studio_config.get('max_connections', 8),
+            reuse=reuse,
+        )
+
+    @staticmethod
+    def __init_error_counters(project_ids: Iterable[int]):
+        for idx in project_ids:
             if idx in Reporter.__error_counters_initialized:
                 continue
 
@@ -49,77 +445,498 @@ class Reporter:
 
                 Reporter.__error_counters_initialized.add(idx)
 
-        self.__log = logging.getLogger('Label Studio')
+    @property
+    def context(self) -> ReporterContext:
+        """Connection and state to hand to a replacement reporter
+        """
+        return self.__context
+
+    @property
+    def project_ids(self) -> List[int]:
+        """Default projects to report on
+        """
+        return list(self.__project_ids)
 
-    def get_project_export(self, project_id: int) -> Dict:
+    def get_project_export(self, project_id: int) -> List[Dict]:
         """Retrieves the project export
 
         Args:
             project_id (int): Project to export
 
         Returns:
-            Dict: LabelStudio project export
+            List[Dict]: LabelStudio project export
         """
+        return list(self.iter_project_export(project_id))
+
+    def iter_project_export(self,
+                            project_id: int,
+                            reuse_snapshot: bool = True) -> Iterator[Dict]:
+        """Streams the project export
+
+        The export is spooled to a temporary file under the cache directory and
+        parsed incrementally, so peak memory does not depend on export size.
+
+        Args:
+            project_id (int): Project to export
+            reuse_snapshot (bool, optional): Reuse a recent export snapshot if
+            there is one.  Defaults to True.
+
+        Yields:
+            Dict: LabelStudio export task
+        """
+        # pylint: disable=import-outside-toplevel
+        import ijson
         self.__log.debug('Beginning Export for Project %s', project_id)
 
-        response = self.__client.projects.exports.create(
-            project_id=project_id
-        )
-        if response.status != 'completed':
-            raise RuntimeError('Snapshot failed')
+        export_id = self.__context.exports.acquire(project_id, reuse_snapshot)
+        try:
+            blob_iterator = self.__context.client.projects.exports.download(
+                project_id=project_id,
+                export_pk=export_id
+            )
+            with tempfile.TemporaryFile(dir=get_cache_path()) as spool:
+                for chunk in blob_iterator:
+                    spool.write(chunk)
+                spool.seek(0)
+                yield from ijson.items(spool, 'item', use_float=True)
+        finally:
+            self.__context.exports.collect(project_id)
 
-        blob_iterator = self.__client.projects.exports.download(
-            project_id=project_id,
-            export_pk=response.id
-        )
-        blob = BytesIO()
-        for chunk in blob_iterator:
-            blob.write(chunk)
-        blob.seek(0)
-        return json.load(blob)
-        # return json.loads(export.json())
-
-    def get_report(self) -> str:
+    def get_updated_tasks(self, project_id: int, since: str) -> Iterator[Dict]:
+        """Retrieves the tasks created, updated or annotated after `since`
+
+        Args:
+            project_id (int): Project to query
+            since (str): ISO 8601 high-water mark
+
+        Yields:
+            Dict: Task including its annotations
+        """
+        self.__log.debug('Fetching tasks for Project %s updated since %s',
+                         project_id, since)
+        for task in self.__context.client.tasks.list(project=project_id,
+                                                     fields='all',
+                                                     query=updated_tasks_query(since)):
+            yield as_dict(task)
+
+    def sync_project(self,
+                     project_id: int,
+                     source: Optional[BlockingTaskSource] = None,
+                     reuse_snapshot: bool = True):
+        """Updates the local annotation store with the project's annotations
+
+        In incremental mode, only tasks changed since the high-water mark
+        stored with the project's annotations are fetched and merged into the
+        store.  A full export is performed if there is no high-water mark.
+
+        Args:
+            project_id (int): Project to synchronize
+            source (Optional[BlockingTaskSource], optional): Source of exports
+            and updated tasks.  Defaults to this reporter's synchronous client.
+            reuse_snapshot (bool, optional): Allow a full export to reuse a
+            recent export snapshot.  Ignored in incremental mode.  Defaults to
+            True.
+        """
+        if source is None:
+            source = self
+        store = self.__context.store
+        if not self.__fetch_settings.incremental:
+            store.replace_project(project_id,
+                                  source.iter_project_export(project_id, reuse_snapshot))
+            return
+
+        state = ProjectSyncState(project_id, store.get_watermark(project_id))
+        # The watermark must predate the listing, so a reused snapshot would
+        # leave a gap between when it was taken and now
+        started = dt.datetime.now(dt.timezone.utc)
+        if state.watermark is not None:
+            store.upsert_tasks(project_id, state.track(
+                source.get_updated_tasks(project_id, state.watermark), started), state)
+            self.__log.info('Merged changes for Project %s up to %s',
+                            project_id, state.watermark)
+        else:
+            self.__log.info('No sync state for Project %s, performing full '
+                            'export', project_id)
+            store.replace_project(project_id, state.track(
+                source.iter_project_export(project_id, False), started), state)
+
+    def get_fingerprint(self, project_info: ProjectExt) -> Optional[Tuple]:
+        """Computes a cheap fingerprint of the project's annotation state
+
+        Args:
+            project_info (ProjectExt): Project info
+
+        Returns:
+            Optional[Tuple]: Fingerprint, or None if the project info carries
+            none of the fingerprint fields
+        """
+        fingerprint = tuple(getattr(project_info, field, None)
+                            for field in self.FINGERPRINT_FIELDS)
+        if all(value is None for value in fingerprint):
+            return None
+        return fingerprint
+
+    def sync_if_changed(self,
+                        project_id: int,
+                        project_info: ProjectExt,
+                        source: Optional[BlockingTaskSource] = None,
+                        reuse_snapshot: bool = True) -> bool:
+        """Synchronizes the project unless it is unchanged since the last sync
+
+        A recent export snapshot may only be reused for the first sync of a
+        project, and the fingerprint of such a sync is not kept, so the next
+        cycle syncs from a new snapshot.  Otherwise, changes made after a
+        reused snapshot was taken would be hidden by the fingerprint until the
+        project changed again.
+
+        Args:
+            project_id (int): Project to synchronize
+            project_info (ProjectExt): Current project info
+            source (Optional[BlockingTaskSource], optional): See
+            `sync_project`.
+            reuse_snapshot (bool, optional): Allow the first sync of the
+            project to reuse a recent export snapshot.  Defaults to True.
+
+        Returns:
+            bool: True if the project was synchronized
+        """
+        fingerprint = self.get_fingerprint(project_info)
+        with self.__context.fingerprints_lock:
+            synced = project_id in self.__context.fingerprints
+            unchanged = (fingerprint is not None and
+                         self.__context.fingerprints.get(project_id) == fingerprint)
+        if unchanged and self.__context.store.has_project(project_id):
+            self.__log.info('Project %s is unchanged, skipping export', project_id)
+            get_counter('project_fingerprint_hits').labels(project=project_id).inc()
+            return False
+        get_counter('project_fingerprint_misses').labels(project=project_id).inc()
+        reuse_snapshot = (reuse_snapshot and not synced and
+                          self.__context.exports.reuses_snapshots)
+        self.sync_project(project_id, source, reuse_snapshot)
+        with self.__context.fingerprints_lock:
+            self.__context.fingerprints[project_id] = None if reuse_snapshot else fingerprint
+        return True
+
+    def get_report(self,
+                   project_ids: Optional[List[int]] = None,
+                   cycle: Optional[dt.datetime] = None) -> Report:
         """Generates the report
 
+        Args:
+            project_ids (Optional[List[int]], optional): Projects to report on.
+            Defaults to the configured projects.
+            cycle (Optional[dt.datetime], optional): Report cycle.  See
+            `get_project_reports`.
+
         Returns:
-            str: Report
+            Report: Report
         """
-        reports = []
-        for idx in self.__project_ids:
-            try:
-                reports.append(self.get_project_report(idx))
-            except Exception as exc:  # pylint: disable=broad-exception-caught
-                get_counter('label_studio_report_errors').labels(
-                    project=idx).inc()
-                self.__log.exception('Report generation failed due to %s', exc)
+        return self.compose_report(
+            self.get_project_reports(project_ids, cycle), project_ids, cycle)
+
+    def compose_report(self,
+                       reports: Dict[int, ProjectReport],
+                       project_ids: Optional[List[int]] = None,
+                       cycle: Optional[dt.datetime] = None) -> Report:
+        """Composes a digest of the given projects
+
+        Args:
+            reports (Dict[int, ProjectReport]): Project reports, indexed by
+            project id
+            project_ids (Optional[List[int]], optional): Projects to include, in
+            order.  Defaults to the configured projects.
+            cycle (Optional[dt.datetime], optional): Report cycle.  Defaults to
+            None.
+
+        Returns:
+            Report: Report
+        """
+        if project_ids is None:
+            project_ids = self.__project_ids
+        return Report(projects=tuple(reports[idx] for idx in project_ids if idx in reports),
+                      cycle=cycle)
+
+    def get_project_reports(self,
+                            project_ids: Optional[List[int]] = None,
+                            cycle: Optional[dt.datetime] = None,
+                            max_age: Optional[float] = None) -> Dict[int, ProjectReport]:
+        """Generates the report sections for the given projects
+
+        Projects are reported concurrently on a pool of `workers` threads, or
+        with `workers` concurrent tasks on the asyncio fetch layer if
+        `async_fetch` is enabled.  A project that runs longer than
+        `project_timeout` seconds is reported as stale/unavailable instead of
+        delaying the other projects.
+
+        Successful sections are cached for the given cycle, so every output
+        firing in the same cycle shares a single fetch per project, and a
+        cycle can be generated ahead of time and held until it fires.  The
+        last `MAX_CACHED_CYCLES` cycles are kept.  Sections regenerated
+        because they were older than `max_age` never reuse an export snapshot.
 
-        return '\n\n'.join(reports)
+        Args:
+            project_ids (Optional[List[int]], optional): Projects to report on.
+            Defaults to the configured projects.
+            cycle (Optional[dt.datetime], optional): Report cycle, typically the
+            scheduled fire time.  Defaults to no caching.
+            max_age (Optional[float], optional): Regenerate cached sections
+            older than this many seconds.  Defaults to no limit.
+
+        Returns:
+            Dict[int, ProjectReport]: Project reports, indexed by project id
+        """
+        if self.__fetch_settings.async_fetch:
+            return asyncio.run(self.aget_project_reports(project_ids, cycle, max_age))
+        if project_ids is None:
+            project_ids = self.__project_ids
+        self.__init_error_counters(project_ids)
+
+        sections = self.__get_cached_reports(project_ids, cycle, max_age)
+        started: Dict[int, float] = {}
+
+        def run(idx: int) -> ProjectReport:
+            started[idx] = time.monotonic()
+            return self.get_project_report(idx, reuse_snapshot=max_age is None)
+
+        executor = ThreadPoolExecutor(max_workers=self.__fetch_settings.workers,
+                                      thread_name_prefix='report')
+        futures = {executor.submit(run, idx): idx
+                   for idx in dict.fromkeys(project_ids) if idx not in sections}
+        pending = set(futures)
+        try:
+            while pending:
+                done, pending = wait(pending,
+                                     timeout=self.__next_deadline(
+                                         pending, futures, started),
+                                     return_when=FIRST_COMPLETED)
+                for future in done:
+                    idx = futures[future]
+                    try:
+                        self.__report_succeeded(idx, future.result(),
+                                                sections, cycle)
+                    except Exception as exc:  # pylint: disable=broad-exception-caught
+                        self.__report_failed(idx, exc)
+                for future in self.__expired(pending, futures, started):
+                    pending.discard(future)
+                    self.__report_timed_out(futures[future], sections)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        return sections
+
+    async def aget_project_reports(self,
+                                   project_ids: Optional[List[int]] = None,
+                                   cycle: Optional[dt.datetime] = None,
+                                   max_age: Optional[float] = None
+                                   ) -> Dict[int, ProjectReport]:
+        """Generates the report sections for the given projects on the asyncio
+        fetch layer
+
+        See `get_project_reports`.
+
+        Args:
+            project_ids (Optional[List[int]], optional): Projects to report on.
+            Defaults to the configured projects.
+            cycle (Optional[dt.datetime], optional): Report cycle, typically the
+            scheduled fire time.  Defaults to no caching.
+            max_age (Optional[float], optional): Regenerate cached sections
+            older than this many seconds.  Defaults to no limit.
+
+        Returns:
+            Dict[int, ProjectReport]: Project reports, indexed by project id
+        """
+        if project_ids is None:
+            project_ids = self.__project_ids
+        self.__init_error_counters(project_ids)
+
+        # pylint: disable=import-outside-toplevel
+        from label_studio_slack_reporter.fetch import AsyncFetcher
+
+        sections = self.__get_cached_reports(project_ids, cycle, max_age)
+        todo = [idx for idx in dict.fromkeys(project_ids) if idx not in sections]
+        semaphore = asyncio.Semaphore(self.__fetch_settings.workers)
+        # Not the loop's default executor, which asyncio.run joins on exit, so
+        # a sync that overruns its timeout does not delay the report
+        executor = ThreadPoolExecutor(max_workers=self.__fetch_settings.workers,
+                                      thread_name_prefix='report')
+
+        try:
+            async with AsyncFetcher(
+                    url=self.__context.url,
+                    api_key=self.__context.api_key,
+                    max_connections=self.__fetch_settings.max_connections) as fetcher:
+                users_refresh = asyncio.ensure_future(self.__arefresh_users(fetcher))
+
+                async def run(idx: int) -> ProjectReport:
+                    async with semaphore:
+                        # Not asyncio.wait_for, whose TimeoutError cannot be told
+                        # apart from a TimeoutError raised by the project itself
+                        task = asyncio.ensure_future(
+                            self.__aget_project_report(idx, fetcher, executor,
+                                                       users_refresh, max_age is None))
+                        done, _ = await asyncio.wait(
+                            {task}, timeout=self.__fetch_settings.project_timeout)
+                        if task not in done:
+                            task.cancel()
+                            raise ProjectTimeoutError(idx)
+                        return task.result()
+
+                results = await asyncio.gather(*(run(idx) for idx in todo),
+                                               return_exceptions=True)
+                await asyncio.wait({users_refresh})
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        if users_refresh.exception() is not None:
+            self.__log.warning('Failed to refresh users: %s', users_refresh.exception())
+
+        for idx, result in zip(todo, results):
+            if isinstance(result, ProjectTimeoutError):
+                self.__report_timed_out(idx, sections)
+            elif isinstance(result, Exception):
+                self.__report_failed(idx, result)
+            else:
+                self.__report_succeeded(idx, result, sections, cycle)
+        return sections
+
+    async def __arefresh_users(self, fetcher: AsyncFetcher):
+        if self.__context.users.is_stale:
+            self.__context.users.load(await fetcher.list_users())
+
+    async def __aget_project_report(self,
+                                    project_id: int,
+                                    fetcher: AsyncFetcher,
+                                    executor: ThreadPoolExecutor,
+                                    users_refresh: asyncio.Future,
+                                    reuse_snapshot: bool) -> ProjectReport:
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
+        # pylint: disable=import-outside-toplevel
+        from label_studio_slack_reporter.fetch import BlockingTaskSource
+
+        loop = asyncio.get_running_loop()
+        source = BlockingTaskSource(fetcher=fetcher,
+                                    loop=loop,
+                                    exports=self.__context.exports)
+        project_info = await fetcher.get_project(project_id)
+        await loop.run_in_executor(executor, self.sync_if_changed,
+                                   project_id, project_info, source, reuse_snapshot)
+        # Otherwise resolving the users would start a second, blocking refresh.
+        # Not awaited directly, so a project timing out does not cancel it
+        await asyncio.wait({users_refresh})
+        return await loop.run_in_executor(executor, self.build_project_report,
+                                          project_id, project_info)
+
+    def __report_succeeded(self,
+                           project_id: int,
+                           section: ProjectReport,
+                           sections: Dict[int, ProjectReport],
+                           cycle: Optional[dt.datetime]):
+        sections[project_id] = section
+        self.__context.last_reports[project_id] = (
+            dt.datetime.now(dt.timezone.utc), section)
+        self.__cache_report(project_id, cycle, section)
+
+    def __report_failed(self, project_id: int, exc: Exception):
+        get_counter('label_studio_report_errors').labels(
+            project=project_id).inc()
+        self.__log.error('Report generation failed due to %s', exc,
+                         exc_info=exc)
+
+    def __report_timed_out(self, project_id: int, sections: Dict[int, ProjectReport]):
+        get_counter('label_studio_report_errors').labels(
+            project=project_id).inc()
+        self.__log.error('Report generation for Project %s timed out',
+                         project_id)
+        sections[project_id] = self.__unavailable_section(project_id)
+
+    def __get_cached_reports(self,
+                             project_ids: Iterable[int],
+                             cycle: Optional[dt.datetime],
+                             max_age: Optional[float]) -> Dict[int, ProjectReport]:
+        if cycle is None:
+            return {}
+        oldest = -float('inf') if max_age is None else time.monotonic() - max_age
+        with self.__report_cache_lock:
+            cached = self.__report_cache.get(cycle, {})
+            return {idx: cached[(idx, self.__report_days)][0]
+                    for idx in project_ids
+                    if (idx, self.__report_days) in cached and
+                    cached[(idx, self.__report_days)][1] >= oldest}
+
+    def __cache_report(self,
+                       project_id: int,
+                       cycle: Optional[dt.datetime],
+                       report: ProjectReport):
+        if cycle is None:
+            return
+        with self.__report_cache_lock:
+            if cycle not in self.__report_cache:
+                self.__report_cache[cycle] = {}
+                for expired in sorted(self.__report_cache)[:-self.MAX_CACHED_CYCLES]:
+                    del self.__report_cache[expired]
+            if cycle in self.__report_cache:
+                self.__report_cache[cycle][(project_id, self.__report_days)] = (
+                    report, time.monotonic())
+
+    def __next_deadline(self,
+                        pending: Set[Future],
+                        futures: Dict[Future, int],
+                        started: Dict[int, float]) -> Optional[float]:
+        timeout = self.__fetch_settings.project_timeout
+        if timeout is None:
+            return None
+        now = time.monotonic()
+        remaining = [started[futures[future]] + timeout - now
+                     for future in pending if futures[future] in started]
+        if not remaining:
+            return timeout
+        return max(0, min(remaining))
+
+    def __expired(self,
+                  pending: Set[Future],
+                  futures: Dict[Future, int],
+                  started: Dict[int, float]) -> List[Future]:
+        timeout = self.__fetch_settings.project_timeout
+        if timeout is None:
+            return []
+        now = time.monotonic()
+        return [future for future in pending
+                if futures[future] in started and
+                now - started[futures[future]] >= timeout]
+
+    def __unavailable_section(self, project_id: int) -> ProjectReport:
+        timeout = self.__fetch_settings.project_timeout
+        if project_id not in self.__context.last_reports:
+            return ProjectReport(project_id=project_id,
+                                 available=False,
+                                 timed_out_after=timeout)
+        timestamp, section = self.__context.last_reports[project_id]
+        return dataclasses.replace(section,
+                                   stale_as_of=timestamp,
+                                   timed_out_after=timeout)
 
     def calculate_recent_annotations(self,
-                                     timestamps: Dict[int, List[dt.datetime]],
+                                     project_id: int,
                                      total_tasks: int,
-                                     days: int) -> Tuple[int, float]:
+                                     days: int,
+                                     now: Optional[float] = None) -> Tuple[int, float]:
         """Calculates recent annotations
 
         Args:
-            timestamps (Dict[int, List[datetime]]): List of annotation timestamps 
+            project_id (int): Project ID
             total_tasks (int): Number of tasks in a project
             days (int): Number of days considered recent
+            now (Optional[float], optional): Current epoch time.  Defaults to
+            the current time.
 
         Returns:
             int: annotations made in the past N days
             float: estimated days to completion
         """
-        now = dt.datetime.now()
-        total_annotations = sum(len(t) for t in timestamps.values())
-        relative_annotations = {
-            user_id: sum(1 for timestamp in timestamps if now -
-                         timestamp <= dt.timedelta(days))
-            for user_id, timestamps in timestamps.items()
-        }
+        if now is None:
+            now = time.time()
+        total_annotations = self.__context.store.count(project_id)
+        relative_total = self.__context.store.count(
+            project_id, since=now - days * 24 * 60 * 60)
 
-        relative_total = sum(relative_annotations.values())
         if relative_total > 0:
             estimated_days = (total_tasks - total_annotations) / \
                 (relative_total / days)
@@ -127,74 +944,63 @@ class Reporter:
             estimated_days = float('inf')
         return relative_total, estimated_days
 
-    def get_project_report(self, project_id: int) -> str:
+    def get_project_report(self,
+                           project_id: int,
+                           reuse_snapshot: bool = True) -> ProjectReport:
         """Generates the report for the given project
 
         Args:
             project_id (int): Project ID
+            reuse_snapshot (bool, optional): See `sync_if_changed`.  Defaults
+            to True.
 
         Returns:
-            str: Project report
-        """
-        export = self.get_project_export(project_id)
-        user_list = self.__client.users.list()
-        project_info = self.__client.projects.get(id=project_id)
-        annotations_count: Dict[int, int] = {user.id: 0 for user in user_list}
-        annotations_timestamp: Dict[int, List[dt.datetime]] = {
-            user.id: [] for user in user_list}
-        for task in export:
-            for annotation in task['annotations']:
-                annotations_count[annotation['completed_by']] += 1
-                annotation_time = dt.datetime.strptime(
-                    annotation['created_at'].rstrip('Z'), '%Y-%m-%dT%H:%M:%S.%f')
-                annotations_timestamp[annotation['completed_by']].append(
-                    annotation_time)
+            ProjectReport: Project report
+        """
+        project_info = self.__context.client.projects.get(id=project_id)
+        self.sync_if_changed(project_id, project_info, reuse_snapshot=reuse_snapshot)
+        return self.build_project_report(project_id, project_info)
 
-        recent_annotations, estimated_days = self.calculate_recent_annotations(
-            timestamps=annotations_timestamp,
-            total_tasks=project_info.task_number,
-            days=self.__report_days)
+    @staticmethod
+    def __get_user_name(user_id: Optional[int], users: Dict[int, BaseUser]) -> str:
+        if user_id is None:
+            return 'Unassigned'
+        if user_id in users:
+            return users[user_id].email
+        return f'User {user_id}'
+
+    def build_project_report(self,
+                             project_id: int,
+                             project_info: ProjectExt) -> ProjectReport:
+        """Generates the report for an already synchronized project
 
-        message = self.generate_message(
-            user_list,
-            project_info,
-            annotations_count,
-            recent_annotations,
-            estimated_days,
-            self.__report_days)
-        return message
-
-    def generate_message(self,
-                         user_list: List[BaseUser],
-                         project_info: ProjectExt,
-                         annotations_count: Dict[int, int],
-                         recent_annotations: int,
-                         estimated_days: float,
-                         days: int) -> str:
-        """Generates message
-
-        Args:
-            user_list (List[BaseUser]): List of users
+        Args:
+            project_id (int): Project ID
             project_info (ProjectExt): Project info
-            annotations_count (Dict[int, int]): List of annotations
-            recent_annotations (int): Number of annotations made in the past day(s)
-            estimated_days (float): Number of days to complete the remaining annotations
-            days (int): Number of days considered recent
 
         Returns:
-            str: Formatted message
+            ProjectReport: Project report
         """
-        # pylint: disable=too-many-arguments,too-many-positional-arguments
-        message = f'Results for {project_info.title}\n'
-        for user in sorted(user_list, key=lambda x: annotations_count[x.id], reverse=True):
-            if not user.id in annotations_count:
-                count = 0
-            else:
-                count = annotations_count[user.id]
-            if count > 0:
-                message += f'{user.email}: {count}\n'
-
-        message += f'Total: {sum(annotations_count.values())}\n'
-        message += f'Estimated time to completion: {estimated_days:.1f} days\n'
-        message += f'{recent_annotations} annotations were made in the last {days * 24} hours'
-        return message
+        annotations_count = self.__context.store.count_by_user(project_id)
+
+        recent_annotations, estimated_days = self.calculate_recent_annotations(
+            project_id=project_id,
+            total_tasks=project_info.task_number,
+            days=self.__report_days)
+
+        users = self.__context.users.resolve(user_id for user_id in annotations_count
+                                             if user_id is not None)
+        return ProjectReport(
+            project_id=project_id,
+            title=project_info.title,
+            users=tuple(
+                UserCount(user_id=user_id,
+                          name=self.__get_user_name(user_id, users),
+                          count=count)
+                for user_id, count in sorted(annotations_count.items(),
+                                             key=lambda x: x[1], reverse=True)
+                if count > 0),
+            total=sum(annotations_count.values()),
+            recent=recent_annotations,
+            days=self.__report_days,
+            eta_days=estimated_days)
@@ -0,0 +1,182 @@
+'''Leader Election
+'''
+from __future__ import annotations
+
+import logging
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from pathlib import Path
+from threading import Event, Lock, Thread
+from typing import Callable, Optional
+
+from label_studio_slack_reporter.metrics import get_counter, get_gauge
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS lease (
+    name TEXT PRIMARY KEY,
+    holder TEXT NOT NULL,
+    expires REAL NOT NULL
+);
+'''
+
+
+class LeaseTable:
+    """SQLite row naming the current leader and when its lease expires
+
+    The database uses SQLite's rollback journal rather than WAL, which does not
+    work across hosts.
+    """
+    NAME = 'service'
+
+    def __init__(self, path: Path, ttl: float):
+        self.holder = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+        self.ttl = ttl
+        self.__conn = sqlite3.connect(path,
+                                      isolation_level=None,
+                                      timeout=ttl / 3,
+                                      check_same_thread=False)
+        self.__conn.executescript(SCHEMA)
+
+    def try_acquire(self) -> bool:
+        """Takes the lease if it is free or expired, or renews it if held
+
+        Returns:
+            bool: True if this replica holds the lease until `ttl` seconds
+            from now
+        """
+        now = time.time()
+        self.__conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = self.__conn.execute('SELECT holder, expires FROM lease WHERE name = ?',
+                                      (self.NAME,)).fetchone()
+            acquired = row is None or row[0] == self.holder or row[1] < now
+            if acquired:
+                self.__conn.execute(
+                    'INSERT INTO lease VALUES (?, ?, ?) ON CONFLICT (name) '
+                    'DO UPDATE SET holder = excluded.holder, expires = excluded.expires',
+                    (self.NAME, self.holder, now + self.ttl))
+            self.__conn.execute('COMMIT')
+        except BaseException:
+            self.__conn.execute('ROLLBACK')
+            raise
+        return acquired
+
+    def release(self):
+        """Gives up the lease, if held
+        """
+        self.__conn.execute('DELETE FROM lease WHERE name = ? AND holder = ?',
+                            (self.NAME, self.holder))
+
+
+class LeaderLease:
+    """Lease based leader election between replicas sharing a volume
+
+    The lease is a `LeaseTable` row in a SQLite database at `path`, which must
+    be on a volume shared by all replicas.  The leader renews the lease every
+    `ttl / 3` seconds, and any replica may take it once it has expired, so a
+    standby takes over at most `ttl` plus one renewal interval after the leader
+    dies.  A leader that fails to renew stops acting as the leader once its own
+    lease would have expired.
+
+    Replica clocks must agree to well within `ttl`.
+    """
+
+    def __init__(self,
+                 path: Path,
+                 ttl: float = 30,
+                 on_change: Optional[Callable[[bool], None]] = None):
+        self.__table = LeaseTable(path, ttl)
+        self.__on_change = on_change
+        self.__valid_until = 0.0
+        self.__lock = Lock()
+        self.__stop_event = Event()
+        self.__renew_thread = Thread(target=self.__renew_loop,
+                                     name='leader_lease',
+                                     daemon=True)
+        get_gauge(
+            name='leader',
+            documentation='1 if this replica is the leader'
+        )
+        get_counter(
+            name='leader_transitions',
+            documentation='Times this replica gained or lost leadership'
+        )
+        get_counter(
+            name='leader_lease_errors',
+            documentation='Failed attempts to acquire or renew the lease'
+        )
+        self.__log = logging.getLogger('LeaderLease')
+
+    @property
+    def holder(self) -> str:
+        """Identifies this replica in the lease
+        """
+        return self.__table.holder
+
+    @property
+    def is_leader(self) -> bool:
+        """True while this replica holds an unexpired lease
+        """
+        with self.__lock:
+            return time.monotonic() < self.__valid_until
+
+    def start(self):
+        """Starts competing for and renewing the lease
+        """
+        self.__renew_thread.start()
+
+    def shutdown(self):
+        """Stops renewing and releases the lease, if held
+        """
+        self.__stop_event.set()
+        self.__renew_thread.join()
+
+    def try_acquire(self) -> bool:
+        """Acquires or renews the lease
+
+        Returns:
+            bool: True if this replica holds the lease
+        """
+        started = time.monotonic()
+        acquired = self.__table.try_acquire()
+        if acquired:
+            with self.__lock:
+                # Measured from before the attempt, so never outlives the row
+                self.__valid_until = started + self.__table.ttl
+        return acquired
+
+    def __renew_loop(self):
+        was_leader = False
+        while True:
+            try:
+                self.try_acquire()
+            except sqlite3.Error:
+                self.__log.exception('Failed to renew lease')
+                get_counter('leader_lease_errors').inc()
+            was_leader = self.__update_state(was_leader)
+            if self.__stop_event.wait(self.__table.ttl / 3):
+                break
+        try:
+            self.__table.release()
+        except sqlite3.Error:
+            self.__log.exception('Failed to release lease')
+        with self.__lock:
+            self.__valid_until = 0.0
+        self.__update_state(was_leader)
+
+    def __update_state(self, was_leader: bool) -> bool:
+        is_leader = self.is_leader
+        if is_leader == was_leader:
+            return is_leader
+        get_gauge('leader').set(int(is_leader))
+        get_counter('leader_transitions').inc()
+        if is_leader:
+            self.__log.info('%s is now the leader', self.holder)
+        else:
+            self.__log.warning('%s is no longer the leader', self.holder)
+        if self.__on_change is not None:
+            self.__on_change(is_leader)
+        return is_leader
@@ -1,12 +1,16 @@
 '''Label Studio Slack Reporter
 '''
 import argparse
+import sys
 from pathlib import Path
 
 from tomlkit import parse
 
 from label_studio_slack_reporter.config import configure_logging
 from label_studio_slack_reporter.label_studio import Reporter
+from label_studio_slack_reporter.metrics import (format_startup_timings,
+                                                 time_startup)
+from label_studio_slack_reporter.report import render_text
 
 
 def main() -> None:
@@ -14,19 +18,20 @@ def main() -> None:
     """
     parser = argparse.ArgumentParser()
     parser.add_argument('--config', type=Path)
+    parser.add_argument('--timings', action='store_true',
+                        help='Print how long each phase took')
     args = parser.parse_args()
     configure_logging()
 
-    with open(args.config, 'r', encoding='utf-8') as handle:
+    with time_startup('config'), open(args.config, 'r', encoding='utf-8') as handle:
         config = parse(handle.read())
 
-    reporter = Reporter(
-        url=config['label_studio']['url'],
-        api_key=config['label_studio']['key'],
-        projects=config['label_studio']['project_ids'],
-        days=config['label_studio']['report_days'],
-    )
-    print(reporter.get_report())
+    reporter = Reporter.from_config(config['label_studio'])
+    with time_startup('report'):
+        report = reporter.get_report()
+    print(render_text(report))
+    if args.timings:
+        print(format_startup_timings(), file=sys.stderr)
 
 if __name__ == '__main__':
     main()
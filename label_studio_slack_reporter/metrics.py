@@ -1,9 +1,11 @@
 '''Prometheus Metrics
 '''
+from contextlib import contextmanager
 from importlib.metadata import version
 from threading import Lock, Thread
-from time import sleep
-from typing import Dict, Iterable, List, Literal, Optional, Sequence, Union
+from time import perf_counter, sleep
+from typing import (Dict, Iterable, Iterator, List, Literal, Optional,
+                    Sequence, Union)
 
 from prometheus_client import (REGISTRY, CollectorRegistry, Counter, Gauge,
                                Histogram, Info, Summary)
@@ -98,7 +100,7 @@ def get_summary(name: str,
 
 
 def get_gauge(name: str,
-              documentation: str,
+              documentation: Optional[str] = None,
               labelnames: Iterable[str] = (),
               namespace: str = '',
               subsystem: str = '',
@@ -113,6 +115,8 @@ def get_gauge(name: str,
     # Mirrors prometheus API
     with __gauges_lock:
         if name not in __all_gauges:
+            if documentation is None:
+                raise ValueError('Documentation field is required')
             __all_gauges[name] = Gauge(name,
                                        documentation,
                                        labelnames,
@@ -148,6 +152,43 @@ def get_info(name: str,
         return __all_infos[name]
 
 
+__startup_timings: Dict[str, float] = {}
+
+
+@contextmanager
+def time_startup(phase: str) -> Iterator[None]:
+    """Times a startup phase
+
+    The duration is exported by the `startup_duration` gauge, labelled by
+    phase.
+
+    Args:
+        phase (str): Phase name
+    """
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        duration = perf_counter() - start
+        __startup_timings[phase] = duration
+        get_gauge(
+            name='startup_duration',
+            documentation='Startup phase duration',
+            labelnames=['phase'],
+            unit='second'
+        ).labels(phase=phase).set(duration)
+
+
+def format_startup_timings() -> str:
+    """Formats the startup phase durations recorded so far
+
+    Returns:
+        str: One line per phase, in the order the phases finished
+    """
+    return '\n'.join(f'{phase:<24}{duration * 1e3:10.1f} ms'
+                     for phase, duration in __startup_timings.items())
+
+
 __threads_to_monitor: List[Thread] = []
 
 
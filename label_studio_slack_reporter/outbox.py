@@ -0,0 +1,280 @@
+'''Delivery Outbox
+'''
+from __future__ import annotations
+
+import datetime as dt
+import json
+import logging
+import random
+import sqlite3
+import time
+from pathlib import Path
+from threading import Event, Lock, Thread
+from typing import Callable, Optional
+
+from label_studio_slack_reporter.config import get_data_path
+from label_studio_slack_reporter.metrics import get_counter, get_gauge
+from label_studio_slack_reporter.output import AbstractOutput
+from label_studio_slack_reporter.retry import PartialDeliveryError
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY,
+    job TEXT NOT NULL,
+    cycle TEXT NOT NULL,
+    message TEXT NOT NULL,
+    attempts INTEGER NOT NULL,
+    next_attempt REAL NOT NULL,
+    progress TEXT
+);
+CREATE INDEX IF NOT EXISTS outbox_next_attempt
+    ON outbox (next_attempt);
+'''
+
+
+class Outbox:
+    """On-disk outbox of failed deliveries
+
+    Failed deliveries are stored in SQLite and retried by a single background
+    thread, so retries never occupy the delivery workers.  Retries back off
+    exponentially with jitter, and never earlier than the delay the output asks
+    for, e.g. from a Retry-After header.  Messages are dropped once
+    `max_attempts` have failed, when the output says retrying cannot succeed,
+    or when the same or a newer report for the same output was delivered, e.g.
+    by a delivery that succeeded after timing out.  Retries are held while
+    `can_send` returns False, e.g. on a standby replica.  A delivery that
+    failed part way stores its `PartialDeliveryError` progress and is resumed
+    from there rather than sent again from the start.
+
+    The database uses WAL, which does not work across hosts, so `path` must be
+    on host-local storage.  Each replica retries its own failed deliveries
+    while it is the leader.
+    """
+    # pylint: disable=too-many-instance-attributes
+    PAUSE_S = 5
+
+    def __init__(self,
+                 resolve_job: Callable[[str], Optional[AbstractOutput]],
+                 on_delivered: Optional[Callable[[str, dt.datetime], None]] = None,
+                 can_send: Optional[Callable[[], bool]] = None,
+                 path: Optional[Path] = None,
+                 max_attempts: int = 8,
+                 base_delay: float = 30,
+                 max_delay: float = 3600):
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
+        if path is None:
+            path = get_data_path().joinpath('outbox.sqlite3')
+        self.path = path
+        self.__resolve_job = resolve_job
+        self.__on_delivered = on_delivered
+        self.__can_send = can_send
+        self.__max_attempts = max_attempts
+        self.__base_delay = base_delay
+        self.__max_delay = max_delay
+        self.__lock = Lock()
+        self.__wake_event = Event()
+        self.__stop_event = Event()
+        self.__retry_thread = Thread(target=self.__retry_loop,
+                                     name='outbox',
+                                     daemon=True)
+        self.__depth = get_gauge(
+            name='outbox_depth',
+            documentation='Number of deliveries waiting to be retried'
+        )
+        get_counter(
+            name='outbox_retries',
+            documentation='Delivery retry attempts',
+            labelnames=['job', 'result']
+        )
+        get_counter(
+            name='outbox_dropped',
+            documentation='Deliveries given up on',
+            labelnames=['job']
+        )
+        self.__log = logging.getLogger('Outbox')
+        self.__conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.__conn.execute('PRAGMA journal_mode=WAL')
+        self.__conn.executescript(SCHEMA)
+        columns = [row[1] for row in self.__conn.execute('PRAGMA table_info(outbox)')]
+        if 'progress' not in columns:
+            self.__conn.execute('ALTER TABLE outbox ADD COLUMN progress TEXT')
+        self.__update_depth()
+
+    def start(self):
+        """Starts retrying
+        """
+        self.__retry_thread.start()
+
+    def shutdown(self):
+        """Stops retrying.  Pending deliveries stay on disk.
+        """
+        self.__stop_event.set()
+        self.__wake_event.set()
+        self.__retry_thread.join()
+
+    def __update_depth(self):
+        with self.__lock:
+            depth, = self.__conn.execute('SELECT COUNT(*) FROM outbox').fetchone()
+        self.__depth.set(depth)
+
+    def get_backoff(self, attempts: int) -> float:
+        """Computes the jittered backoff after a number of failed attempts
+
+        Args:
+            attempts (int): Failed attempts so far
+
+        Returns:
+            float: Seconds to wait, between half and all of the exponential
+            delay
+        """
+        delay = min(self.__max_delay, self.__base_delay * 2 ** (attempts - 1))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def __schedule(self,
+                   job: AbstractOutput,
+                   exc: Exception,
+                   attempts: int) -> Optional[float]:
+        if isinstance(exc, PartialDeliveryError) and exc.__cause__ is not None:
+            exc = exc.__cause__
+        retry_delay = job.get_retry_delay(exc)
+        if retry_delay is None:
+            self.__log.error('Not retrying %s: %s', job.name, exc)
+            return None
+        if attempts >= self.__max_attempts:
+            self.__log.error('Giving up on %s after %d attempts', job.name, attempts)
+            return None
+        return time.time() + max(retry_delay, self.get_backoff(attempts))
+
+    def add(self,
+            job: AbstractOutput,
+            message: str,
+            cycle: dt.datetime,
+            exc: Exception):
+        """Stores a failed delivery for retrying
+
+        Args:
+            job (AbstractOutput): Output job
+            message (str): Message that failed to send
+            cycle (dt.datetime): Report cycle
+            exc (Exception): Exception raised by the delivery
+        """
+        next_attempt = self.__schedule(job, exc, 1)
+        if next_attempt is None:
+            get_counter('outbox_dropped').labels(job=job.name).inc()
+            return
+        with self.__lock, self.__conn:
+            self.__conn.execute(
+                'INSERT INTO outbox (job, cycle, message, attempts, next_attempt, progress) '
+                'VALUES (?, ?, ?, 1, ?, ?)',
+                (job.name, cycle.isoformat(), message, next_attempt, self.__progress(exc)))
+        self.__log.info('Retrying %s in %.0f seconds',
+                        job.name, next_attempt - time.time())
+        self.__update_depth()
+        self.__wake_event.set()
+
+    def has_pending(self, job: str, cycle: dt.datetime) -> bool:
+        """Checks whether a delivery for a cycle is waiting to be retried
+
+        Args:
+            job (str): Output job name
+            cycle (dt.datetime): Report cycle
+
+        Returns:
+            bool: True if the report for `cycle` or a later cycle is pending
+        """
+        with self.__lock:
+            cycles = self.__conn.execute(
+                'SELECT cycle FROM outbox WHERE job = ?', (job,)).fetchall()
+        return any(dt.datetime.fromisoformat(pending) >= cycle
+                   for pending, in cycles)
+
+    def supersede(self, job: str, cycle: dt.datetime):
+        """Drops pending deliveries of a delivered report and older reports
+
+        Args:
+            job (str): Output job name
+            cycle (dt.datetime): Report cycle that was delivered
+        """
+        with self.__lock:
+            rows = self.__conn.execute(
+                'SELECT id, cycle FROM outbox WHERE job = ?', (job,)).fetchall()
+            stale = [(idx,) for idx, pending in rows
+                     if dt.datetime.fromisoformat(pending) <= cycle]
+            with self.__conn:
+                self.__conn.executemany('DELETE FROM outbox WHERE id = ?', stale)
+        if stale:
+            self.__log.info('Dropped %d superseded deliveries to %s',
+                            len(stale), job)
+            self.__update_depth()
+
+    @staticmethod
+    def __progress(exc: Exception) -> Optional[str]:
+        if isinstance(exc, PartialDeliveryError):
+            return json.dumps(exc.progress)
+        return None
+
+    def __retry_loop(self):
+        while not self.__stop_event.is_set():
+            with self.__lock:
+                row = self.__conn.execute(
+                    'SELECT id, job, cycle, message, attempts, progress, next_attempt '
+                    'FROM outbox ORDER BY next_attempt LIMIT 1').fetchone()
+            if row is None:
+                self.__wake_event.wait()
+                self.__wake_event.clear()
+                continue
+            if self.__can_send is not None and not self.__can_send():
+                self.__stop_event.wait(self.PAUSE_S)
+                continue
+            delay = row[6] - time.time()
+            if delay > 0:
+                self.__wake_event.wait(delay)
+                self.__wake_event.clear()
+                continue
+            try:
+                self.__retry(*row[:6])
+            except Exception:  # pylint: disable=broad-exception-caught
+                self.__log.exception('Failed to process outbox entry %d', row[0])
+            self.__update_depth()
+
+    def __retry(self,
+                idx: int,
+                job_name: str,
+                cycle: str,
+                message: str,
+                attempts: int,
+                progress: Optional[str]):
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
+        job = self.__resolve_job(job_name)
+        if job is None:
+            self.__log.warning('Dropping delivery to removed output %s', job_name)
+            self.__delete(idx)
+            return
+        try:
+            if progress is None:
+                job.execute(message=message)
+            else:
+                job.resume(message, json.loads(progress))
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            get_counter('outbox_retries').labels(job=job_name, result='failure').inc()
+            next_attempt = self.__schedule(job, exc, attempts + 1)
+            if next_attempt is None:
+                get_counter('outbox_dropped').labels(job=job_name).inc()
+                self.__delete(idx)
+                return
+            self.__log.warning('Retry %d of %s failed: %s', attempts, job_name, exc)
+            with self.__lock, self.__conn:
+                self.__conn.execute(
+                    'UPDATE outbox SET attempts = ?, next_attempt = ?, '
+                    'progress = COALESCE(?, progress) WHERE id = ?',
+                    (attempts + 1, next_attempt, self.__progress(exc), idx))
+            return
+        get_counter('outbox_retries').labels(job=job_name, result='success').inc()
+        self.__log.info('Delivered %s on retry %d', job_name, attempts)
+        self.__delete(idx)
+        if self.__on_delivered is not None:
+            self.__on_delivered(job_name, dt.datetime.fromisoformat(cycle))
+
+    def __delete(self, idx: int):
+        with self.__lock, self.__conn:
+            self.__conn.execute('DELETE FROM outbox WHERE id = ?', (idx,))
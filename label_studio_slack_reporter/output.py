@@ -1,28 +1,55 @@
 '''Reporters
+
+Output dependencies are imported when an output first executes, so outputs
+that are not configured cost nothing at startup.
 '''
+# pylint: disable=import-outside-toplevel
+from __future__ import annotations
+
 import base64
 from abc import ABC, abstractmethod
 from email.mime.text import MIMEText
-from typing import List
+from typing import TYPE_CHECKING, Any, Dict, Hashable, List, Optional, Tuple
+
+from label_studio_slack_reporter.retry import parse_retry_after
 
-from googleapiclient.discovery import Resource
-from googleapiclient.errors import HttpError
-from slack_sdk import WebClient
+if TYPE_CHECKING:
+    from googleapiclient.discovery import Resource
 
-from label_studio_slack_reporter.gapp import GoogleAppService
+
+def get_http_retry_delay(status: int, retry_after: Optional[str]) -> Optional[float]:
+    """Classifies a failed HTTP response
+
+    Args:
+        status (int): HTTP status code
+        retry_after (Optional[str]): Retry-After header
+
+    Returns:
+        Optional[float]: Seconds to wait before retrying a rate limited or
+        server error response, None for other errors, which retrying cannot fix
+    """
+    if status == 429 or status >= 500:
+        return parse_retry_after(retry_after)
+    return None
 
 
 class AbstractOutput(ABC):
     """Abstract Output Job
 
+    Outputs receive the report rendered in their `report_format`, one of
+    `label_studio_slack_reporter.report.RENDERERS`.
     """
     # pylint: disable=too-few-public-methods
+    report_format = 'text'
+
     def __init__(self,
                  schedule: str,
                  job_name: str,
+                 project_ids: Optional[List[int]] = None,
                  **_):
         self.schedule = schedule
         self.name = job_name
+        self.project_ids = list(project_ids) if project_ids is not None else None
 
     @abstractmethod
     def execute(self,
@@ -30,39 +57,125 @@ class AbstractOutput(ABC):
         """Executes outputting
 
         Args:
-            message (str): Message to send.  This message is a plain text
-            formatted message for all relevant projects for this output job
+            message (str): Message to send.  This message is the report for
+            all relevant projects for this output job, rendered in
+            `report_format`
+        """
+
+    def resume(self, message: str, progress: Dict[str, Any]):
+        """Sends the rest of a message after a `PartialDeliveryError`
+
+        Args:
+            message (str): Message to send
+            progress (Dict[str, Any]): Progress of the failed delivery
+        """
+        # pylint: disable=unused-argument
+        self.execute(message=message)
+
+    @property
+    def batch_key(self) -> Optional[Hashable]:
+        """Outputs with the same key may be delivered together through
+        `execute_batch`.  None if the output is always delivered alone.
+        """
+        return None
+
+    @classmethod
+    def execute_batch(cls,
+                      deliveries: List[Tuple[AbstractOutput, str]]
+                      ) -> List[Optional[Exception]]:
+        """Executes several outputs of this type together
+
+        Args:
+            deliveries (List[Tuple[AbstractOutput, str]]): Outputs and the
+            messages to send them
+
+        Returns:
+            List[Optional[Exception]]: Error of each delivery, None on success
+        """
+        errors: List[Optional[Exception]] = []
+        for job, message in deliveries:
+            try:
+                job.execute(message=message)
+                errors.append(None)
+            except Exception as exc:  # pylint: disable=broad-exception-caught
+                errors.append(exc)
+        return errors
+
+    def get_retry_delay(self, exc: Exception) -> Optional[float]:
+        """Classifies a failed execution
+
+        Args:
+            exc (Exception): Exception raised by `execute`
+
+        Returns:
+            Optional[float]: Minimum number of seconds to wait before retrying,
+            or None if retrying cannot succeed
         """
+        # pylint: disable=unused-argument
+        return 0
 
 
 class SlackOutput(AbstractOutput):
     """Slack output
+
+    Delivered through the `SlackDelivery` shared by all outputs with the same
+    token.  See `SlackDelivery.post` for `rate`, `burst` and `file_threshold`.
     """
     # pylint: disable=too-few-public-methods
+    report_format = 'blocks'
 
     def __init__(self,
                  schedule: str,
                  job_name: str,
                  secret: str,
                  channel_id: str,
+                 rate: float = 1,
+                 burst: int = 1,
+                 file_threshold: Optional[int] = 20000,
                  **kwargs):
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
         super().__init__(schedule, job_name, **kwargs)
         self.__slack_secret = secret
         self.__channel_id = channel_id
-
-        self.__client = WebClient(token=self.__slack_secret)
+        self.__rate = rate
+        self.__burst = burst
+        self.__file_threshold = file_threshold
 
     def execute(self, message):
-        self.__client.chat_postMessage(
+        self.resume(message, {})
+
+    def resume(self, message, progress):
+        from label_studio_slack_reporter.slack import SlackDelivery
+        SlackDelivery.get_instance(self.__slack_secret).post(
             channel=self.__channel_id,
-            text=message
+            message=message,
+            rate=self.__rate,
+            burst=self.__burst,
+            file_threshold=self.__file_threshold,
+            thread_ts=progress.get('thread_ts'),
+            posted=progress.get('posted', 0)
         )
 
+    def get_retry_delay(self, exc: Exception) -> Optional[float]:
+        from slack_sdk.errors import SlackApiError
+        if not isinstance(exc, SlackApiError):
+            # Connection errors
+            return 0
+        # e.g. channel_not_found or invalid_auth are not retried
+        return get_http_retry_delay(exc.response.status_code,
+                                    exc.response.headers.get('Retry-After'))
+
 
 class EmailOutput(AbstractOutput):
     """Email Output
+
+    Email outputs delivered together are sent through Gmail's batch endpoint,
+    at most `MAX_BATCH_SIZE` messages and `MAX_BATCH_BYTES` of raw message per
+    batch request.
     """
     # pylint: disable=too-few-public-methods
+    MAX_BATCH_SIZE = 50
+    MAX_BATCH_BYTES = 8 * 1024 * 1024
 
     def __init__(self,
                  schedule: str,
@@ -79,9 +192,15 @@ class EmailOutput(AbstractOutput):
         self.__cc = cc
         self.__bcc = bcc
 
-    def execute(self, message):
-        gmail_service = GoogleAppService.get_instance().get_gmail_service()
-        message_service: Resource = gmail_service.users().messages()
+    def build_body(self, message: str) -> Dict[str, str]:
+        """Builds the Gmail send request body
+
+        Args:
+            message (str): Message to send
+
+        Returns:
+            Dict[str, str]: Request body holding the raw MIME message
+        """
         email_message = MIMEText(message, 'plain')
         email_message['from'] = 'e4e@ucsd.edu'
         if len(self.__to) > 0:
@@ -91,11 +210,62 @@ class EmailOutput(AbstractOutput):
         if self.__bcc and len(self.__bcc) > 0:
             email_message['bcc'] = '; '.join(self.__bcc)
         email_message['subject'] = self.__subject
+        return {'raw': base64.urlsafe_b64encode(email_message.as_bytes()).decode()}
+
+    @staticmethod
+    def __get_gmail_service() -> Resource:
+        from label_studio_slack_reporter.gapp import GoogleAppService
+        return GoogleAppService.get_instance().get_gmail_service()
+
+    def execute(self, message):
+        from googleapiclient.errors import HttpError
+
+        message_service: Resource = self.__get_gmail_service().users().messages()
         try:
             message_service.send(
                 userId='me',
-                body={'raw': base64.urlsafe_b64encode(
-                    email_message.as_bytes()).decode()}
+                body=self.build_body(message)
             ).execute()
         except HttpError as exc:
             raise exc
+
+    @property
+    def batch_key(self) -> Optional[Hashable]:
+        return 'gmail'
+
+    @classmethod
+    def execute_batch(cls,
+                      deliveries: List[Tuple[AbstractOutput, str]]
+                      ) -> List[Optional[Exception]]:
+        gmail_service = cls.__get_gmail_service()
+        bodies = [job.build_body(message) for job, message in deliveries]
+        errors: List[Optional[Exception]] = [None] * len(deliveries)
+
+        def record(request_id: str, _, exc: Optional[Exception]):
+            errors[int(request_id)] = exc
+
+        start = 0
+        while start < len(bodies):
+            end = start + 1
+            size = len(bodies[start]['raw'])
+            while (end < len(bodies) and end - start < cls.MAX_BATCH_SIZE and
+                   size + len(bodies[end]['raw']) <= cls.MAX_BATCH_BYTES):
+                size += len(bodies[end]['raw'])
+                end += 1
+            batch = gmail_service.new_batch_http_request(callback=record)
+            for idx in range(start, end):
+                batch.add(gmail_service.users().messages().send(userId='me',
+                                                                body=bodies[idx]),
+                          request_id=str(idx))
+            try:
+                batch.execute()
+            except Exception as exc:  # pylint: disable=broad-exception-caught
+                errors[start:end] = [exc] * (end - start)
+            start = end
+        return errors
+
+    def get_retry_delay(self, exc: Exception) -> Optional[float]:
+        from googleapiclient.errors import HttpError
+        if not isinstance(exc, HttpError):
+            return 0
+        return get_http_retry_delay(exc.resp.status, exc.resp.get('retry-after'))
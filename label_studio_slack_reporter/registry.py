@@ -0,0 +1,132 @@
+'''Output Registry
+'''
+from __future__ import annotations
+
+import importlib
+import logging
+from importlib.metadata import entry_points
+from threading import Lock
+from typing import Dict, List, Optional, Type
+
+from label_studio_slack_reporter.output import AbstractOutput
+
+ENTRY_POINT_GROUP = 'label_studio_slack_reporter.outputs'
+
+BUILTIN_OUTPUTS = {
+    'slack': 'label_studio_slack_reporter.output:SlackOutput',
+    'email': 'label_studio_slack_reporter.output:EmailOutput',
+    'webhook': 'label_studio_slack_reporter.webhook:WebhookOutput',
+}
+
+
+class OutputRegistry:
+    """Registry of output types, extensible through entry points
+
+    Packages add output types by declaring `AbstractOutput` subclasses in the
+    `label_studio_slack_reporter.outputs` entry point group, named by the
+    `type` used in the config, e.g. with Poetry:
+
+        [tool.poetry.plugins."label_studio_slack_reporter.outputs"]
+        teams = "my_package.teams:TeamsOutput"
+
+    Only the installed distribution metadata is scanned up front.  A plugin is
+    imported the first time an output of its type is configured, so broken or
+    heavy plugins cost nothing unless used.  Built-in types cannot be
+    overridden.
+    """
+
+    __instance: Optional[OutputRegistry] = None
+    __instance_lock = Lock()
+
+    def __init__(self):
+        self.__lock = Lock()
+        self.__specs: Dict[str, str] = {}
+        self.__loaded: Dict[str, Type[AbstractOutput]] = {}
+        self.__log = logging.getLogger('OutputRegistry')
+        for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+            if entry_point.name in BUILTIN_OUTPUTS:
+                self.__log.warning('Ignoring plugin %s, shadows a built-in output',
+                                   entry_point.value)
+                continue
+            self.__specs[entry_point.name] = entry_point.value
+        self.__specs.update(BUILTIN_OUTPUTS)
+
+    @classmethod
+    def get_instance(cls) -> OutputRegistry:
+        """Retrieves the shared registry
+
+        Returns:
+            OutputRegistry: Registry
+        """
+        with cls.__instance_lock:
+            if cls.__instance is None:
+                cls.__instance = OutputRegistry()
+            return cls.__instance
+
+    def has(self, type_name: str) -> bool:
+        """Checks whether an output type is known, without importing it
+
+        Args:
+            type_name (str): Output type name, as used in the config
+
+        Returns:
+            bool: True if the type is built in, registered or a plugin
+        """
+        with self.__lock:
+            return type_name in self.__specs or type_name in self.__loaded
+
+    def get_names(self) -> List[str]:
+        """Lists the known output types
+
+        Returns:
+            List[str]: Output type names
+        """
+        with self.__lock:
+            return sorted(set(self.__specs) | set(self.__loaded))
+
+    def register(self, type_name: str, output_type: Type[AbstractOutput]):
+        """Registers an output type directly
+
+        Args:
+            type_name (str): Output type name, as used in the config
+            output_type (Type[AbstractOutput]): Output class
+        """
+        if not issubclass(output_type, AbstractOutput):
+            raise TypeError(f'{output_type} is not an AbstractOutput')
+        with self.__lock:
+            self.__specs.pop(type_name, None)
+            self.__loaded[type_name] = output_type
+
+    def get(self, type_name: str) -> Type[AbstractOutput]:
+        """Retrieves an output type, importing it on first use
+
+        Args:
+            type_name (str): Output type name, as used in the config
+
+        Raises:
+            KeyError: Unknown output type
+            ImportError: The output type could not be imported
+            TypeError: The output type is not an AbstractOutput
+
+        Returns:
+            Type[AbstractOutput]: Output class
+        """
+        with self.__lock:
+            if type_name in self.__loaded:
+                return self.__loaded[type_name]
+            if type_name not in self.__specs:
+                raise KeyError(type_name)
+            spec = self.__specs[type_name]
+            module_name, _, attr = spec.partition(':')
+            try:
+                output_type = importlib.import_module(module_name)
+                for part in attr.split('.'):
+                    output_type = getattr(output_type, part)
+            except AttributeError as exc:
+                raise ImportError(f'Cannot load output {type_name} from {spec}') from exc
+            if not isinstance(output_type, type) or \
+                    not issubclass(output_type, AbstractOutput):
+                raise TypeError(f'Output {type_name} from {spec} is not an AbstractOutput')
+            self.__loaded[type_name] = output_type
+            self.__log.info('Loaded output %s from %s', type_name, spec)
+            return output_type
@@ -0,0 +1,252 @@
+'''Report Model and Renderers
+'''
+from __future__ import annotations
+
+import datetime as dt
+import json
+import math
+from dataclasses import dataclass
+from threading import Lock
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from label_studio_slack_reporter.metrics import get_counter
+
+
+@dataclass(frozen=True)
+class UserCount:
+    """Annotations made by one user
+
+    `user_id` is None for annotations without a `completed_by` user.
+    """
+    user_id: Optional[int]
+    name: str
+    count: int
+
+
+@dataclass(frozen=True)
+class ProjectReport:
+    """Progress of one project
+
+    A project whose report timed out is reported with its last known results
+    and `stale_as_of` set, or as unavailable if it was never reported.
+    """
+    # pylint: disable=too-many-instance-attributes
+    project_id: int
+    title: str = ''
+    users: Tuple[UserCount, ...] = ()
+    total: int = 0
+    recent: int = 0
+    days: int = 0
+    eta_days: float = math.inf
+    available: bool = True
+    stale_as_of: Optional[dt.datetime] = None
+    timed_out_after: Optional[float] = None
+
+
+@dataclass(frozen=True)
+class Report:
+    """Progress of a set of projects for one report cycle
+    """
+    projects: Tuple[ProjectReport, ...]
+    cycle: Optional[dt.datetime] = None
+
+
+# Block Kit limit on the text of a section block
+MAX_SECTION_CHARS = 3000
+
+
+def render_timeout(project: ProjectReport) -> str:
+    """Renders why a project's results are stale or unavailable
+
+    Args:
+        project (ProjectReport): Project report
+
+    Returns:
+        str: Parenthesized timeout, or an empty string if no timeout is known
+    """
+    if project.timed_out_after is None:
+        return ''
+    return f' (timed out after {project.timed_out_after:.0f} seconds)'
+
+
+def render_project_lines(project: ProjectReport) -> List[str]:
+    """Renders one project as lines of plain text
+
+    Args:
+        project (ProjectReport): Project report
+
+    Returns:
+        List[str]: Lines of the project's section
+    """
+    if not project.available:
+        return [f'Results for project {project.project_id} unavailable'
+                f'{render_timeout(project)}']
+    lines = [f'Results for {project.title}']
+    lines.extend(f'{user.name}: {user.count}' for user in project.users)
+    lines.append(f'Total: {project.total}')
+    lines.append(f'Estimated time to completion: {project.eta_days:.1f} days')
+    lines.append(f'{project.recent} annotations were made in the last '
+                 f'{project.days * 24} hours')
+    if project.stale_as_of is not None:
+        lines.insert(0, f'Stale results as of {project.stale_as_of:%Y-%m-%d %H:%M} UTC'
+                        f'{render_timeout(project)}')
+    return lines
+
+
+def render_project_text(project: ProjectReport) -> str:
+    """Renders one project as plain text
+
+    Args:
+        project (ProjectReport): Project report
+
+    Returns:
+        str: Plain text section
+    """
+    return '\n'.join(render_project_lines(project))
+
+
+def render_project_blocks(project: ProjectReport) -> List[Dict[str, Any]]:
+    """Renders one project as Block Kit sections
+
+    The project's lines are packed into as few sections as fit
+    `MAX_SECTION_CHARS`, and a line that is itself too long is split.
+
+    Args:
+        project (ProjectReport): Project report
+
+    Returns:
+        List[Dict[str, Any]]: Section blocks
+    """
+    chunks: List[str] = []
+    current = ''
+    for line in render_project_lines(project):
+        while len(line) > MAX_SECTION_CHARS:
+            if current:
+                chunks.append(current)
+                current = ''
+            chunks.append(line[:MAX_SECTION_CHARS])
+            line = line[MAX_SECTION_CHARS:]
+        if current and len(current) + 1 + len(line) > MAX_SECTION_CHARS:
+            chunks.append(current)
+            current = ''
+        current = f'{current}\n{line}' if current else line
+    if current:
+        chunks.append(current)
+    return [{'type': 'section', 'text': {'type': 'plain_text', 'text': chunk}}
+            for chunk in chunks]
+
+
+def render_text(report: Report) -> str:
+    """Renders a report as plain text, one paragraph per project
+
+    Args:
+        report (Report): Report
+
+    Returns:
+        str: Plain text report
+    """
+    return '\n\n'.join(render_project_text(project) for project in report.projects)
+
+
+def render_json(report: Report) -> str:
+    """Renders a report as compact JSON
+
+    Args:
+        report (Report): Report
+
+    Returns:
+        str: JSON report
+    """
+    def as_dict(project: ProjectReport) -> Dict[str, Any]:
+        return {
+            'id': project.project_id,
+            'title': project.title,
+            'available': project.available,
+            'users': [{'id': user.user_id, 'name': user.name, 'count': user.count}
+                      for user in project.users],
+            'total': project.total,
+            'recent': project.recent,
+            'window_hours': project.days * 24,
+            'eta_days': project.eta_days if math.isfinite(project.eta_days) else None,
+            'stale_as_of': (project.stale_as_of.isoformat()
+                            if project.stale_as_of is not None else None),
+            'timed_out_after': project.timed_out_after,
+        }
+    return json.dumps({'cycle': report.cycle.isoformat() if report.cycle else None,
+                       'projects': [as_dict(project) for project in report.projects]},
+                      separators=(',', ':'))
+
+
+def render_blocks(report: Report) -> str:
+    """Renders a report for Slack
+
+    Args:
+        report (Report): Report
+
+    Returns:
+        str: JSON object holding the plain text rendering as `text`, used for
+        notifications and file uploads, and Block Kit sections as `blocks`
+    """
+    return json.dumps({'text': render_text(report),
+                       'blocks': [block for project in report.projects
+                                  for block in render_project_blocks(project)]},
+                      separators=(',', ':'))
+
+
+RENDERERS: Dict[str, Callable[[Report], str]] = {
+    'text': render_text,
+    'json': render_json,
+    'blocks': render_blocks,
+}
+
+
+class ReportRenderer:
+    """Renders reports, each format at most once per report
+
+    Outputs that fire in the same cycle over the same projects receive equal
+    `Report`s, so they share a single rendering per format.  Renderings for the
+    last `MAX_CACHED_CYCLES` cycles are kept.
+    """
+    # pylint: disable=too-few-public-methods
+    MAX_CACHED_CYCLES = 4
+
+    def __init__(self):
+        self.__cache: Dict[dt.datetime, Dict[Tuple[Report, str], str]] = {}
+        self.__lock = Lock()
+        get_counter(
+            name='report_renders',
+            documentation='Reports rendered',
+            labelnames=['format']
+        )
+
+    def render(self, report: Report, report_format: str) -> str:
+        """Renders a report, reusing an earlier rendering if possible
+
+        Args:
+            report (Report): Report
+            report_format (str): One of `RENDERERS`
+
+        Raises:
+            KeyError: Unknown format
+
+        Returns:
+            str: Rendered report
+        """
+        renderer = RENDERERS[report_format]
+        key = (report, report_format)
+        with self.__lock:
+            cached = self.__cache.get(report.cycle, {})
+            if key in cached:
+                return cached[key]
+        rendered = renderer(report)
+        get_counter('report_renders').labels(format=report_format).inc()
+        if report.cycle is None:
+            return rendered
+        with self.__lock:
+            if report.cycle not in self.__cache:
+                self.__cache[report.cycle] = {}
+                for expired in sorted(self.__cache)[:-self.MAX_CACHED_CYCLES]:
+                    del self.__cache[expired]
+            if report.cycle in self.__cache:
+                self.__cache[report.cycle][key] = rendered
+        return rendered
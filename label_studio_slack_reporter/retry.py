@@ -0,0 +1,39 @@
+'''Retry Helpers
+'''
+import datetime as dt
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+
+
+class PartialDeliveryError(Exception):
+    """Delivery failed after part of the message was sent
+
+    `progress` is JSON serializable and lets the output's `resume` send only
+    the rest.  The original error is the `__cause__`.
+    """
+
+    def __init__(self, progress: Dict[str, Any]):
+        super().__init__(f'Delivery stopped at {progress}')
+        self.progress = progress
+
+
+def parse_retry_after(value: Optional[str]) -> float:
+    """Parses a Retry-After header
+
+    Args:
+        value (Optional[str]): Header value, in seconds or as an HTTP date
+
+    Returns:
+        float: Seconds to wait, 0 if absent or malformed
+    """
+    if not value:
+        return 0
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return 0
+    return max(0.0, (retry_at - dt.datetime.now(dt.timezone.utc)).total_seconds())
@@ -4,34 +4,83 @@ from __future__ import annotations
 
 import argparse
 import datetime as dt
+import heapq
 import logging
+import signal
+import sys
 import time
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass
+from functools import partial
 from pathlib import Path
-from queue import Empty, Full, Queue
-from threading import Event, Thread
-from typing import Dict, List
+from queue import Empty
+from threading import Event, Lock, Thread
+from typing import Deque, Dict, List, Optional, Set, Tuple
 
-import pycron
 from prometheus_client import start_http_server
 from tomlkit import parse
 from tzlocal import get_localzone
 
 from label_studio_slack_reporter.config import configure_logging
+from label_studio_slack_reporter.cron import CronSchedule
+from label_studio_slack_reporter.delivery import DeliveryPool
+from label_studio_slack_reporter.job_queue import CoalescingJobQueue, PendingRun
+from label_studio_slack_reporter.journal import JobJournal
+from label_studio_slack_reporter.leader import LeaderLease
 from label_studio_slack_reporter.label_studio import Reporter
-from label_studio_slack_reporter.metrics import (get_counter, get_summary,
-                                                 system_monitor_thread)
-from label_studio_slack_reporter.output import (AbstractOutput, EmailOutput,
-                                                SlackOutput)
-from label_studio_slack_reporter.gapp import GoogleAppService
+from label_studio_slack_reporter.outbox import Outbox
+from label_studio_slack_reporter.metrics import (format_startup_timings,
+                                                 get_counter, get_summary,
+                                                 system_monitor_thread,
+                                                 time_startup)
+from label_studio_slack_reporter.output import AbstractOutput
+from label_studio_slack_reporter.registry import OutputRegistry
+from label_studio_slack_reporter.report import ProjectReport, ReportRenderer
+
+
+@dataclass(frozen=True)
+class PrewarmSettings:
+    """Pre-warming settings, from the `prewarm` config section
+    """
+    enabled: bool = False
+    safety_factor: float = 1.5
+    margin: float = 60
+    max_lead: float = 3600
+
+    def get_report_max_age(self, lead_time: float) -> Optional[float]:
+        """Computes the oldest pre-warmed report a run may use
+
+        A report pre-warmed for the run is at most `lead_time` old when the run
+        fires, so an older report was not generated for this cycle.
+
+        Args:
+            lead_time (float): Lead time of the run
+
+        Returns:
+            Optional[float]: Maximum age in seconds, None if disabled
+        """
+        return lead_time + self.margin if self.enabled else None
+
+    def get_lead_time(self, duration: float) -> float:
+        """Computes how long before its cycle to pre-warm a run
+
+        Args:
+            duration (float): Slowest recent report generation for the run
+
+        Returns:
+            float: Lead time in seconds
+        """
+        return min(duration * self.safety_factor + self.margin, self.max_lead)
+
 
 class Service:
     """Main service
     """
     # pylint: disable=too-many-instance-attributes
-    OUTPUT_TYPE_MAPPING = {
-        'slack': SlackOutput,
-        'email': EmailOutput
-    }
+    MAX_SCHEDULER_SLEEP_S = 60
+    DURATION_HISTORY = 5
+    CLOCK_JUMP_THRESHOLD_S = 60
 
     def __init__(self,
                  config: Path,
@@ -42,24 +91,33 @@ class Service:
         if not config.is_file():
             raise ValueError('Config path is not a file!')
 
-        with open(config, 'r', encoding='utf-8') as handle:
-            self.__config = parse(handle.read())
+        self.__config_path = config
+        self.__config_signature = self.__get_config_signature()
+        with time_startup('config'):
+            self.__config = self.__load_config()
 
-        self.__job_queue: Queue[List[AbstractOutput]] = Queue(16)
+        self.__job_queue = CoalescingJobQueue()
 
         self.jobs: Dict[str, List[AbstractOutput]] = {}
+        self.__schedules: Dict[str, CronSchedule] = {}
+        self.__outputs: Dict[str, Tuple[Dict, AbstractOutput]] = {}
+        self.__config_lock = Lock()
+        self.__reload_lock = Lock()
+        self.__reload_event = Event()
+        self.__schedule_changed = Event()
         self.__log = logging.getLogger('Service')
-        self.__configure_schedule()
+        self.__log.info('Current time %s',
+                        dt.datetime.now(get_localzone()).isoformat())
+        with time_startup('outputs'):
+            self.__set_outputs(*self.__configure_schedule(self.__config['output']))
 
         self.__scheduler_thread = Thread(target=self.scheduler)
         self.__worker_thread = Thread(target=self.do_jobs)
+        self.__watcher_thread = Thread(target=self.config_watcher, daemon=True)
+        self.__reload_interval = self.__config.get('reload', {}).get('interval', 10)
 
-        self.__reporter = Reporter(
-            url=self.__config['label_studio']['url'],
-            api_key=self.__config['label_studio']['key'],
-            projects=self.__config['label_studio']['project_ids'],
-            days=self.__config['label_studio']['report_days'],
-        )
+        with time_startup('reporter'):
+            self.__reporter = Reporter.from_config(self.__config['label_studio'])
         self.__prometheus_port = int(self.__config['prometheus']['port'])
 
         self.__report_timer = get_summary(
@@ -68,32 +126,115 @@ class Service:
             unit='second'
         )
 
-        self.__output_timer = get_summary(
-            name='output_duration',
-            documentation='Output generation duration',
+        self.__renderer = ReportRenderer()
+        self.__delivery = self.__configure_delivery(self.__config.get('delivery', {}))
+        self.__journal = self.__configure_journal(self.__config.get('journal', {}))
+        self.__prewarm_settings = PrewarmSettings(**self.__config.get('prewarm', {}))
+        self.__durations: Dict[Tuple[str, ...], Deque[float]] = {}
+        self.__durations_lock = Lock()
+        self.__prewarmed: Set[Tuple[str, dt.datetime]] = set()
+        self.__warm_runs: Set[Tuple[Tuple[str, ...], dt.datetime]] = set()
+
+        self.__lease = self.__configure_leader(self.__config.get('leader', {}))
+        self.__outbox = self.__configure_outbox(self.__config.get('outbox', {}))
+
+        self.__register_counters()
+        self.__fire_lag = get_summary(
+            name='scheduler_fire_lag',
+            documentation='Delay between scheduled and actual fire time',
             unit='second',
-            labelnames=['job']
+            labelnames=['schedule']
         )
+        self.__google_app_ready = False
+        self.__init_google_app(self.__config)
 
-        get_counter(
-            name='job_execute_errors',
-            documentation='Job Execution error count',
-            labelnames=['job']
+    @staticmethod
+    def __configure_delivery(delivery_section: Dict) -> DeliveryPool:
+        return DeliveryPool(
+            workers=delivery_section.get('workers', 4),
+            timeout=delivery_section.get('timeout', 120)
+        )
+
+    @staticmethod
+    def __configure_journal(journal_section: Dict) -> JobJournal:
+        return JobJournal(
+            path=Path(journal_section['path']) if 'path' in journal_section else None,
+            grace=journal_section.get('grace', 3600)
         )
+
+    def __configure_leader(self, leader_section: Dict) -> Optional[LeaderLease]:
+        if not leader_section.get('enabled', False):
+            return None
+        if 'path' not in leader_section:
+            raise KeyError('Expected leader.path on a volume shared by the replicas')
+        return LeaderLease(
+            path=Path(leader_section['path']),
+            ttl=leader_section.get('ttl', 30),
+            on_change=self.__on_leadership_change
+        )
+
+    def __configure_outbox(self, outbox_section: Dict) -> Outbox:
+        return Outbox(
+            resolve_job=self.__find_job,
+            on_delivered=self.__on_delivered,
+            can_send=self.is_leader,
+            max_attempts=outbox_section.get('max_attempts', 8),
+            base_delay=outbox_section.get('base_delay', 30),
+            max_delay=outbox_section.get('max_delay', 3600)
+        )
+
+    @staticmethod
+    def __register_counters():
         get_counter(
             name='scheduler_errors',
             documentation='Scheduler error count'
         )
-        GoogleAppService(
-            credentials=Path(self.__config['api']['google']['credentials']),
-            token=Path(self.__config['api']['google']['token'])
+        get_counter(
+            name='scheduler_missed_fires',
+            documentation='Scheduled fire times missed and coalesced',
+            labelnames=['schedule']
+        )
+        get_counter(
+            name='config_reloads',
+            documentation='Config reloads applied'
+        )
+        get_counter(
+            name='config_reload_errors',
+            documentation='Config reloads rejected'
         )
 
-    def __configure_schedule(self):
-        current_tz = get_localzone()
-        now = dt.datetime.now(current_tz)
-        self.__log.info('Current time %s', now.isoformat())
-        for output_unit, output_config in self.__config['output'].items():
+    def __init_google_app(self, config: Dict):
+        """Sets up the Google App Service once an email output is configured
+        """
+        if self.__google_app_ready or all(output_config.get('type') != 'email'
+                                          for output_config in config['output'].values()):
+            return
+        with time_startup('google_app'):
+            # pylint: disable=import-outside-toplevel
+            from label_studio_slack_reporter.gapp import GoogleAppService
+            GoogleAppService(
+                credentials=Path(config['api']['google']['credentials']),
+                token=Path(config['api']['google']['token']),
+                timeout=config['api']['google'].get('timeout', 60)
+            )
+        self.__google_app_ready = True
+
+    def __load_config(self) -> Dict:
+        with open(self.__config_path, 'r', encoding='utf-8') as handle:
+            return parse(handle.read()).unwrap()
+
+    def __get_config_signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = self.__config_path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def __configure_schedule(self, output_section: Dict) -> Tuple[
+            Dict[str, Tuple[Dict, AbstractOutput]], Dict[str, CronSchedule]]:
+        outputs: Dict[str, Tuple[Dict, AbstractOutput]] = {}
+        schedules: Dict[str, CronSchedule] = {}
+        for output_unit, output_config in output_section.items():
             if 'schedule' not in output_config:
                 raise KeyError(f'Expected schedule in output.{output_unit}')
             if not isinstance(output_config['schedule'], str):
@@ -104,87 +245,505 @@ class Service:
             if not isinstance(output_config['type'], str):
                 raise TypeError(f'Expected output.{output_unit}.type to be a '
                                 'string')
-            if output_config['type'] not in self.OUTPUT_TYPE_MAPPING:
+            if not OutputRegistry.get_instance().has(output_config['type']):
                 raise ValueError(f'output.{output_unit}.type = '
                                  f'{output_config["type"]} is not a '
                                  'recognized output type')
             job_schedule = output_config['schedule']
-            new_jpb = self.OUTPUT_TYPE_MAPPING[output_config['type']](
+            if job_schedule not in schedules:
+                schedules[job_schedule] = (self.__schedules.get(job_schedule) or
+                                           CronSchedule(job_schedule))
+            previous = self.__outputs.get(output_unit)
+            if previous is not None and previous[0] == output_config:
+                # Unchanged, so keep the existing job and its clients
+                outputs[output_unit] = previous
+                continue
+            new_jpb = OutputRegistry.get_instance().get(output_config['type'])(
                 job_name=output_unit,
                 **output_config)
-            if job_schedule not in self.jobs:
-                self.jobs[job_schedule] = [new_jpb]
-            else:
-                self.jobs[job_schedule].append(new_jpb)
+            outputs[output_unit] = (output_config, new_jpb)
+        return outputs, schedules
+
+    def __set_outputs(self,
+                      outputs: Dict[str, Tuple[Dict, AbstractOutput]],
+                      schedules: Dict[str, CronSchedule]):
+        jobs: Dict[str, List[AbstractOutput]] = {}
+        for output_config, job in outputs.values():
+            jobs.setdefault(output_config['schedule'], []).append(job)
+        with self.__config_lock:
+            self.__outputs = outputs
+            self.__schedules = schedules
+            self.jobs = jobs
+
+    def reload(self):
+        """Reloads the config file
+
+        Only the outputs whose section changed are rebuilt, and the reporter is
+        only replaced if `[label_studio]` changed.  Runs already queued or in
+        progress finish with the outputs and reporter they started with.  An
+        invalid config is logged and the current config is kept.
+        """
+        with self.__reload_lock:
+            try:
+                config = self.__load_config()
+                outputs, schedules = self.__configure_schedule(config['output'])
+                self.__init_google_app(config)
+                reporter = self.__reporter
+                if config['label_studio'] != self.__config['label_studio']:
+                    reporter = Reporter.from_config(config['label_studio'],
+                                                    reuse=self.__reporter)
+            except Exception:  # pylint: disable=broad-exception-caught
+                self.__log.exception('Rejected config %s', self.__config_path)
+                get_counter('config_reload_errors').inc()
+                return
+
+            added = outputs.keys() - self.__outputs.keys()
+            removed = self.__outputs.keys() - outputs.keys()
+            changed = [name for name in outputs.keys() & self.__outputs.keys()
+                       if outputs[name] is not self.__outputs[name]]
+            self.__set_outputs(outputs, schedules)
+            if reporter is not self.__reporter:
+                self.__log.info('Reconfigured Label Studio reporter')
+                self.__reporter = reporter
+            for section in ['prometheus', 'delivery', 'journal', 'outbox', 'leader',
+                            'prewarm', 'api', 'reload']:
+                if config.get(section) != self.__config.get(section):
+                    self.__log.warning('Changes to [%s] require a restart', section)
+            self.__config = config
+        self.__log.info('Reloaded config: added %s, removed %s, changed %s',
+                        sorted(added), sorted(removed), sorted(changed))
+        get_counter('config_reloads').inc()
+        self.__schedule_changed.set()
+
+    def config_watcher(self):
+        """Config watcher thread
+
+        Reloads the config on request (e.g. SIGHUP) or when the file changes.
+        """
+        while not self.stop_event.is_set():
+            interval = self.__reload_interval if self.__reload_interval > 0 else None
+            requested = self.__reload_event.wait(interval)
+            self.__reload_event.clear()
+            signature = self.__get_config_signature()
+            if self.stop_event.is_set():
+                break
+            if requested or (self.__reload_interval > 0 and
+                             signature != self.__config_signature):
+                self.__config_signature = signature
+                self.reload()
+
+    def __request_reload(self, *_):
+        self.__reload_event.set()
 
     def do_jobs(self):
         """Executes the jobs specified
+
+        Each project is reported once per cycle, and each job receives a digest
+        of only the projects it lists.  Digests are handed to the delivery pool,
+        so slow outputs do not hold up the next report.  Pre-warming runs only
+        generate and hold the reports for their cycle.  A run that fails is
+        logged and skipped.
         """
         while not self.stop_event.is_set():
             try:
-                jobs = self.__job_queue.get(timeout=5)
+                run = self.__job_queue.get(timeout=5)
             except Empty:
                 continue
-            with self.__report_timer.time():
-                message = self.__reporter.get_report()
-            for job in jobs:
-                try:
-                    if not self.__debug:
-                        with self.__output_timer.labels(job=job.name).time():
-                            job.execute(message=message)
-                        self.__log.info('Executed %s', job.name)
-                    else:
-                        self.__log.warning('Debug mode - no output executed!')
-                except Exception:  # pylint: disable=broad-exception-caught
-                    self.__log.exception('Failed to execute %s', job.name)
-                    get_counter('job_execute_errors').labels(
-                        job=job.name).inc()
+            try:
+                if run.prewarm:
+                    self.__prewarm(run)
+                else:
+                    self.__deliver(run)
+            except Exception:  # pylint: disable=broad-exception-caught
+                self.__log.exception('Run for %s failed', run.cycle.isoformat())
+
+    def __deliver(self, run: PendingRun):
+        cycle, jobs = run.cycle, run.jobs
+        delivered = [job for job in jobs
+                     if self.__journal.is_delivered(job.name, cycle) or
+                     self.__outbox.has_pending(job.name, cycle)]
+        if delivered:
+            self.__log.info('Skipping %s, already delivered or retrying %s',
+                            [job.name for job in delivered], cycle.isoformat())
+            jobs = [job for job in jobs if job not in delivered]
+            if not jobs:
+                return
+        if not self.is_leader():
+            self.__log.warning('Not the leader, dropping run %s', cycle.isoformat())
+            return
+        # Finish the run with this reporter even if the config is reloaded
+        reporter = self.__reporter
+        run_key = self.__get_run_key(jobs)
+        reports, duration = self.__get_reports(
+            reporter, jobs, cycle,
+            self.__prewarm_settings.get_report_max_age(self.__get_lead_time(jobs)))
+        if (run_key, cycle) not in self.__warm_runs:
+            self.__record_duration(run_key, duration)
+        # Pre-warmed runs are only used until they fire, even if the jobs of
+        # the run that fired were coalesced or changed
+        now = dt.datetime.now(dt.timezone.utc)
+        self.__warm_runs = {(key, fire_time) for key, fire_time in self.__warm_runs
+                            if fire_time > now}
+        if not self.is_leader():
+            # The new leader resumes the run from the journal
+            self.__log.warning('Lost leadership, not delivering %s', cycle.isoformat())
+            return
+        deliveries = [(job, self.__renderer.render(
+            reporter.compose_report(reports,
+                                    self.__get_job_projects(job, reporter),
+                                    cycle),
+            job.report_format)) for job in jobs]
+        if self.__debug:
+            self.__log.warning('Debug mode - no output executed!')
+            return
+        futures = self.__delivery.submit_all(
+            deliveries, lambda job: self.__on_delivered(job.name, cycle))
+        for (job, message), future in zip(deliveries, futures):
+            future.add_done_callback(
+                partial(self.__delivery_done, job, message, cycle))
+
+    def __prewarm(self, run: PendingRun):
+        if not self.is_leader():
+            return
+        _, duration = self.__get_reports(self.__reporter, run.jobs, run.cycle)
+        run_key = self.__get_run_key(run.jobs)
+        self.__record_duration(run_key, duration)
+        self.__warm_runs.add((run_key, run.cycle))
+        self.__log.info('Pre-warmed %s for %s in %.0f seconds',
+                        list(run_key), run.cycle.isoformat(), duration)
+
+    def __get_reports(self,
+                      reporter: Reporter,
+                      jobs: List[AbstractOutput],
+                      cycle: dt.datetime,
+                      max_age: Optional[float] = None
+                      ) -> Tuple[Dict[int, ProjectReport], float]:
+        """Generates the project reports for the jobs of a run
+
+        Returns:
+            Tuple[Dict[int, ProjectReport], float]: Project reports, and how
+            long generating them took in seconds
+        """
+        project_ids = list(dict.fromkeys(
+            idx for job in jobs
+            for idx in self.__get_job_projects(job, reporter)))
+        started = time.monotonic()
+        with self.__report_timer.time():
+            reports = reporter.get_project_reports(project_ids, cycle=cycle, max_age=max_age)
+        return reports, time.monotonic() - started
+
+    @staticmethod
+    def __get_run_key(jobs: List[AbstractOutput]) -> Tuple[str, ...]:
+        return tuple(sorted(job.name for job in jobs))
+
+    def __record_duration(self, run_key: Tuple[str, ...], duration: float):
+        with self.__durations_lock:
+            if run_key not in self.__durations:
+                self.__durations[run_key] = deque(maxlen=self.DURATION_HISTORY)
+            self.__durations[run_key].append(duration)
+
+    def __get_lead_time(self, jobs: List[AbstractOutput]) -> float:
+        """Estimates how long before its cycle a run should be pre-warmed
+
+        The estimate is the slowest recent report generation for the same
+        outputs, scaled by the safety factor plus a fixed margin, so it grows
+        with the projects.  It is 0 until a run has been timed.
+        """
+        with self.__durations_lock:
+            durations = self.__durations.get(self.__get_run_key(jobs))
+            if not durations:
+                return 0
+            slowest = max(durations)
+        return self.__prewarm_settings.get_lead_time(slowest)
+
+    def __queue_prewarms(self,
+                         heap: List[Tuple[dt.datetime, str]],
+                         now: dt.datetime) -> Optional[dt.datetime]:
+        """Queues pre-warming for the upcoming fire times that are due for it
+
+        Returns:
+            Optional[dt.datetime]: Earliest time a further pre-warm is due
+        """
+        with self.__config_lock:
+            jobs = self.jobs
+        upcoming = {(job_cron, fire_time) for fire_time, job_cron in heap}
+        self.__prewarmed &= upcoming
+        next_prewarm = None
+        for job_cron, fire_time in upcoming - self.__prewarmed:
+            if job_cron not in jobs:
+                continue
+            lead = self.__get_lead_time(jobs[job_cron])
+            if lead <= 0:
+                continue
+            start = fire_time - dt.timedelta(seconds=lead)
+            if start <= now:
+                self.__job_queue.put(fire_time, jobs[job_cron], prewarm=True)
+                self.__prewarmed.add((job_cron, fire_time))
+            elif next_prewarm is None or start < next_prewarm:
+                next_prewarm = start
+        return next_prewarm
+
+    def __delivery_done(self,
+                        job: AbstractOutput,
+                        message: str,
+                        cycle: dt.datetime,
+                        future: Future):
+        if future.cancelled():
+            return
+        exc = future.exception()
+        if exc is None:
+            self.__on_delivered(job.name, cycle)
+        else:
+            self.__outbox.add(job, message, cycle, exc)
+
+    def __on_delivered(self, job_name: str, cycle: dt.datetime):
+        self.__journal.record_delivery(job_name, cycle)
+        self.__outbox.supersede(job_name, cycle)
+
+    def is_leader(self) -> bool:
+        """Checks whether this replica should schedule and deliver
+
+        Returns:
+            bool: True if leader election is disabled or this replica holds the
+            lease
+        """
+        return self.__lease is None or self.__lease.is_leader
+
+    def __on_leadership_change(self, _: bool):
+        # Wake the scheduler so it takes over or stands down promptly
+        self.__schedule_changed.set()
+
+    def __find_job(self, job_name: str) -> Optional[AbstractOutput]:
+        with self.__config_lock:
+            if job_name not in self.__outputs:
+                return None
+            return self.__outputs[job_name][1]
+
+    @staticmethod
+    def __get_job_projects(job: AbstractOutput, reporter: Reporter) -> List[int]:
+        if job.project_ids is None:
+            return reporter.project_ids
+        return job.project_ids
 
     def run(self):
         """Main entry point
         """
         start_http_server(port=self.__prometheus_port)
+        self.__journal.start()
+        if self.__lease is not None:
+            self.__lease.start()
+        self.__outbox.start()
         self.__scheduler_thread.start()
         self.__worker_thread.start()
+        self.__delivery.start()
+        self.__watcher_thread.start()
         system_monitor_thread.start()
+        if hasattr(signal, 'SIGHUP'):
+            signal.signal(signal.SIGHUP, self.__request_reload)
 
         self.__log.info('Running')
         self.stop_event.wait()
 
+        # Wake the scheduler and watcher so they notice the stop
+        self.__schedule_changed.set()
+        self.__reload_event.set()
         self.__worker_thread.join()
         self.__scheduler_thread.join()
+        self.__delivery.shutdown()
+        self.__outbox.shutdown()
+        self.__journal.shutdown()
+        if self.__lease is not None:
+            self.__lease.shutdown()
+
+    def __build_schedule_heap(self,
+                              now: dt.datetime,
+                              pending: Optional[Dict[str, dt.datetime]] = None
+                              ) -> List[Tuple[dt.datetime, str]]:
+        pending = pending or {}
+        with self.__config_lock:
+            schedules = dict(self.__schedules)
+        heap = [(pending.get(job_cron) or schedule.next_after(now), job_cron)
+                for job_cron, schedule in schedules.items()]
+        heapq.heapify(heap)
+        return heap
+
+    def __pop_due_jobs(self,
+                       heap: List[Tuple[dt.datetime, str]],
+                       now: dt.datetime
+                       ) -> Tuple[dt.datetime, List[str], List[AbstractOutput]]:
+        cycle = heap[0][0]
+        due_jobs: List[AbstractOutput] = []
+        fired: List[str] = []
+        with self.__config_lock:
+            schedules, jobs = self.__schedules, self.jobs
+        while heap and heap[0][0] <= now:
+            fire_time, job_cron = heapq.heappop(heap)
+            if job_cron not in schedules:
+                # Removed by a reload the scheduler has not picked up yet
+                continue
+            schedule = schedules[job_cron]
+            next_fire = schedule.next_after(fire_time)
+            n_missed = 0
+            while next_fire <= now:
+                n_missed += 1
+                fire_time = next_fire
+                next_fire = schedule.next_after(next_fire)
+            if n_missed:
+                self.__log.warning('Missed %d fire times of %s, running once',
+                                   n_missed, job_cron)
+                get_counter('scheduler_missed_fires').labels(
+                    schedule=job_cron).inc(n_missed)
+            self.__fire_lag.labels(schedule=job_cron).observe(
+                (now - fire_time).total_seconds())
+            heapq.heappush(heap, (next_fire, job_cron))
+            due_jobs.extend(jobs[job_cron])
+            fired.append(job_cron)
+            cycle = max(cycle, fire_time)
+        return cycle, fired, due_jobs
+
+    def __take_over(self, now: dt.datetime):
+        """Starts acting as the leader
+
+        The journal is reloaded first, since another replica may have written
+        to it, and runs missed or left unfinished are caught up.
+        """
+        self.__log.info('Acting as the leader')
+        self.__journal.reload()
+        self.__catch_up(now)
+
+    def __catch_up(self, now: dt.datetime):
+        """Queues the runs a restart missed or left unfinished
+
+        Only runs within the journal's grace window are caught up, and each
+        output is only sent the latest report it missed.
+        """
+        with self.__config_lock:
+            schedules, jobs = self.__schedules, self.jobs
+        outputs = {job.name: job for job_list in jobs.values() for job in job_list}
+        runs: Dict[dt.datetime, Dict[str, AbstractOutput]] = {}
+        for fire in self.__journal.get_unfinished(now):
+            self.__log.info('Resuming run %s for %s', fire.cycle.isoformat(), fire.jobs)
+            runs.setdefault(fire.cycle, {}).update(
+                (name, outputs[name]) for name in fire.jobs if name in outputs)
+
+        earliest = now - self.__journal.grace
+        for job_cron, schedule in schedules.items():
+            last_fire = self.__journal.get_last_fire(job_cron)
+            if last_fire is None or schedule.next_after(last_fire) > now:
+                continue
+            missed = None
+            fire_time = schedule.next_after(max(last_fire, earliest))
+            while fire_time <= now:
+                missed = fire_time
+                fire_time = schedule.next_after(fire_time)
+            if missed is None or missed < earliest:
+                self.__log.warning('Missed %s outside the grace window', job_cron)
+                continue
+            self.__log.info('Catching up %s missed at %s', job_cron, missed.isoformat())
+            runs.setdefault(missed, {}).update(
+                (job.name, job) for job in jobs[job_cron])
+            self.__journal.record_fire(missed, [job_cron],
+                                       [job.name for job in jobs[job_cron]])
+
+        for cycle in sorted(runs):
+            if runs[cycle]:
+                self.__job_queue.put(cycle, list(runs[cycle].values()))
+
+    @staticmethod
+    def __read_clock(last: Tuple[float, float]) -> Tuple[Tuple[float, float], float]:
+        """Reads the wall and monotonic clocks
+
+        Args:
+            last (Tuple[float, float]): Previous wall and monotonic readings
+
+        Returns:
+            Tuple[Tuple[float, float], float]: Current readings, and how far the
+            wall clock moved relative to the monotonic clock since `last`
+        """
+        wall, mono = time.time(), time.monotonic()
+        return (wall, mono), (wall - last[0]) - (mono - last[1])
 
     def scheduler(self):
         """Scheduler thread
+
+        Keeps the next fire time of every schedule in a priority queue and
+        sleeps until the earliest one.  Fire times missed across clock jumps or
+        suspends are detected and coalesced into a single run, and runs missed
+        while no replica was the leader are caught up from the job journal.  After a config
+        reload, schedules that are still in use keep their next fire time.
+
+        If pre-warming is enabled, each run is also queued ahead of its fire
+        time by its estimated lead time, so its reports are ready on time.
         """
+        current_tz = get_localzone()
+        heap = self.__build_schedule_heap(dt.datetime.now(current_tz))
+        clock = (time.time(), time.monotonic())
+        was_leader = False
         while not self.stop_event.is_set():
             try:
-                last_run_time = dt.datetime.now()
-                for job_cron, jobs in self.jobs.items():
-                    if pycron.is_now(job_cron):
-                        try:
-                            self.__job_queue.put(jobs, timeout=30)
-                        except Full:
-                            self.__log.critical(
-                                'Job queue full!', exc_info=True)
-                next_run_time = last_run_time + dt.timedelta(minutes=1)
-                time.sleep((next_run_time - dt.datetime.now()).total_seconds())
+                is_leader = self.is_leader()
+                if is_leader and not was_leader:
+                    was_leader = True
+                    self.__take_over(dt.datetime.now(current_tz))
+                was_leader = is_leader
+
+                clock, drift = self.__read_clock(clock)
+                if abs(drift) > self.CLOCK_JUMP_THRESHOLD_S:
+                    self.__log.warning('Wall clock jumped by %.0f seconds', drift)
+                    if drift < 0:
+                        heap = self.__build_schedule_heap(
+                            dt.datetime.now(current_tz))
+                if self.__schedule_changed.is_set():
+                    self.__schedule_changed.clear()
+                    heap = self.__build_schedule_heap(
+                        dt.datetime.now(current_tz),
+                        pending={job_cron: fire_time for fire_time, job_cron in heap})
+
+                if not heap:
+                    self.__schedule_changed.wait(self.MAX_SCHEDULER_SLEEP_S)
+                    continue
+                wake = heap[0][0]
+                if is_leader and self.__prewarm_settings.enabled:
+                    next_prewarm = self.__queue_prewarms(
+                        heap, dt.datetime.now(current_tz))
+                    if next_prewarm is not None:
+                        wake = min(wake, next_prewarm)
+                delay = wake.timestamp() - clock[0]
+                if delay > 0:
+                    # Bounded so that clock jumps are noticed promptly
+                    self.__schedule_changed.wait(
+                        min(delay, self.MAX_SCHEDULER_SLEEP_S))
+                    continue
+
+                cycle, fired, due_jobs = self.__pop_due_jobs(
+                    heap, dt.datetime.now(current_tz))
+                # Followers keep their heap current but leave firing to the leader
+                if due_jobs and is_leader:
+                    self.__journal.record_fire(cycle, fired,
+                                               [job.name for job in due_jobs])
+                    self.__job_queue.put(cycle, due_jobs)
             except Exception:  # pylint: disable=broad-exception-caught
                 self.__log.exception('Scheduler failed!')
                 get_counter(name='scheduler_errors').inc()
 
-
 def main():
     """Main entry point
     """
     parser = argparse.ArgumentParser()
     parser.add_argument('--config', type=Path, required=True)
     parser.add_argument('--debug', action='store_true')
+    parser.add_argument('--timings', action='store_true',
+                        help='Print how long each startup phase took')
 
     args = vars(parser.parse_args())
+    timings = args.pop('timings')
     configure_logging()
 
-    Service(**args).run()
+    with time_startup('service'):
+        service = Service(**args)
+    if timings:
+        print(format_startup_timings(), file=sys.stderr)
+    service.run()
 
 
 if __name__ == '__main__':
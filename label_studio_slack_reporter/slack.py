@@ -0,0 +1,211 @@
+'''Slack Delivery
+'''
+# pylint: disable=import-outside-toplevel
+from __future__ import annotations
+
+import json
+import logging
+import time
+from threading import Lock
+from typing import TYPE_CHECKING, Dict, Optional
+
+from label_studio_slack_reporter.metrics import get_counter, get_summary
+from label_studio_slack_reporter.retry import (PartialDeliveryError,
+                                               parse_retry_after)
+
+if TYPE_CHECKING:
+    from slack_sdk import WebClient
+
+
+class TokenBucket:
+    """Token bucket rate limiter
+
+    Holds up to `burst` tokens and refills at `rate` tokens per second.  Callers
+    reserve a token and sleep outside the lock until it is due, so waiters are
+    served in the order they arrived.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.__rate = rate
+        self.__burst = burst
+        self.__tokens = float(burst)
+        self.__updated = time.monotonic()
+        self.__lock = Lock()
+
+    def configure(self, rate: float, burst: int):
+        """Changes the limits, keeping the tokens already held
+
+        Args:
+            rate (float): Tokens added per second
+            burst (int): Maximum tokens held
+        """
+        with self.__lock:
+            self.__rate = rate
+            self.__burst = burst
+            self.__tokens = min(self.__tokens, float(burst))
+
+    def acquire(self) -> float:
+        """Takes a token, waiting until one is available
+
+        Returns:
+            float: Seconds waited
+        """
+        with self.__lock:
+            now = time.monotonic()
+            self.__tokens = min(float(self.__burst),
+                                self.__tokens + (now - self.__updated) * self.__rate)
+            self.__updated = now
+            self.__tokens -= 1
+            wait = max(0.0, -self.__tokens / self.__rate)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class SlackDelivery:
+    """Delivers reports to Slack for one bot token
+
+    One instance, and so one `WebClient` and connection pool, is shared by all
+    outputs using the same token.  Posts to each channel are paced by a token
+    bucket, and a rate limit response holds every post on the token until its
+    Retry-After has passed.
+
+    Reports are posted in the "blocks" rendering.  Reports of more than
+    `MAX_BLOCKS` sections continue as replies in the thread of the first
+    message, and reports whose text is longer than the output's file threshold
+    are uploaded as a text file instead, which needs the `files:write` scope.  If a reply fails, the
+    thread and the number of messages posted are raised in a
+    `PartialDeliveryError` so that a retry continues the thread.  Each API call gives up
+    after `TIMEOUT_S` seconds.
+    """
+    TIMEOUT_S = 30
+    MAX_BLOCKS = 50
+    MAX_FALLBACK_CHARS = 150
+
+    __instances: Dict[str, SlackDelivery] = {}
+    __instances_lock = Lock()
+
+    def __init__(self, token: str):
+        from slack_sdk import WebClient
+        self.client: WebClient = WebClient(token=token, timeout=self.TIMEOUT_S)
+        self.__buckets: Dict[str, TokenBucket] = {}
+        self.__lock = Lock()
+        self.__blocked_until = 0.0
+        get_counter(
+            name='slack_posts',
+            documentation='Slack API calls made to deliver reports',
+            labelnames=['kind']
+        )
+        self.__wait_timer = get_summary(
+            name='slack_rate_limit_wait',
+            documentation='Time Slack posts wait for the rate limiter',
+            unit='second'
+        )
+        self.__log = logging.getLogger('SlackDelivery')
+
+    @classmethod
+    def get_instance(cls, token: str) -> SlackDelivery:
+        """Retrieves the shared instance for a token
+
+        Args:
+            token (str): Slack bot token
+
+        Returns:
+            SlackDelivery: Delivery engine
+        """
+        with cls.__instances_lock:
+            if token not in cls.__instances:
+                cls.__instances[token] = SlackDelivery(token)
+            return cls.__instances[token]
+
+    def __get_bucket(self, channel: str, rate: float, burst: int) -> TokenBucket:
+        with self.__lock:
+            bucket = self.__buckets.get(channel)
+            if bucket is None:
+                bucket = TokenBucket(rate, burst)
+                self.__buckets[channel] = bucket
+            else:
+                bucket.configure(rate, burst)
+            return bucket
+
+    def __wait(self, bucket: TokenBucket):
+        started = time.monotonic()
+        bucket.acquire()
+        with self.__lock:
+            blocked = self.__blocked_until - time.monotonic()
+        if blocked > 0:
+            time.sleep(blocked)
+        self.__wait_timer.observe(time.monotonic() - started)
+
+    def __call(self, bucket: TokenBucket, kind: str, method, **kwargs):
+        from slack_sdk.errors import SlackApiError
+        self.__wait(bucket)
+        get_counter('slack_posts').labels(kind=kind).inc()
+        try:
+            return method(**kwargs)
+        except SlackApiError as exc:
+            if exc.response is not None and exc.response.status_code == 429:
+                delay = parse_retry_after(exc.response.headers.get('Retry-After'))
+                self.__log.warning('Rate limited for %.0f seconds', delay)
+                with self.__lock:
+                    self.__blocked_until = max(self.__blocked_until,
+                                               time.monotonic() + delay)
+            raise
+
+    def post(self,
+             channel: str,
+             message: str,
+             rate: float = 1,
+             burst: int = 1,
+             file_threshold: Optional[int] = None,
+             thread_ts: Optional[str] = None,
+             posted: int = 0):
+        """Posts a report to a channel
+
+        Args:
+            channel (str): Channel ID
+            message (str): Report, rendered as "blocks"
+            rate (float, optional): Posts per second to this channel. Defaults
+            to 1.
+            burst (int, optional): Posts allowed back to back. Defaults to 1.
+            file_threshold (Optional[int], optional): Upload reports longer
+            than this many characters as a file.  Defaults to never.
+            thread_ts (Optional[str], optional): Thread of an earlier, partial
+            post of this report.  Defaults to a new message.
+            posted (int, optional): Messages of the report already posted to
+            `thread_ts`. Defaults to 0.
+
+        Raises:
+            PartialDeliveryError: A reply failed after the report was started
+        """
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
+        bucket = self.__get_bucket(channel, rate, burst)
+        report = json.loads(message)
+        fallback = report['text'].split('\n', 1)[0][:self.MAX_FALLBACK_CHARS]
+        if file_threshold is not None and len(report['text']) > file_threshold:
+            self.__call(bucket, 'file', self.client.files_upload_v2,
+                        channel=channel,
+                        content=report['text'],
+                        filename='report.txt',
+                        title=fallback,
+                        initial_comment=fallback)
+            return
+        chunks = [report['blocks'][start:start + self.MAX_BLOCKS]
+                  for start in range(0, max(len(report['blocks']), 1), self.MAX_BLOCKS)]
+        for chunk in chunks[posted:]:
+            try:
+                response = self.__call(bucket,
+                                       'message' if thread_ts is None else 'reply',
+                                       self.client.chat_postMessage,
+                                       channel=channel,
+                                       text=fallback,
+                                       blocks=chunk or None,
+                                       thread_ts=thread_ts)
+            except Exception as exc:
+                if thread_ts is None:
+                    raise
+                raise PartialDeliveryError({'thread_ts': thread_ts,
+                                            'posted': posted}) from exc
+            if thread_ts is None:
+                thread_ts = response['ts']
+            posted += 1
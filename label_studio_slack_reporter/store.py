@@ -0,0 +1,390 @@
+'''Local Annotation Store
+'''
+from __future__ import annotations
+
+import logging
+import math
+import sqlite3
+import time
+from collections import Counter
+from itertools import count, islice
+from pathlib import Path
+from threading import Lock
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from label_studio_slack_reporter.config import get_data_path
+from label_studio_slack_reporter.sync import (ProjectSyncState, as_dict,
+                                              parse_timestamps)
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS annotations (
+    id INTEGER PRIMARY KEY,
+    project INTEGER NOT NULL,
+    task INTEGER NOT NULL,
+    user INTEGER,
+    created_at REAL NOT NULL,
+    lead_time REAL
+);
+CREATE INDEX IF NOT EXISTS annotations_project_created
+    ON annotations (project, created_at);
+CREATE INDEX IF NOT EXISTS annotations_project_user_created
+    ON annotations (project, user, created_at);
+CREATE INDEX IF NOT EXISTS annotations_project_task
+    ON annotations (project, task);
+CREATE TABLE IF NOT EXISTS projects (
+    id INTEGER PRIMARY KEY,
+    synced_at REAL NOT NULL,
+    watermark TEXT
+);
+CREATE TABLE IF NOT EXISTS daily_counts (
+    project INTEGER NOT NULL,
+    user INTEGER NOT NULL,
+    day INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (project, day, user)
+);
+CREATE TABLE IF NOT EXISTS rollups (
+    project INTEGER PRIMARY KEY
+);
+'''
+
+STAGING_SCHEMA = '''
+CREATE TEMP TABLE IF NOT EXISTS staged_annotations (
+    stage INTEGER NOT NULL,
+    id INTEGER NOT NULL,
+    project INTEGER NOT NULL,
+    task INTEGER NOT NULL,
+    user INTEGER,
+    created_at REAL NOT NULL,
+    lead_time REAL
+);
+CREATE INDEX IF NOT EXISTS temp.staged_annotations_stage
+    ON staged_annotations (stage);
+'''
+
+SECONDS_PER_DAY = 24 * 60 * 60
+NO_USER = -1
+
+
+def _user_id(completed_by) -> Optional[int]:
+    if isinstance(completed_by, dict):
+        return completed_by.get('id')
+    return completed_by
+
+
+class AnnotationStore:
+    """SQLite backed store holding one row per annotation
+
+    Counts, per-user totals and time-window queries are answered from indexes,
+    so historical windows do not require a new export.  Timestamps are stored as
+    UTC epoch seconds.
+
+    Per-project, per-user, per-UTC-day annotation counts are maintained
+    alongside the annotations, so window queries cost O(users x days) plus an
+    indexed scan of at most the two partial days at the window edges.
+
+    The incremental sync high-water mark of each project is stored with the
+    annotations it covers, and committed in the same transaction.
+
+    The database uses WAL, which does not work across hosts, so `path` must be
+    on host-local storage.  Replicas each keep their own store.
+    """
+    BATCH_SIZE = 1000
+
+    def __init__(self, path: Optional[Path] = None):
+        if path is None:
+            path = get_data_path().joinpath('annotations.sqlite3')
+        self.path = path
+        self.__lock = Lock()
+        self.__rolled_up: Set[int] = set()
+        self.__stages = count()
+        self.__log = logging.getLogger('AnnotationStore')
+        try:
+            self.__conn = self.__connect()
+        except sqlite3.DatabaseError as exc:
+            self.__log.warning('Discarding corrupt annotation store %s: %s',
+                               path, exc)
+            path.replace(path.with_suffix('.corrupt'))
+            self.__conn = self.__connect()
+
+    def __connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.executescript(SCHEMA)
+        conn.executescript(STAGING_SCHEMA)
+        columns = [row[1] for row in conn.execute('PRAGMA table_info(projects)')]
+        if 'watermark' not in columns:
+            conn.execute('ALTER TABLE projects ADD COLUMN watermark TEXT')
+        return conn
+
+    @classmethod
+    def __batches(cls, tasks: Iterable[Dict]) -> Iterator[List[Dict]]:
+        tasks = iter(tasks)
+        while batch := [as_dict(task) for task in islice(tasks, cls.BATCH_SIZE)]:
+            yield batch
+
+    @staticmethod
+    def __rows(project_id: int, batch: List[Dict]) -> List[Tuple]:
+        annotations = [(int(task['id']), as_dict(annotation))
+                       for task in batch
+                       for annotation in task.get('annotations') or []]
+        created_at = parse_timestamps([annotation['created_at']
+                                       for _, annotation in annotations])
+        return [(annotation['id'],
+                 project_id,
+                 task_id,
+                 _user_id(annotation.get('completed_by')),
+                 float(timestamp),
+                 annotation.get('lead_time'))
+                for (task_id, annotation), timestamp in zip(annotations,
+                                                            created_at)]
+
+    def __add_rollups(self, project_id: int, rows: List[Tuple]):
+        deltas = Counter((NO_USER if row[3] is None else row[3],
+                          int(row[4] // SECONDS_PER_DAY))
+                         for row in rows)
+        self.__conn.executemany(
+            'INSERT INTO daily_counts VALUES (?, ?, ?, ?) '
+            'ON CONFLICT (project, day, user) '
+            'DO UPDATE SET count = count + excluded.count',
+            [(project_id, user, day, n_annotations)
+             for (user, day), n_annotations in deltas.items()])
+
+    def __remove_rollups(self, project_id: int, task_ids: List[int]):
+        placeholders = ', '.join('?' * len(task_ids))
+        deltas = self.__conn.execute(
+            f'SELECT IFNULL(user, {NO_USER}), '
+            f'CAST(created_at / {SECONDS_PER_DAY} AS INTEGER), COUNT(*) '
+            'FROM annotations '
+            f'WHERE project = ? AND task IN ({placeholders}) '
+            'GROUP BY 1, 2', [project_id, *task_ids]).fetchall()
+        self.__conn.executemany(
+            'UPDATE daily_counts SET count = count - ? '
+            'WHERE project = ? AND user = ? AND day = ?',
+            [(n_annotations, project_id, user, day)
+             for user, day, n_annotations in deltas])
+        self.__conn.execute(
+            'DELETE FROM daily_counts WHERE project = ? AND count <= 0',
+            (project_id,))
+
+    def __ensure_rollups(self, project_id: int):
+        if project_id in self.__rolled_up:
+            return
+        built = self.__conn.execute('SELECT 1 FROM rollups WHERE project = ?',
+                                    (project_id,)).fetchone()
+        if built is None:
+            self.__log.info('Rebuilding daily rollups for Project %s',
+                            project_id)
+            with self.__conn:
+                self.__rebuild_rollups(project_id)
+        self.__rolled_up.add(project_id)
+
+    def __rebuild_rollups(self, project_id: int):
+        self.__conn.execute(
+            'DELETE FROM daily_counts WHERE project = ?', (project_id,))
+        self.__conn.execute(
+            'INSERT INTO daily_counts '
+            f'SELECT project, IFNULL(user, {NO_USER}), '
+            f'CAST(created_at / {SECONDS_PER_DAY} AS INTEGER), COUNT(*) '
+            'FROM annotations WHERE project = ? GROUP BY 2, 3',
+            (project_id,))
+        self.__conn.execute('INSERT OR IGNORE INTO rollups VALUES (?)',
+                            (project_id,))
+
+    def replace_project(self,
+                        project_id: int,
+                        tasks: Iterable[Dict],
+                        state: Optional[ProjectSyncState] = None):
+        """Replaces every annotation of a project
+
+        The export is fetched and parsed outside the store lock, and staged in
+        a temporary table one batch at a time.  The project is then swapped in
+        a single transaction, so readers never see a partial export.
+
+        Args:
+            project_id (int): Project ID
+            tasks (Iterable[Dict]): Full project export
+            state (Optional[ProjectSyncState], optional): Sync state tracking
+            `tasks`, whose high-water mark is stored once the export is
+            loaded.  Defaults to storing no high-water mark.
+        """
+        stage = next(self.__stages)
+        try:
+            for batch in self.__batches(tasks):
+                rows = self.__rows(project_id, batch)
+                with self.__lock, self.__conn:
+                    self.__conn.executemany(
+                        'INSERT INTO staged_annotations VALUES (?, ?, ?, ?, ?, ?, ?)',
+                        [(stage, *row) for row in rows])
+            with self.__lock, self.__conn:
+                self.__conn.execute('DELETE FROM annotations WHERE project = ?',
+                                    (project_id,))
+                self.__conn.execute(
+                    'INSERT OR REPLACE INTO annotations '
+                    'SELECT id, project, task, user, created_at, lead_time '
+                    'FROM staged_annotations WHERE stage = ?', (stage,))
+                self.__rebuild_rollups(project_id)
+                self.__conn.execute(
+                    'INSERT OR REPLACE INTO projects VALUES (?, ?, ?)',
+                    (project_id, time.time(),
+                     state.watermark if state is not None else None))
+                self.__rolled_up.add(project_id)
+        finally:
+            with self.__lock, self.__conn:
+                self.__conn.execute('DELETE FROM staged_annotations WHERE stage = ?',
+                                    (stage,))
+
+    def upsert_tasks(self,
+                     project_id: int,
+                     tasks: Iterable[Dict],
+                     state: ProjectSyncState):
+        """Replaces the annotations of the given tasks
+
+        Each batch is committed on its own.  The high-water mark is stored once
+        every batch is committed, as tasks do not arrive in timestamp order.
+
+        Args:
+            project_id (int): Project ID
+            tasks (Iterable[Dict]): New or changed tasks
+            state (ProjectSyncState): Sync state tracking `tasks`, whose
+            high-water mark is stored with the annotations
+        """
+        with self.__lock:
+            self.__ensure_rollups(project_id)
+        for batch in self.__batches(tasks):
+            batch = list({int(task['id']): task for task in batch}.values())
+            task_ids = [int(task['id']) for task in batch]
+            rows = self.__rows(project_id, batch)
+            with self.__lock, self.__conn:
+                self.__remove_rollups(project_id, task_ids)
+                self.__conn.executemany(
+                    'DELETE FROM annotations WHERE project = ? AND task = ?',
+                    [(project_id, task_id) for task_id in task_ids])
+                self.__conn.executemany(
+                    'INSERT OR REPLACE INTO annotations VALUES (?, ?, ?, ?, ?, ?)',
+                    rows)
+                self.__add_rollups(project_id, rows)
+        with self.__lock, self.__conn:
+            self.__conn.execute(
+                'UPDATE projects SET synced_at = ?, watermark = ? WHERE id = ?',
+                (time.time(), state.watermark, project_id))
+
+    def get_watermark(self, project_id: int) -> Optional[str]:
+        """Retrieves the incremental sync high-water mark of a project
+
+        Args:
+            project_id (int): Project ID
+
+        Returns:
+            Optional[str]: ISO 8601 high-water mark, or None if the project has
+            not been loaded from a full export tracking one
+        """
+        with self.__lock:
+            row = self.__conn.execute(
+                'SELECT watermark FROM projects WHERE id = ?',
+                (project_id,)).fetchone()
+        return row[0] if row is not None else None
+
+    def has_project(self, project_id: int) -> bool:
+        """Checks whether the store holds a full copy of the project
+
+        Args:
+            project_id (int): Project ID
+
+        Returns:
+            bool: True if the project has been loaded from a full export
+        """
+        with self.__lock:
+            row = self.__conn.execute(
+                'SELECT 1 FROM projects WHERE id = ?',
+                (project_id,)).fetchone()
+        return row is not None
+
+    def __count_raw(self,
+                    project_id: int,
+                    since: Optional[float],
+                    until: Optional[float]) -> Iterable[Tuple[int, int]]:
+        clause = 'project = ?'
+        params: List = [project_id]
+        if since is not None:
+            clause += ' AND created_at >= ?'
+            params.append(since)
+        if until is not None:
+            clause += ' AND created_at < ?'
+            params.append(until)
+        return self.__conn.execute(
+            f'SELECT IFNULL(user, {NO_USER}), COUNT(*) FROM annotations '
+            f'WHERE {clause} GROUP BY 1', params).fetchall()
+
+    def __count_days(self,
+                     project_id: int,
+                     first_day: Optional[int],
+                     end_day: Optional[int]) -> Iterable[Tuple[int, int]]:
+        clause = 'project = ?'
+        params: List = [project_id]
+        if first_day is not None:
+            clause += ' AND day >= ?'
+            params.append(first_day)
+        if end_day is not None:
+            clause += ' AND day < ?'
+            params.append(end_day)
+        return self.__conn.execute(
+            f'SELECT user, SUM(count) FROM daily_counts WHERE {clause} '
+            'GROUP BY user', params).fetchall()
+
+    def count(self,
+              project_id: int,
+              since: Optional[float] = None,
+              until: Optional[float] = None) -> int:
+        """Counts the annotations of a project created within a window
+
+        Args:
+            project_id (int): Project ID
+            since (Optional[float], optional): Inclusive window start, in epoch
+            seconds.  Defaults to all time.
+            until (Optional[float], optional): Exclusive window end, in epoch
+            seconds.  Defaults to now.
+
+        Returns:
+            int: Number of annotations
+        """
+        return sum(self.count_by_user(project_id, since, until).values())
+
+    def count_by_user(self,
+                      project_id: int,
+                      since: Optional[float] = None,
+                      until: Optional[float] = None) -> Dict[Optional[int], int]:
+        """Counts the annotations of a project per user within a window
+
+        Whole UTC days inside the window are read from the daily rollups, and
+        only the partial days at the window edges are counted from the
+        annotations index.
+
+        Args:
+            project_id (int): Project ID
+            since (Optional[float], optional): Inclusive window start, in epoch
+            seconds.  Defaults to all time.
+            until (Optional[float], optional): Exclusive window end, in epoch
+            seconds.  Defaults to now.
+
+        Returns:
+            Dict[Optional[int], int]: Number of annotations per user id
+        """
+        first_day = None if since is None else math.ceil(since / SECONDS_PER_DAY)
+        end_day = None if until is None else math.floor(until / SECONDS_PER_DAY)
+        counts: Counter = Counter()
+        with self.__lock:
+            self.__ensure_rollups(project_id)
+            if first_day is not None and end_day is not None and first_day >= end_day:
+                counts.update(dict(self.__count_raw(project_id, since, until)))
+            else:
+                counts.update(dict(self.__count_days(
+                    project_id, first_day, end_day)))
+                if since is not None and since < first_day * SECONDS_PER_DAY:
+                    counts.update(dict(self.__count_raw(
+                        project_id, since, first_day * SECONDS_PER_DAY)))
+                if until is not None and end_day * SECONDS_PER_DAY < until:
+                    counts.update(dict(self.__count_raw(
+                        project_id, end_day * SECONDS_PER_DAY, until)))
+        return {(None if user == NO_USER else user): n_annotations
+                for user, n_annotations in counts.items() if n_annotations > 0}
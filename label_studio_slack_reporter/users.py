@@ -0,0 +1,109 @@
+'''Label Studio User Directory
+'''
+from __future__ import annotations
+
+import logging
+import time
+from threading import Lock
+from typing import TYPE_CHECKING, Dict, Iterable, Optional, Tuple
+
+if TYPE_CHECKING:
+    from label_studio_sdk.client import LabelStudio
+    from label_studio_sdk.types import BaseUser
+
+
+class UserDirectory:
+    """TTL cached directory of Label Studio users, indexed by user id
+
+    The directory is shared by every project report.  It is refreshed when
+    older than `ttl` seconds, or on demand when an unknown user id is looked
+    up, at most once every `min_refresh_interval` seconds.
+    """
+
+    def __init__(self,
+                 client: LabelStudio,
+                 ttl: float = 3600,
+                 min_refresh_interval: float = 60):
+        self.__client = client
+        self.__ttl = ttl
+        self.__min_refresh_interval = min_refresh_interval
+        # Time of the last refresh and the users it loaded, replaced together
+        self.__loaded: Tuple[Optional[float], Dict[int, BaseUser]] = (None, {})
+        self.__refresh_lock = Lock()
+        self.__log = logging.getLogger('UserDirectory')
+
+    def refresh(self):
+        """Reloads the user list from Label Studio
+        """
+        self.load(self.__client.users.list())
+
+    def load(self, user_list: Iterable[BaseUser]):
+        """Replaces the directory with an already retrieved user list
+
+        Args:
+            user_list (Iterable[BaseUser]): Users
+        """
+        users = {user.id: user for user in user_list}
+        self.__loaded = (time.monotonic(), users)
+        self.__log.debug('Loaded %d users', len(users))
+
+    @property
+    def ttl(self) -> float:
+        """Maximum age of the directory in seconds
+        """
+        return self.__ttl
+
+    @ttl.setter
+    def ttl(self, ttl: float):
+        self.__ttl = ttl
+
+    @property
+    def is_stale(self) -> bool:
+        """True if the directory is older than its TTL
+        """
+        return self.__age() >= self.__ttl
+
+    def __age(self) -> float:
+        last_refresh, _ = self.__loaded
+        if last_refresh is None:
+            return float('inf')
+        return time.monotonic() - last_refresh
+
+    def __refresh_if_older(self, max_age: float):
+        with self.__refresh_lock:
+            if self.__age() >= max_age:
+                self.refresh()
+
+    def get(self, user_id: int) -> Optional[BaseUser]:
+        """Looks up a user, refreshing the directory if the id is unknown
+
+        Args:
+            user_id (int): User ID
+
+        Returns:
+            Optional[BaseUser]: User, or None if Label Studio does not know the
+            user
+        """
+        self.__refresh_if_older(self.__ttl)
+        user = self.__loaded[1].get(user_id)
+        if user is None:
+            self.__log.info('Unknown user %s, refreshing', user_id)
+            self.__refresh_if_older(self.__min_refresh_interval)
+            user = self.__loaded[1].get(user_id)
+        return user
+
+    def resolve(self, user_ids: Iterable[int]) -> Dict[int, BaseUser]:
+        """Looks up several users
+
+        Args:
+            user_ids (Iterable[int]): User IDs
+
+        Returns:
+            Dict[int, BaseUser]: Known users, indexed by id
+        """
+        resolved = {}
+        for user_id in user_ids:
+            user = self.get(user_id)
+            if user is not None:
+                resolved[user_id] = user
+        return resolved
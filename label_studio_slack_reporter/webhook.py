@@ -0,0 +1,87 @@
+'''Webhook Output
+'''
+# pylint: disable=import-outside-toplevel
+from __future__ import annotations
+
+import gzip
+import json
+from threading import Lock
+from typing import TYPE_CHECKING, Dict, Optional
+
+from label_studio_slack_reporter.output import AbstractOutput, get_http_retry_delay
+
+if TYPE_CHECKING:
+    import httpx
+
+
+class WebhookOutput(AbstractOutput):
+    """Webhook output
+
+    POSTs the report as JSON, `{"job": <output name>, "report": <report>}`, to
+    `url`, optionally gzip compressed.  The report is the structured JSON
+    rendering, or the plain text rendering if `report_format` is "text".
+
+    All webhook outputs share one pooled, keep-alive HTTP session of up to
+    `MAX_CONNECTIONS` connections, so pushing to many endpoints on the same
+    host reuses connections.
+    """
+    # pylint: disable=too-few-public-methods
+    MAX_CONNECTIONS = 16
+
+    __session: Optional[httpx.Client] = None
+    __session_lock = Lock()
+
+    def __init__(self,
+                 schedule: str,
+                 job_name: str,
+                 url: str,
+                 headers: Optional[Dict[str, str]] = None,
+                 gzip: bool = False,
+                 timeout: float = 30,
+                 report_format: str = 'json',
+                 **kwargs):
+        # pylint: disable=too-many-arguments,too-many-positional-arguments,redefined-outer-name
+        super().__init__(schedule, job_name, **kwargs)
+        self.__url = url
+        self.__headers = dict(headers) if headers is not None else {}
+        self.__gzip = gzip
+        self.__timeout = timeout
+        if report_format not in ('json', 'text'):
+            raise ValueError(f'Unsupported webhook report format {report_format}')
+        self.report_format = report_format
+
+    @classmethod
+    def __get_session(cls) -> httpx.Client:
+        with cls.__session_lock:
+            if cls.__session is None:
+                import httpx
+                cls.__session = httpx.Client(
+                    limits=httpx.Limits(max_connections=cls.MAX_CONNECTIONS,
+                                        max_keepalive_connections=cls.MAX_CONNECTIONS)
+                )
+            return cls.__session
+
+    def execute(self, message):
+        if self.report_format == 'json':
+            # Already JSON, so embed it rather than parsing it again
+            report = message
+        else:
+            report = json.dumps(message)
+        body = f'{{"job":{json.dumps(self.name)},"report":{report}}}'.encode()
+        headers = {'Content-Type': 'application/json', **self.__headers}
+        if self.__gzip:
+            body = gzip.compress(body)
+            headers['Content-Encoding'] = 'gzip'
+        response = self.__get_session().post(self.__url,
+                                             content=body,
+                                             headers=headers,
+                                             timeout=self.__timeout)
+        response.raise_for_status()
+
+    def get_retry_delay(self, exc: Exception) -> Optional[float]:
+        import httpx
+        if not isinstance(exc, httpx.HTTPStatusError):
+            # Connection errors and timeouts
+            return 0
+        return get_http_retry_delay(exc.response.status_code,
+                                    exc.response.headers.get('Retry-After'))
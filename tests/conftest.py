@@ -29,10 +29,5 @@ def create_label_studio_fixture(config: Dict) -> Reporter:
     Returns:
         Reporter: Test reporter
     """
-    reporter = Reporter(
-        api_key=config['label_studio']['key'],
-        url=config['label_studio']['url'],
-        projects=config['label_studio']['project_ids'],
-        days=config['label_studio']['report_days'],
-    )
+    reporter = Reporter.from_config(config['label_studio'])
     return reporter
@@ -0,0 +1,73 @@
+"""Tests cron schedules
+"""
+import datetime as dt
+
+import pytest
+
+from label_studio_slack_reporter.cron import CronSchedule
+
+
+@pytest.mark.parametrize('expression, start, expected', [
+    ('0 9 * * *', dt.datetime(2024, 1, 1, 8, 59, 30),
+     dt.datetime(2024, 1, 1, 9, 0)),
+    ('0 9 * * *', dt.datetime(2024, 1, 1, 9, 0),
+     dt.datetime(2024, 1, 2, 9, 0)),
+    ('*/15 * * * *', dt.datetime(2024, 1, 1, 23, 50),
+     dt.datetime(2024, 1, 2, 0, 0)),
+    ('30 8 * * mon-fri', dt.datetime(2024, 1, 5, 9, 0),
+     dt.datetime(2024, 1, 8, 8, 30)),
+    ('0 0 29 2 *', dt.datetime(2024, 3, 1),
+     dt.datetime(2028, 2, 29)),
+])
+def test_next_after(expression: str, start: dt.datetime, expected: dt.datetime):
+    """Tests computing the next fire time
+
+    Args:
+        expression (str): Cron expression
+        start (dt.datetime): Start time
+        expected (dt.datetime): Expected fire time
+    """
+    assert CronSchedule(expression).next_after(start) == expected
+
+
+def test_next_after_matches():
+    """Tests that the next fire time agrees with minute by minute matching
+    """
+    schedule = CronSchedule('5,35 */6 1-7 * 0')
+    start = dt.datetime(2024, 1, 1)
+    fire_time = schedule.next_after(start)
+    candidate = start + dt.timedelta(minutes=1)
+    while not schedule.matches(candidate):
+        candidate += dt.timedelta(minutes=1)
+    assert fire_time == candidate
+
+
+def test_next_after_keeps_timezone():
+    """Tests that fire times are computed on the local wall clock
+    """
+    tz = dt.timezone(dt.timedelta(hours=-8))
+    fire_time = CronSchedule('0 9 * * *').next_after(
+        dt.datetime(2024, 1, 1, 10, 0, tzinfo=tz))
+    assert fire_time == dt.datetime(2024, 1, 2, 9, 0, tzinfo=tz)
+
+
+@pytest.mark.parametrize('expression', [
+    '0 9 * *',
+    '60 * * * *',
+    '*/0 * * * *',
+])
+def test_invalid(expression: str):
+    """Tests rejecting invalid expressions
+
+    Args:
+        expression (str): Cron expression
+    """
+    with pytest.raises(ValueError):
+        CronSchedule(expression)
+
+
+def test_never_fires():
+    """Tests detecting schedules that never fire
+    """
+    with pytest.raises(ValueError):
+        CronSchedule('0 0 30 2 *').next_after(dt.datetime(2024, 1, 1))
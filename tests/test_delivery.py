@@ -0,0 +1,128 @@
+"""Tests the delivery pool
+"""
+from concurrent.futures import wait
+from threading import Event
+from typing import Hashable, List, Optional, Tuple
+
+import pytest
+
+from label_studio_slack_reporter.delivery import DeliveryPool, DeliveryTimeoutError
+from label_studio_slack_reporter.output import AbstractOutput
+
+
+class BlockingOutput(AbstractOutput):
+    """Output that waits for a release before succeeding or failing
+    """
+
+    def __init__(self, name: str, fail: bool = False, key: Optional[Hashable] = None):
+        super().__init__('0 9 * * *', name)
+        self.release = Event()
+        self.release.set()
+        self.fail = fail
+        self.key = key
+        self.sent: List[str] = []
+
+    def execute(self, message):
+        self.release.wait()
+        if self.fail:
+            raise RuntimeError(f'{self.name} failed')
+        self.sent.append(message)
+
+    @property
+    def batch_key(self) -> Optional[Hashable]:
+        return self.key
+
+
+class BatchedOutput(BlockingOutput):
+    """Output recording the batches it was delivered in
+    """
+    batches: List[List[str]] = []
+
+    @classmethod
+    def execute_batch(cls, deliveries: List[Tuple[AbstractOutput, str]]):
+        cls.batches.append([job.name for job, _ in deliveries])
+        return super().execute_batch(deliveries)
+
+
+@pytest.fixture(name='pool')
+def create_pool(monkeypatch: pytest.MonkeyPatch) -> DeliveryPool:
+    """Creates a pool that times deliveries out after half a second
+
+    Args:
+        monkeypatch (pytest.MonkeyPatch): Patches the monitor interval
+
+    Yields:
+        DeliveryPool: Started pool
+    """
+    monkeypatch.setattr(DeliveryPool, 'MONITOR_INTERVAL_S', 0.05)
+    pool = DeliveryPool(workers=4, timeout=0.5)
+    pool.start()
+    yield pool
+    pool.shutdown()
+
+
+def test_results(pool: DeliveryPool):
+    """Tests that futures resolve in submission order with each delivery's outcome
+    """
+    good, bad = BlockingOutput('good'), BlockingOutput('bad', fail=True)
+    futures = pool.submit_all([(good, 'a'), (bad, 'b')])
+    wait(futures, timeout=5)
+    assert futures[0].result() is None
+    assert isinstance(futures[1].exception(), RuntimeError)
+    assert good.sent == ['a']
+
+
+def test_batching():
+    """Tests that outputs sharing a batch key are executed together and others alone
+    """
+    BatchedOutput.batches = []
+    jobs = [BatchedOutput('a', key='team'), BatchedOutput('b', key='team'),
+            BatchedOutput('c', key='other'), BatchedOutput('d'),
+            BatchedOutput('e', fail=True, key='team')]
+    pool = DeliveryPool(workers=4, timeout=None)
+    futures = pool.submit_all([(job, job.name) for job in jobs])
+    wait(futures, timeout=5)
+    pool.shutdown()
+    assert BatchedOutput.batches == [['a', 'b', 'e']]
+    assert [future.exception() is None for future in futures] == \
+        [True, True, True, True, False]
+
+
+def test_timeout(pool: DeliveryPool):
+    """Tests that an overrunning delivery fails without holding up the others
+    """
+    slow, fast = BlockingOutput('slow'), BlockingOutput('fast')
+    slow.release.clear()
+    try:
+        futures = pool.submit_all([(slow, 'a'), (fast, 'b')])
+        assert futures[1].result(timeout=5) is None
+        assert isinstance(futures[0].exception(timeout=5), DeliveryTimeoutError)
+    finally:
+        slow.release.set()
+
+
+def test_late_success(pool: DeliveryPool):
+    """Tests that a delivery succeeding after its timeout is reported after the failure
+    """
+    slow, failing = BlockingOutput('slow'), BlockingOutput('failing', fail=True)
+    slow.release.clear()
+    failing.release.clear()
+    events = []
+    late = Event()
+
+    def on_late_success(job: AbstractOutput):
+        events.append(('late', job.name))
+        late.set()
+
+    futures = pool.submit_all([(slow, 'a'), (failing, 'b')], on_late_success)
+    for future in futures:
+        future.add_done_callback(lambda future: events.append(('failed', future)))
+    wait(futures, timeout=5)
+    assert all(isinstance(future.exception(), DeliveryTimeoutError) for future in futures)
+
+    slow.release.set()
+    failing.release.set()
+    assert late.wait(5)
+    assert slow.sent == ['a']
+    assert [event for event, _ in events] == ['failed', 'failed', 'late']
+    assert events[-1] == ('late', 'slow')
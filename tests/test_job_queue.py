@@ -0,0 +1,85 @@
+"""Tests the coalescing job queue
+"""
+import datetime as dt
+import threading
+from queue import Empty
+
+import pytest
+
+from label_studio_slack_reporter.job_queue import CoalescingJobQueue
+from label_studio_slack_reporter.output import AbstractOutput
+
+CYCLE = dt.datetime(2024, 1, 1, 9, tzinfo=dt.timezone.utc)
+
+
+class NamedOutput(AbstractOutput):
+    """Output that does nothing
+    """
+
+    def __init__(self, name: str):
+        super().__init__('0 9 * * *', name)
+
+    def execute(self, message):
+        pass
+
+
+SLACK = NamedOutput('slack')
+EMAIL = NamedOutput('email')
+
+
+def test_coalesces_same_jobs():
+    """Tests that runs for the same set of outputs merge into the newest cycle
+    """
+    queue = CoalescingJobQueue()
+    queue.put(CYCLE, [SLACK, EMAIL])
+    queue.put(CYCLE + dt.timedelta(hours=1), [EMAIL, SLACK])
+    queue.put(CYCLE - dt.timedelta(hours=1), [SLACK, EMAIL])
+    assert len(queue) == 1
+
+    run = queue.get(timeout=0)
+    assert run.cycle == CYCLE + dt.timedelta(hours=1)
+    assert {job.name for job in run.jobs} == {'slack', 'email'}
+    assert not run.prewarm
+    assert len(queue) == 0
+
+
+def test_keeps_distinct_job_sets():
+    """Tests that different output sets and pre-warming runs stay separate, in FIFO order
+    """
+    queue = CoalescingJobQueue()
+    queue.put(CYCLE, [SLACK])
+    queue.put(CYCLE, [SLACK, EMAIL])
+    queue.put(CYCLE, [SLACK], prewarm=True)
+    queue.put(CYCLE + dt.timedelta(hours=1), [SLACK])
+    assert len(queue) == 3
+
+    runs = [queue.get(timeout=0) for _ in range(3)]
+    assert [(run.cycle, [job.name for job in run.jobs], run.prewarm) for run in runs] == [
+        (CYCLE + dt.timedelta(hours=1), ['slack'], False),
+        (CYCLE, ['slack', 'email'], False),
+        (CYCLE, ['slack'], True),
+    ]
+
+
+def test_requeue_after_get():
+    """Tests that a run queued after the pending run was taken is not merged into it
+    """
+    queue = CoalescingJobQueue()
+    queue.put(CYCLE, [SLACK])
+    first = queue.get(timeout=0)
+    queue.put(CYCLE + dt.timedelta(hours=1), [SLACK])
+    assert first.cycle == CYCLE
+    assert queue.get(timeout=0).cycle == CYCLE + dt.timedelta(hours=1)
+
+
+def test_get_timeout():
+    """Tests that get waits for a producer and gives up after its timeout
+    """
+    queue = CoalescingJobQueue()
+    with pytest.raises(Empty):
+        queue.get(timeout=0.05)
+
+    timer = threading.Timer(0.05, queue.put, args=(CYCLE, [EMAIL]))
+    timer.start()
+    assert queue.get(timeout=5).jobs == [EMAIL]
+    timer.join()
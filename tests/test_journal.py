@@ -0,0 +1,110 @@
+"""Tests the job journal
+"""
+import datetime as dt
+import json
+from pathlib import Path
+
+import pytest
+
+from label_studio_slack_reporter.journal import JobJournal
+
+NOW = dt.datetime.now(dt.timezone.utc).replace(microsecond=0)
+
+
+@pytest.fixture(name='journal_path')
+def create_journal_path(tmp_path: Path) -> Path:
+    """Creates a journal path in a temporary directory
+
+    Args:
+        tmp_path (Path): Temporary directory
+
+    Returns:
+        Path: Journal path
+    """
+    return tmp_path.joinpath('journal.jsonl')
+
+
+def write_journal(path: Path) -> JobJournal:
+    """Records a stale run, a delivered run and an unfinished run
+
+    Args:
+        path (Path): Journal path
+
+    Returns:
+        JobJournal: Stopped journal
+    """
+    journal = JobJournal(path, grace=3600)
+    journal.start()
+    journal.record_fire(NOW - dt.timedelta(hours=3), ['0 * * * *'], ['slack'])
+    journal.record_fire(NOW - dt.timedelta(minutes=30), ['*/30 * * * *'], ['slack', 'email'])
+    journal.record_delivery('slack', NOW - dt.timedelta(minutes=30))
+    journal.record_fire(NOW, ['*/30 * * * *'], ['slack', 'email'])
+    journal.shutdown()
+    return journal
+
+
+def test_replay(journal_path: Path):
+    """Tests that a restarted journal knows what ran and what was delivered
+    """
+    write_journal(journal_path)
+    with open(journal_path, 'a', encoding='utf-8') as handle:
+        handle.write('{"type": "deliv')
+
+    journal = JobJournal(journal_path, grace=3600)
+    assert journal.get_last_fire('0 * * * *') == NOW - dt.timedelta(hours=3)
+    assert journal.get_last_fire('*/30 * * * *') == NOW
+    assert journal.get_last_fire('*/5 * * * *') is None
+    unfinished = journal.get_unfinished(NOW)
+    assert [(fire.cycle, fire.jobs) for fire in unfinished] == [
+        (NOW - dt.timedelta(minutes=30), ['email']),
+        (NOW, ['slack', 'email']),
+    ]
+
+
+def test_is_delivered(journal_path: Path):
+    """Tests that a delivery covers its cycle and earlier cycles only
+    """
+    journal = write_journal(journal_path)
+    cycle = NOW - dt.timedelta(minutes=30)
+    assert journal.is_delivered('slack', cycle)
+    assert journal.is_delivered('slack', cycle - dt.timedelta(days=1))
+    assert not journal.is_delivered('slack', NOW)
+    assert not journal.is_delivered('email', cycle)
+
+
+def test_compaction_on_reload(journal_path: Path):
+    """Tests that reloading drops runs outside the grace window
+    """
+    write_journal(journal_path)
+    journal = JobJournal(journal_path, grace=3600)
+    journal.reload()
+    records = journal_path.read_text(encoding='utf-8').splitlines()
+    stale = (NOW - dt.timedelta(hours=3)).isoformat()
+    assert not any(record['jobs'] for record in map(json.loads, records)
+                   if record['cycle'] == stale)
+    journal.reload()
+    assert sorted(journal_path.read_text(encoding='utf-8').splitlines()) == sorted(records)
+    assert journal.get_last_fire('0 * * * *') == NOW - dt.timedelta(hours=3)
+    assert journal.is_delivered('slack', NOW - dt.timedelta(minutes=30))
+    assert len(journal.get_unfinished(NOW)) == 2
+
+    replayed = JobJournal(journal_path, grace=3600)
+    assert replayed.get_last_fire('0 * * * *') == NOW - dt.timedelta(hours=3)
+    assert replayed.get_last_fire('*/30 * * * *') == NOW
+    assert replayed.is_delivered('slack', NOW - dt.timedelta(minutes=30))
+    assert [fire.jobs for fire in replayed.get_unfinished(NOW)] == \
+        [['email'], ['slack', 'email']]
+
+
+def test_compaction_on_growth(journal_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """Tests that the writer compacts the journal once it grows past the threshold
+    """
+    monkeypatch.setattr(JobJournal, 'COMPACT_THRESHOLD', 10)
+    journal = JobJournal(journal_path, grace=3600)
+    journal.start()
+    for minutes in range(50):
+        journal.record_delivery('slack', NOW - dt.timedelta(minutes=minutes))
+    journal.shutdown()
+
+    assert len(journal_path.read_text(encoding='utf-8').splitlines()) <= 10
+    assert JobJournal(journal_path, grace=3600).is_delivered('slack', NOW)
@@ -0,0 +1,80 @@
+"""Tests leader election through the lease table
+"""
+import time
+from pathlib import Path
+from threading import Event
+from typing import List
+
+import pytest
+
+from label_studio_slack_reporter.leader import LeaderLease
+
+TTL = 0.5
+
+
+@pytest.fixture(name='lease_path')
+def create_lease_path(tmp_path: Path) -> Path:
+    """Creates the path of a lease database shared by the replicas
+
+    Args:
+        tmp_path (Path): Temporary directory
+
+    Returns:
+        Path: Lease database path
+    """
+    return tmp_path.joinpath('leader.sqlite3')
+
+
+def test_acquire(lease_path: Path):
+    """Tests that only one replica holds the lease
+    """
+    leader, standby = LeaderLease(lease_path, ttl=TTL), LeaderLease(lease_path, ttl=TTL)
+    assert not leader.is_leader
+    assert leader.try_acquire()
+    assert leader.is_leader
+    assert not standby.try_acquire()
+    assert not standby.is_leader
+
+
+def test_renew(lease_path: Path):
+    """Tests that a renewed lease is not taken over
+    """
+    leader, standby = LeaderLease(lease_path, ttl=TTL), LeaderLease(lease_path, ttl=TTL)
+    assert leader.try_acquire()
+    for _ in range(3):
+        time.sleep(TTL / 2)
+        assert leader.try_acquire()
+        assert not standby.try_acquire()
+    assert leader.is_leader
+
+
+def test_takeover_after_expiry(lease_path: Path):
+    """Tests that a standby takes over a lease that was not renewed
+    """
+    leader, standby = LeaderLease(lease_path, ttl=TTL), LeaderLease(lease_path, ttl=TTL)
+    assert leader.try_acquire()
+    time.sleep(TTL * 1.5)
+    assert not leader.is_leader
+    assert standby.try_acquire()
+    assert standby.is_leader
+    assert not leader.try_acquire()
+    assert not leader.is_leader
+
+
+def test_release_on_shutdown(lease_path: Path):
+    """Tests that a replica that shuts down hands the lease over immediately
+    """
+    changes: List[bool] = []
+    acquired = Event()
+
+    def on_change(is_leader: bool):
+        changes.append(is_leader)
+        acquired.set()
+
+    leader = LeaderLease(lease_path, ttl=TTL, on_change=on_change)
+    leader.start()
+    assert acquired.wait(5)
+    leader.shutdown()
+    assert changes == [True, False]
+    assert not leader.is_leader
+    assert LeaderLease(lease_path, ttl=TTL).try_acquire()
@@ -0,0 +1,152 @@
+"""Tests the delivery outbox
+"""
+import datetime as dt
+import sqlite3
+import time
+from pathlib import Path
+from threading import Event
+from typing import Any, Dict, List, Optional
+
+import pytest
+
+from label_studio_slack_reporter.outbox import Outbox
+from label_studio_slack_reporter.output import AbstractOutput
+from label_studio_slack_reporter.retry import PartialDeliveryError
+
+CYCLE = dt.datetime(2024, 1, 1, 9, tzinfo=dt.timezone.utc)
+
+
+class RecordingOutput(AbstractOutput):
+    """Output recording what it was sent
+    """
+
+    def __init__(self, retry_delay: Optional[float] = 0):
+        super().__init__('0 9 * * *', 'recording')
+        self.retry_delay = retry_delay
+        self.sent: List[str] = []
+        self.resumed: List[Dict[str, Any]] = []
+        self.delivered = Event()
+
+    def execute(self, message):
+        self.sent.append(message)
+        self.delivered.set()
+
+    def resume(self, message, progress):
+        self.resumed.append(progress)
+        self.execute(message)
+
+    def get_retry_delay(self, exc):
+        return self.retry_delay
+
+
+def get_next_attempts(outbox: Outbox) -> List[float]:
+    """Reads the scheduled retry times
+
+    Args:
+        outbox (Outbox): Outbox
+
+    Returns:
+        List[float]: Next attempt of each pending delivery, in epoch seconds
+    """
+    with sqlite3.connect(outbox.path) as conn:
+        return [next_attempt for next_attempt,
+                in conn.execute('SELECT next_attempt FROM outbox ORDER BY id')]
+
+
+def test_backoff(tmp_path: Path):
+    """Tests that the jittered backoff doubles up to the maximum delay
+    """
+    outbox = Outbox(lambda _: None, path=tmp_path.joinpath('outbox.sqlite3'),
+                    base_delay=10, max_delay=100)
+    for attempts, delay in [(1, 10), (2, 20), (3, 40), (4, 80), (5, 100), (9, 100)]:
+        for _ in range(20):
+            assert delay / 2 <= outbox.get_backoff(attempts) <= delay
+
+
+def test_retry_delay_floor(tmp_path: Path):
+    """Tests that a retry waits at least as long as the output asks
+    """
+    outbox = Outbox(lambda _: None, path=tmp_path.joinpath('outbox.sqlite3'),
+                    base_delay=10, max_delay=100)
+    outbox.add(RecordingOutput(retry_delay=0), 'a', CYCLE, RuntimeError())
+    outbox.add(RecordingOutput(retry_delay=600), 'b', CYCLE, RuntimeError())
+    now = time.time()
+    backoff, requested = get_next_attempts(outbox)
+    assert now + 4 <= backoff <= now + 10
+    assert requested >= now + 599
+
+
+def test_not_retried(tmp_path: Path):
+    """Tests that deliveries the output cannot retry are dropped
+    """
+    outbox = Outbox(lambda _: None, path=tmp_path.joinpath('outbox.sqlite3'))
+    outbox.add(RecordingOutput(retry_delay=None), 'a', CYCLE, RuntimeError())
+    assert not outbox.has_pending('recording', CYCLE)
+    assert not get_next_attempts(outbox)
+
+
+def test_supersede(tmp_path: Path):
+    """Tests that a delivered report drops only its own and older pending reports
+    """
+    outbox = Outbox(lambda _: None, path=tmp_path.joinpath('outbox.sqlite3'))
+    job = RecordingOutput()
+    later = CYCLE + dt.timedelta(days=1)
+    outbox.add(job, 'first', CYCLE, RuntimeError())
+    outbox.add(job, 'second', later, RuntimeError())
+
+    outbox.supersede('recording', CYCLE - dt.timedelta(hours=1))
+    assert len(get_next_attempts(outbox)) == 2
+    outbox.supersede('recording', CYCLE)
+    assert len(get_next_attempts(outbox)) == 1
+    assert outbox.has_pending('recording', CYCLE)
+    assert outbox.has_pending('recording', later)
+    assert not outbox.has_pending('recording', later + dt.timedelta(days=1))
+    outbox.supersede('other', later)
+    assert len(get_next_attempts(outbox)) == 1
+    outbox.supersede('recording', later)
+    assert not get_next_attempts(outbox)
+
+
+def test_can_send(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """Tests that retries are held while sending is not allowed
+    """
+    monkeypatch.setattr(Outbox, 'PAUSE_S', 0.05)
+    job = RecordingOutput()
+    can_send = Event()
+    delivered = []
+    outbox = Outbox(lambda name: job if name == job.name else None,
+                    on_delivered=lambda name, cycle: delivered.append((name, cycle)),
+                    can_send=can_send.is_set,
+                    path=tmp_path.joinpath('outbox.sqlite3'),
+                    base_delay=0.01)
+    outbox.add(job, 'report', CYCLE, RuntimeError())
+    outbox.start()
+    try:
+        assert not job.delivered.wait(0.5)
+        can_send.set()
+        assert job.delivered.wait(5)
+    finally:
+        outbox.shutdown()
+    assert job.sent == ['report']
+    assert not job.resumed
+    assert delivered == [('recording', CYCLE)]
+    assert not outbox.has_pending('recording', CYCLE)
+
+
+def test_resume_partial_delivery(tmp_path: Path):
+    """Tests that a partial delivery is retried from where it stopped
+    """
+    job = RecordingOutput()
+    outbox = Outbox(lambda _: job, path=tmp_path.joinpath('outbox.sqlite3'),
+                    base_delay=0.01)
+    progress = {'thread_ts': '1.0', 'posted': 2}
+    try:
+        raise PartialDeliveryError(progress) from RuntimeError('rate limited')
+    except PartialDeliveryError as exc:
+        outbox.add(job, 'report', CYCLE, exc)
+    outbox.start()
+    try:
+        assert job.delivered.wait(5)
+    finally:
+        outbox.shutdown()
+    assert job.resumed == [progress]
@@ -0,0 +1,101 @@
+"""Tests report rendering
+"""
+import datetime as dt
+import json
+
+from label_studio_slack_reporter.report import (MAX_SECTION_CHARS,
+                                                ProjectReport, Report,
+                                                ReportRenderer, UserCount,
+                                                render_blocks, render_json,
+                                                render_text)
+
+PROJECT = ProjectReport(project_id=10,
+                        title='Fish',
+                        users=(UserCount(user_id=1, name='a@ucsd.edu', count=5),
+                               UserCount(user_id=7, name='User 7', count=2),
+                               UserCount(user_id=None, name='Unassigned', count=1)),
+                        total=8,
+                        recent=3,
+                        days=1,
+                        eta_days=4.25)
+
+
+def test_render_text():
+    """Tests the plain text rendering
+    """
+    report = Report(projects=(PROJECT, ProjectReport(project_id=11,
+                                                     available=False,
+                                                     timed_out_after=60)))
+    assert render_text(report) == (
+        'Results for Fish\n'
+        'a@ucsd.edu: 5\n'
+        'User 7: 2\n'
+        'Unassigned: 1\n'
+        'Total: 8\n'
+        'Estimated time to completion: 4.2 days\n'
+        '3 annotations were made in the last 24 hours\n'
+        '\n'
+        'Results for project 11 unavailable (timed out after 60 seconds)')
+
+
+def test_render_json():
+    """Tests the JSON rendering
+    """
+    report = Report(projects=(ProjectReport(project_id=12, title='Empty', days=2),),
+                    cycle=dt.datetime(2024, 1, 1, 9, tzinfo=dt.timezone.utc))
+    rendered = json.loads(render_json(report))
+    assert rendered['cycle'] == '2024-01-01T09:00:00+00:00'
+    assert rendered['projects'][0]['eta_days'] is None
+    assert rendered['projects'][0]['window_hours'] == 48
+
+
+def test_render_blocks():
+    """Tests the Slack rendering
+    """
+    report = Report(projects=(PROJECT, ProjectReport(project_id=11,
+                                                     available=False,
+                                                     timed_out_after=60)))
+    rendered = json.loads(render_blocks(report))
+    assert rendered['text'] == render_text(report)
+    assert [block['text']['text'] for block in rendered['blocks']] == \
+        render_text(report).split('\n\n')
+
+
+def test_render_once_per_cycle():
+    """Tests that equal reports share a rendering
+    """
+    cycle = dt.datetime(2024, 1, 1, 9, tzinfo=dt.timezone.utc)
+    renderer = ReportRenderer()
+    first = renderer.render(Report(projects=(PROJECT,), cycle=cycle), 'text')
+    second = renderer.render(Report(projects=(PROJECT,), cycle=cycle), 'text')
+    assert first is second
+
+
+def test_render_blocks_section_limit():
+    """Tests that long projects are split into sections within Slack's limit
+    """
+    users = tuple(UserCount(user_id=idx, name=f'user{idx}@ucsd.edu', count=idx)
+                  for idx in range(400))
+    report = Report(projects=(ProjectReport(project_id=1, title='Many', users=users),
+                              ProjectReport(project_id=2, title='x' * 7000),
+                              PROJECT))
+    rendered = json.loads(render_blocks(report))
+    sections = [block['text']['text'] for block in rendered['blocks']]
+    assert all(len(section) <= MAX_SECTION_CHARS for section in sections)
+    assert len(sections) > 3
+    assert sections[-1] == render_text(Report(projects=(PROJECT,)))
+    assert '\n'.join(sections).replace('x\nx', 'xx') == render_text(report).replace('\n\n', '\n')
+
+
+def test_render_without_timeout():
+    """Tests that stale and unavailable projects render without a known timeout
+    """
+    stale_as_of = dt.datetime(2024, 1, 1, 9, tzinfo=dt.timezone.utc)
+    report = Report(projects=(
+        ProjectReport(project_id=11, available=False),
+        ProjectReport(project_id=12, title='Old', stale_as_of=stale_as_of),
+    ))
+    lines = render_text(report).split('\n')
+    assert lines[0] == 'Results for project 11 unavailable'
+    assert lines[2] == 'Stale results as of 2024-01-01 09:00 UTC'
+    assert json.loads(render_blocks(report))['text'] == render_text(report)
@@ -0,0 +1,230 @@
+"""Tests the Label Studio reporter against a fake Label Studio
+"""
+import datetime as dt
+import json
+from pathlib import Path
+from threading import Event
+from types import SimpleNamespace
+from typing import Dict, Iterator, List, Type
+
+import pytest
+
+from label_studio_slack_reporter import label_studio
+from label_studio_slack_reporter.label_studio import Reporter
+
+
+class FakeExports:
+    """Export snapshots, which capture the project's tasks when created
+    """
+
+    def __init__(self, server: 'FakeLabelStudio'):
+        self.server = server
+        self.snapshots: List[SimpleNamespace] = []
+
+    def create(self, project_id: int, title: str) -> SimpleNamespace:
+        """Takes a snapshot
+        """
+        snapshot = SimpleNamespace(id=len(self.snapshots) + 1,
+                                   project_id=project_id,
+                                   title=title,
+                                   status='completed',
+                                   created_at=dt.datetime.now(dt.timezone.utc),
+                                   tasks=json.dumps(self.server.tasks[project_id]))
+        self.snapshots.append(snapshot)
+        return snapshot
+
+    def list(self, project_id: int) -> List[SimpleNamespace]:
+        """Lists the project's snapshots
+        """
+        return [snapshot for snapshot in self.snapshots if snapshot.project_id == project_id]
+
+    def get(self, project_id: int, export_pk: int) -> SimpleNamespace:
+        """Retrieves a snapshot
+        """
+        # pylint: disable=unused-argument
+        return self.snapshots[export_pk - 1]
+
+    def download(self, project_id: int, export_pk: int) -> List[bytes]:
+        """Downloads a snapshot
+        """
+        # pylint: disable=unused-argument
+        return [self.snapshots[export_pk - 1].tasks.encode()]
+
+    def delete(self, project_id: int, export_pk: int):
+        """Deleting snapshots is not tracked
+        """
+
+
+class FakeLabelStudio:
+    """Label Studio server holding projects of tasks
+    """
+
+    def __init__(self):
+        self.tasks: Dict[int, List[Dict]] = {}
+        # Projects whose info requests hang until `release` is set
+        self.hung: List[int] = []
+        self.release = Event()
+        self.errors: Dict[int, Type[Exception]] = {}
+        self.projects = SimpleNamespace(get=self.get_project,
+                                        exports=FakeExports(self))
+        self.users = SimpleNamespace(list=lambda: [SimpleNamespace(id=1, email='a@ucsd.edu')])
+
+    def annotate(self, project_id: int, user_id: int):
+        """Adds an annotated task to a project
+        """
+        now = dt.datetime.now(dt.timezone.utc).isoformat()
+        tasks = self.tasks.setdefault(project_id, [])
+        tasks.append({'id': len(tasks) + 1,
+                      'updated_at': now,
+                      'annotations': [{'id': project_id * 1000 + len(tasks) + 1,
+                                       'completed_by': user_id,
+                                       'created_at': now,
+                                       'updated_at': now}]})
+
+    def get_project(self, id: int) -> SimpleNamespace:  # pylint: disable=redefined-builtin
+        """Retrieves the project info, fingerprinted by its task count
+        """
+        if id in self.hung:
+            self.release.wait(5)
+        if id in self.errors:
+            raise self.errors[id]()
+        return SimpleNamespace(id=id,
+                               title=f'Project {id}',
+                               task_number=len(self.tasks[id]),
+                               total_annotations_number=len(self.tasks[id]))
+
+
+@pytest.fixture(name='server')
+def create_server(tmp_path: Path,
+                  monkeypatch: pytest.MonkeyPatch) -> Iterator[FakeLabelStudio]:
+    """Points new reporters at a fake Label Studio and temporary directories
+
+    Args:
+        tmp_path (Path): Temporary directory
+        monkeypatch (pytest.MonkeyPatch): Patches the client and directories
+
+    Yields:
+        FakeLabelStudio: Fake Label Studio, whose hung requests are released
+        afterwards
+    """
+    monkeypatch.setenv('E4E_DATA_DIR', tmp_path.joinpath('data').as_posix())
+    monkeypatch.setenv('E4E_CACHE_DIR', tmp_path.joinpath('cache').as_posix())
+    server = FakeLabelStudio()
+    monkeypatch.setattr(label_studio, 'LazyLabelStudio', lambda **_: server)
+    server.annotate(1, 1)
+    yield server
+    server.release.set()
+
+
+def test_fingerprint(server: FakeLabelStudio):
+    """Tests that unchanged projects are not synced again, and changed ones are
+    """
+    reporter = Reporter(url='http://ls', api_key='key', projects=[1], days=1)
+    exports = server.projects.exports
+    assert reporter.get_project_report(1).total == 1
+    assert reporter.get_project_report(1).total == 1
+    assert len(exports.snapshots) == 1
+
+    server.annotate(1, 1)
+    assert reporter.get_project_report(1).total == 2
+    assert len(exports.snapshots) == 2
+    assert reporter.get_project_report(1).total == 2
+    assert len(exports.snapshots) == 2
+
+
+def test_fingerprint_after_reused_snapshot(server: FakeLabelStudio):
+    """Tests that a reused snapshot does not hide later annotations
+    """
+    Reporter(url='http://ls', api_key='key', projects=[1], days=1).get_project_report(1)
+    server.annotate(1, 1)
+
+    # A new process finds the earlier snapshot, which is missing an annotation
+    reporter = Reporter(url='http://ls', api_key='key', projects=[1], days=1,
+                        export_max_age=3600)
+    assert reporter.get_project_report(1).total == 1
+    assert len(server.projects.exports.snapshots) == 1
+    assert reporter.get_project_report(1).total == 2
+    assert len(server.projects.exports.snapshots) == 2
+    assert reporter.get_project_report(1).total == 2
+    assert len(server.projects.exports.snapshots) == 2
+
+
+def test_refetch_skips_snapshot_reuse(server: FakeLabelStudio):
+    """Tests that regenerating an expired section never reuses a snapshot
+    """
+    Reporter(url='http://ls', api_key='key', projects=[1], days=1).get_project_report(1)
+    server.annotate(1, 1)
+
+    reporter = Reporter(url='http://ls', api_key='key', projects=[1], days=1,
+                        export_max_age=3600)
+    cycle = dt.datetime(2024, 1, 1, 9, tzinfo=dt.timezone.utc)
+    assert reporter.get_project_reports([1], cycle=cycle, max_age=0)[1].total == 2
+    assert len(server.projects.exports.snapshots) == 2
+
+
+def test_project_timeout(server: FakeLabelStudio):
+    """Tests that a project that overruns its timeout is reported stale
+    """
+    server.annotate(2, 1)
+    reporter = Reporter(url='http://ls', api_key='key', projects=[1, 2], days=1,
+                        project_timeout=0.5)
+    sections = reporter.get_project_reports()
+    assert sections[1].stale_as_of is None
+    assert sections[1].timed_out_after is None
+
+    server.hung.append(1)
+    server.annotate(2, 1)
+    sections = reporter.get_project_reports()
+    assert sections[1].available
+    assert sections[1].total == 1
+    assert sections[1].stale_as_of is not None
+    assert sections[1].timed_out_after == 0.5
+    assert sections[2].total == 2
+    assert sections[2].stale_as_of is None
+
+
+def test_project_timeout_unavailable(server: FakeLabelStudio):
+    """Tests that a project that was never reported and times out is unavailable
+    """
+    server.hung.append(1)
+    reporter = Reporter(url='http://ls', api_key='key', projects=[1], days=1,
+                        project_timeout=0.5)
+    section = reporter.get_project_reports()[1]
+    assert not section.available
+    assert section.stale_as_of is None
+    assert section.timed_out_after == 0.5
+
+
+def test_project_timeout_error(server: FakeLabelStudio):
+    """Tests that a TimeoutError raised by a project is a failure, not a timeout
+    """
+    server.annotate(2, 1)
+    server.errors[1] = TimeoutError
+    reporter = Reporter(url='http://ls', api_key='key', projects=[1, 2], days=1,
+                        project_timeout=30)
+    sections = reporter.get_project_reports()
+    assert 1 not in sections
+    assert sections[2].total == 1
+
+
+def test_context_reuse(server: FakeLabelStudio):
+    """Tests that a reconfigured reporter keeps the context of the same server and key
+    """
+    reporter = Reporter(url='http://ls', api_key='key', projects=[1], days=1)
+    assert reporter.get_project_report(1).total == 1
+
+    reconfigured = Reporter(url='http://ls', api_key='key', projects=[1], days=7,
+                            reuse=reporter)
+    assert reconfigured.context is reporter.context
+    reconfigured.get_project_report(1)
+    assert len(server.projects.exports.snapshots) == 1
+
+    reconfigured = Reporter(url='http://ls', api_key='key', projects=[1], days=1,
+                            export_max_age=3600, reuse=reporter)
+    assert reconfigured.context is reporter.context
+    assert reconfigured.context.exports.reuses_snapshots
+
+    rekeyed = Reporter(url='http://ls', api_key='other', projects=[1], days=1,
+                       reuse=reporter)
+    assert rekeyed.context is not reporter.context
+    assert not rekeyed.context.last_reports
@@ -0,0 +1,98 @@
+"""Tests the service
+"""
+from pathlib import Path
+
+import pytest
+
+from label_studio_slack_reporter import label_studio
+from label_studio_slack_reporter.service import PrewarmSettings, Service
+
+CONFIG = '''
+[prometheus]
+port = 9100
+
+[label_studio]
+url = "http://ls"
+key = "key"
+project_ids = [1]
+report_days = 1
+
+[output.daily]
+type = "slack"
+secret = "xoxb-test"
+channel_id = "C1"
+schedule = "0 9 * * *"
+
+[output.weekly]
+type = "slack"
+secret = "xoxb-test"
+channel_id = "C2"
+schedule = "0 9 * * 1"
+'''
+
+
+@pytest.fixture(name='config_path')
+def create_config(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Writes a service config, with the service's files in a temporary directory
+
+    Args:
+        tmp_path (Path): Temporary directory
+        monkeypatch (pytest.MonkeyPatch): Patches the client and directories
+
+    Returns:
+        Path: Config path
+    """
+    monkeypatch.setenv('E4E_DATA_DIR', tmp_path.joinpath('data').as_posix())
+    monkeypatch.setenv('E4E_CACHE_DIR', tmp_path.joinpath('cache').as_posix())
+    monkeypatch.setattr(label_studio, 'LazyLabelStudio', lambda **_: None)
+    config_path = tmp_path.joinpath('config.toml')
+    config_path.write_text(CONFIG, encoding='utf-8')
+    return config_path
+
+
+def test_prewarm_max_age():
+    """Tests that a report pre-warmed a lead time ahead is still fresh when its run fires
+    """
+    settings = PrewarmSettings(enabled=True)
+    for duration in [1, 60, 1800, 3600]:
+        lead_time = settings.get_lead_time(duration)
+        assert lead_time == min(duration * 1.5 + 60, 3600)
+        assert settings.get_report_max_age(lead_time) > lead_time
+    assert PrewarmSettings().get_report_max_age(600) is None
+
+
+def test_reload(config_path: Path):
+    """Tests that a reload rebuilds only the outputs whose section changed
+    """
+    service = Service(config_path)
+    before = {job.name: job for jobs in service.jobs.values() for job in jobs}
+
+    config_path.write_text(CONFIG.replace('"C2"', '"C3"') + '''
+[output.hourly]
+type = "slack"
+secret = "xoxb-test"
+channel_id = "C4"
+schedule = "0 * * * *"
+''', encoding='utf-8')
+    service.reload()
+    after = {job.name: job for jobs in service.jobs.values() for job in jobs}
+    assert sorted(after) == ['daily', 'hourly', 'weekly']
+    assert after['daily'] is before['daily']
+    assert after['weekly'] is not before['weekly']
+    assert sorted(service.jobs) == ['0 * * * *', '0 9 * * *', '0 9 * * 1']
+
+    config_path.write_text(CONFIG, encoding='utf-8')
+    service.reload()
+    assert sorted(job.name for jobs in service.jobs.values() for job in jobs) == \
+        ['daily', 'weekly']
+
+
+def test_reload_invalid(config_path: Path, caplog: pytest.LogCaptureFixture):
+    """Tests that an invalid config is rejected and the current one kept
+    """
+    service = Service(config_path)
+    jobs = dict(service.jobs)
+    config_path.write_text(CONFIG + '[output.broken]\ntype = "slack"\n', encoding='utf-8')
+    service.reload()
+    assert 'Rejected config' in caplog.text
+    assert service.jobs == jobs
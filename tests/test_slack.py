@@ -0,0 +1,119 @@
+"""Tests Slack delivery
+"""
+import json
+from typing import Dict, List
+
+import pytest
+
+from label_studio_slack_reporter.report import (ProjectReport, Report,
+                                                UserCount, render_blocks)
+from label_studio_slack_reporter.retry import PartialDeliveryError
+from label_studio_slack_reporter.slack import SlackDelivery
+
+
+class FakeClient:
+    """Slack client recording its calls
+    """
+
+    def __init__(self, fail_at: int = -1):
+        self.messages: List[Dict] = []
+        self.files: List[Dict] = []
+        self.fail_at = fail_at
+
+    def chat_postMessage(self, **kwargs):  # pylint: disable=invalid-name
+        """Records a message
+        """
+        if len(self.messages) == self.fail_at:
+            raise ConnectionError('connection reset')
+        self.messages.append(kwargs)
+        return {'ts': f'{len(self.messages)}.0'}
+
+    def files_upload_v2(self, **kwargs):
+        """Records a file upload
+        """
+        self.files.append(kwargs)
+
+
+def make_report(n_projects: int) -> str:
+    """Renders a report with one section per project
+
+    Args:
+        n_projects (int): Number of projects
+
+    Returns:
+        str: Report, rendered as "blocks"
+    """
+    return render_blocks(Report(projects=tuple(
+        ProjectReport(project_id=idx,
+                      title=f'Project {idx}',
+                      users=(UserCount(user_id=1, name='a@ucsd.edu', count=idx),))
+        for idx in range(n_projects))))
+
+
+@pytest.fixture(name='client')
+def create_client(request: pytest.FixtureRequest) -> FakeClient:
+    """Installs a fake client on the delivery engine for this test's token
+
+    Args:
+        request (pytest.FixtureRequest): Test request
+
+    Returns:
+        FakeClient: Fake client
+    """
+    client = FakeClient(getattr(request, 'param', -1))
+    SlackDelivery.get_instance(request.node.name).client = client
+    return client
+
+
+def post(request: pytest.FixtureRequest, message: str, **kwargs):
+    """Posts through the delivery engine for this test's token
+
+    Args:
+        request (pytest.FixtureRequest): Test request
+        message (str): Report, rendered as "blocks"
+    """
+    SlackDelivery.get_instance(request.node.name).post('C1', message,
+                                                       rate=1000, burst=1000, **kwargs)
+
+
+def test_block_limit(client: FakeClient, request: pytest.FixtureRequest):
+    """Tests that reports of more than 50 sections continue in a thread
+    """
+    message = make_report(120)
+    post(request, message)
+    assert [len(sent['blocks']) for sent in client.messages] == [50, 50, 20]
+    assert [sent['thread_ts'] for sent in client.messages] == [None, '1.0', '1.0']
+    blocks = [block for sent in client.messages for block in sent['blocks']]
+    assert blocks == json.loads(message)['blocks']
+    assert all(sent['text'] == 'Results for Project 0' for sent in client.messages)
+
+
+def test_single_message(client: FakeClient, request: pytest.FixtureRequest):
+    """Tests that a report of exactly 50 sections is one message
+    """
+    post(request, make_report(50))
+    assert [len(sent['blocks']) for sent in client.messages] == [50]
+
+
+def test_file_threshold(client: FakeClient, request: pytest.FixtureRequest):
+    """Tests that long reports are uploaded as a file
+    """
+    message = make_report(120)
+    post(request, message, file_threshold=1000)
+    assert not client.messages
+    assert client.files[0]['content'] == json.loads(message)['text']
+
+
+@pytest.mark.parametrize('client', [2], indirect=True)
+def test_resume_thread(client: FakeClient, request: pytest.FixtureRequest):
+    """Tests that a failed reply reports its progress and a retry continues the thread
+    """
+    message = make_report(160)
+    with pytest.raises(PartialDeliveryError) as exc_info:
+        post(request, message)
+    assert exc_info.value.progress == {'thread_ts': '1.0', 'posted': 2}
+
+    client.fail_at = -1
+    post(request, message, **exc_info.value.progress)
+    assert [len(sent['blocks']) for sent in client.messages] == [50, 50, 50, 10]
+    assert [sent['thread_ts'] for sent in client.messages] == [None, '1.0', '1.0', '1.0']
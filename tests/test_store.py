@@ -0,0 +1,123 @@
+"""Tests the annotation store
+"""
+import datetime as dt
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pytest
+
+from label_studio_slack_reporter.store import AnnotationStore
+from label_studio_slack_reporter.sync import ProjectSyncState
+
+DAY = 24 * 60 * 60
+START = dt.datetime(2024, 1, 1, tzinfo=dt.timezone.utc).timestamp()
+
+# (annotation id, task id, user, seconds after START)
+ANNOTATIONS = [
+    (1, 1, 1, 0),
+    (2, 1, 2, 60),
+    (3, 2, 1, DAY / 2),
+    (4, 2, None, DAY - 1),
+    (5, 3, 1, DAY),
+    (6, 3, 2, DAY + 3600),
+    (7, 4, 2, 2 * DAY + 10),
+    (8, 4, 1, 3 * DAY - 10),
+    (9, 5, None, 3 * DAY),
+    (10, 5, 2, 4 * DAY + DAY / 2),
+]
+
+
+def make_tasks(annotations: List) -> List[Dict]:
+    """Groups annotations into export shaped tasks
+
+    Args:
+        annotations (List): Annotation tuples
+
+    Returns:
+        List[Dict]: Tasks
+    """
+    tasks: Dict[int, Dict] = {}
+    for idx, task_id, user, offset in annotations:
+        created_at = dt.datetime.fromtimestamp(START + offset, dt.timezone.utc)
+        tasks.setdefault(task_id, {'id': task_id, 'annotations': []})
+        tasks[task_id]['annotations'].append({'id': idx,
+                                              'completed_by': user,
+                                              'created_at': created_at.isoformat(),
+                                              'updated_at': created_at.isoformat()})
+    return list(tasks.values())
+
+
+def expected_counts(annotations: List,
+                    since: Optional[float],
+                    until: Optional[float]) -> Dict[Optional[int], int]:
+    """Counts annotations per user by brute force
+
+    Args:
+        annotations (List): Annotation tuples
+        since (Optional[float]): Inclusive window start
+        until (Optional[float]): Exclusive window end
+
+    Returns:
+        Dict[Optional[int], int]: Number of annotations per user
+    """
+    return dict(Counter(user for _, _, user, offset in annotations
+                        if (since is None or START + offset >= since) and
+                        (until is None or START + offset < until)))
+
+
+WINDOWS = [
+    (None, None),
+    (START, None),
+    (None, START + 2 * DAY),
+    (START, START + 2 * DAY),
+    (START + 1, START + 2 * DAY - 1),
+    (START + DAY / 2, START + 3 * DAY - 10),
+    (START + DAY / 2, START + 3 * DAY - 9),
+    (START + DAY - 1, START + DAY + 1),
+    (START + DAY / 4, START + DAY * 3 / 4),
+    (START + 3 * DAY, START + 3 * DAY),
+]
+
+
+@pytest.mark.parametrize('since,until', WINDOWS)
+def test_count_by_user_window_edges(tmp_path: Path,
+                                    since: Optional[float],
+                                    until: Optional[float]):
+    """Tests that daily rollups and raw edge counts add up to the exact window
+    """
+    store = AnnotationStore(tmp_path.joinpath('annotations.sqlite3'))
+    store.replace_project(1, make_tasks(ANNOTATIONS))
+    assert store.count_by_user(1, since, until) == expected_counts(ANNOTATIONS, since, until)
+    assert store.count(1, since, until) == sum(expected_counts(ANNOTATIONS,
+                                                               since, until).values())
+
+
+def test_count_by_user_after_upsert(tmp_path: Path):
+    """Tests that merged tasks move their annotations between rollups
+    """
+    store = AnnotationStore(tmp_path.joinpath('annotations.sqlite3'))
+    state = ProjectSyncState(1)
+    store.replace_project(1, state.track(make_tasks(ANNOTATIONS)), state)
+
+    # Task 3 is re-annotated by user 3 a day later, and task 6 is new
+    updated = [annotation for annotation in ANNOTATIONS if annotation[1] != 3]
+    changes = [(11, 3, 3, 2 * DAY + DAY / 2), (12, 6, 1, 4 * DAY - 1)]
+    store.upsert_tasks(1, state.track(make_tasks(changes)), state)
+    updated.extend(changes)
+
+    for since, until in WINDOWS:
+        assert store.count_by_user(1, since, until) == \
+            expected_counts(updated, since, until)
+    assert store.get_watermark(1) == state.watermark
+
+
+def test_count_by_user_rebuilds_rollups(tmp_path: Path):
+    """Tests that a reopened store answers from the persisted rollups
+    """
+    path = tmp_path.joinpath('annotations.sqlite3')
+    AnnotationStore(path).replace_project(1, make_tasks(ANNOTATIONS))
+    store = AnnotationStore(path)
+    window = (START + DAY / 2, START + 4 * DAY)
+    assert store.count_by_user(1, *window) == expected_counts(ANNOTATIONS, *window)
+    assert store.count_by_user(2) == {}
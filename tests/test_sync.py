@@ -0,0 +1,101 @@
+"""Tests incremental sync state
+"""
+import datetime as dt
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel
+
+from label_studio_slack_reporter.sync import ProjectSyncState, parse_timestamps
+
+
+class Annotation(BaseModel):
+    """SDK shaped annotation
+    """
+    id: int
+    completed_by: Optional[int] = None
+    created_at: dt.datetime
+    updated_at: Optional[dt.datetime] = None
+
+
+class Task(BaseModel):
+    """SDK shaped task
+    """
+    id: int
+    created_at: dt.datetime
+    updated_at: dt.datetime
+    annotations: List[Annotation] = []
+
+
+class LegacyTask:
+    """SDK model exposing only `dict()`, which keeps datetimes
+    """
+    # pylint: disable=too-few-public-methods
+
+    def __init__(self, **fields):
+        self.__fields = fields
+
+    def dict(self) -> Dict:
+        """Dumps the model
+
+        Returns:
+            Dict: Fields
+        """
+        return dict(self.__fields)
+
+
+def test_track_sdk_models():
+    """Tests tracking tasks returned by `tasks.list`
+    """
+    newest = dt.datetime(2024, 1, 3, 12, tzinfo=dt.timezone.utc)
+    tasks = [
+        Task(id=1,
+             created_at=dt.datetime(2024, 1, 1, tzinfo=dt.timezone.utc),
+             updated_at=dt.datetime(2024, 1, 2, tzinfo=dt.timezone.utc),
+             annotations=[Annotation(id=10, completed_by=3, created_at=newest)]),
+        LegacyTask(id=2,
+                   created_at=dt.datetime(2024, 1, 1),
+                   updated_at=dt.datetime(2024, 1, 2),
+                   annotations=[{'id': 11,
+                                 'completed_by': None,
+                                 'created_at': dt.datetime(2024, 1, 2)}]),
+    ]
+    started = dt.datetime(2024, 1, 4, tzinfo=dt.timezone.utc)
+    state = ProjectSyncState(1)
+    tracked = list(state.track(tasks, started))
+
+    assert [task['id'] for task in tracked] == [1, 2]
+    assert state.watermark == (started - dt.timedelta(
+        seconds=ProjectSyncState.OVERLAP_S)).isoformat()
+    created_at = parse_timestamps([annotation['created_at']
+                                   for task in tracked
+                                   for annotation in task['annotations']])
+    assert list(created_at) == [newest.timestamp(),
+                                dt.datetime(2024, 1, 2, tzinfo=dt.timezone.utc).timestamp()]
+
+
+def test_watermark_predates_listing():
+    """Tests that a task updated while it was being listed is listed again
+
+    The watermark only moves once the listing is consumed, and then to before
+    the listing started rather than to the newest timestamp seen.
+    """
+    started = dt.datetime(2024, 1, 4, tzinfo=dt.timezone.utc)
+    late = started + dt.timedelta(seconds=1)
+    state = ProjectSyncState(1, watermark='2024-01-01T00:00:00+00:00')
+    tracked = state.track([Task(id=1,
+                                created_at=late,
+                                updated_at=late,
+                                annotations=[Annotation(id=10, completed_by=3,
+                                                        created_at=late)])],
+                          started)
+    assert state.watermark == '2024-01-01T00:00:00+00:00'
+    assert [task['id'] for task in tracked] == [1]
+    assert dt.datetime.fromisoformat(state.watermark) < started < late
+
+
+def test_parse_timestamps_offsets():
+    """Tests bulk parsing of UTC, naive and offset timestamps
+    """
+    assert list(parse_timestamps(['2024-01-01T00:00:00Z',
+                                  '2024-01-01T00:00:00'])) == [1704067200.0] * 2
+    assert list(parse_timestamps(['2024-01-01T01:00:00+01:00'])) == [1704067200.0]